@@ -29,13 +29,17 @@ import re
 import string
 import sqlite3
 import hashlib
+import heapq
 import csv
 import io
 import logging
 import math
+import atexit
+import platform
 from datetime import datetime, timedelta
 from functools import wraps
 from threading import Lock
+from urllib.request import pathname2url
 
 import requests
 import feedparser
@@ -56,7 +60,16 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=12)
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# 'threading' for development; serve.py runs production on 'gevent' (or 'eventlet'),
+# which must be monkey-patched before this module is imported.
+SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')
+# Multi-worker mode: emits travel over a pub/sub bus (redis:// URL; `python mq_broker.py`
+# is a local stand-in) so a client connected to one worker receives events from any other.
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+MULTI_WORKER = SOCKETIO_MESSAGE_QUEUE is not None
+WORKER_ID = os.environ.get('WORKER_ID') or f'{platform.node()}-{os.getpid()}'
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=SOCKETIO_ASYNC_MODE,
+                    message_queue=SOCKETIO_MESSAGE_QUEUE)
 
 # Block access to sensitive files (defense-in-depth — static_folder='static' already isolates)
 _BLOCKED_EXTENSIONS = {'.py', '.pyc', '.db', '.sqlite', '.env', '.jsonl', '.log', '.cfg', '.ini', '.toml', '.yaml', '.yml'}
@@ -95,17 +108,497 @@ EIA_CACHE_TTL = 3600  # 1 hour
 active_connections = set()
 connections_lock = Lock()
 
-# Trader name → socket ID mapping (for call signaling)
-trader_sids = {}
+# ---------------------------------------------------------------------------
+# Presence Registry
+# ---------------------------------------------------------------------------
+# Bidirectional and multi-tab: every socket a trader has open is tracked, and the
+# reverse map makes disconnect O(1). Both maps are guarded by trader_sids_lock.
+trader_sids = {}        # trader_name -> set of sids
+sid_traders = {}        # sid -> trader_name
 trader_sids_lock = Lock()
 
+def presence_register(sid, trader_name):
+    """Attach a socket to a trader. Returns True if it's the trader's first open socket."""
+    with trader_sids_lock:
+        previous = sid_traders.get(sid)
+        if previous == trader_name:
+            return False
+        if previous:
+            _presence_detach(sid, previous)
+        sid_traders[sid] = trader_name
+        sids = trader_sids.setdefault(trader_name, set())
+        sids.add(sid)
+        return len(sids) == 1
+
+def presence_unregister(sid):
+    """Detach a socket. Returns (trader_name or None, True if that was their last socket)."""
+    with trader_sids_lock:
+        trader_name = sid_traders.pop(sid, None)
+        if trader_name is None:
+            return None, False
+        return trader_name, _presence_detach(sid, trader_name)
+
+def _presence_detach(sid, trader_name):
+    sids = trader_sids.get(trader_name)
+    if sids is None:
+        return False
+    sids.discard(sid)
+    if not sids:
+        del trader_sids[trader_name]
+        return True
+    return False
+
+# last_seen is write-behind: touches land in memory and one batched UPDATE flushes
+# them every LAST_SEEN_FLUSH_INTERVAL seconds (see _last_seen_flush_loop)
+LAST_SEEN_FLUSH_INTERVAL = 5.0
+_last_seen_pending = {}
+_last_seen_lock = Lock()
+
+def touch_last_seen(trader_name):
+    """Record that a trader was just seen; persisted on the next flush."""
+    if trader_name:
+        with _last_seen_lock:
+            _last_seen_pending[trader_name] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+def flush_last_seen():
+    """Write buffered last_seen values in one executemany. Returns the number flushed."""
+    with _last_seen_lock:
+        if not _last_seen_pending:
+            return 0
+        pending = list(_last_seen_pending.items())
+        _last_seen_pending.clear()
+    conn = get_db_standalone()
+    try:
+        conn.executemany("UPDATE traders SET last_seen=? WHERE trader_name=?",
+                         [(ts, name) for name, ts in pending])
+        conn.commit()
+    except sqlite3.Error:
+        # Put them back unless a newer touch arrived meanwhile
+        with _last_seen_lock:
+            for name, ts in pending:
+                _last_seen_pending.setdefault(name, ts)
+        raise
+    finally:
+        conn.close()
+    return len(pending)
+
+# ---------------------------------------------------------------------------
+# Socket.IO Rooms
+# ---------------------------------------------------------------------------
+# Sockets join these in handle_register_trader (routes/misc.py) so events can be
+# emitted only to the traders they concern instead of broadcast to everyone.
+def trader_room(trader_name):
+    return f'trader:{trader_name}'
+
+def conversation_room(conv_id):
+    return f'conv:{conv_id}'
+
+def team_room(team_id):
+    return f'team:{team_id}'
+
+def tournament_room(tournament_id):
+    return f'tournament:{tournament_id}'
+
+def trader_rooms(*trader_names):
+    """Room list for emitting one event to several traders (each socket receives it once)."""
+    return [trader_room(n) for n in dict.fromkeys(trader_names) if n]
+
+def _connected_sids(trader_names):
+    online = online_traders()
+    return [sid for n in trader_names for sid in online.get(n, ())]
+
+def add_traders_to_room(room, trader_names):
+    """Join the connected sockets of the given traders to a room (e.g. after a membership change)."""
+    for sid in _connected_sids(trader_names):
+        socketio.server.enter_room(sid, room, namespace='/')
+
+def remove_traders_from_room(room, trader_names):
+    """Remove the connected sockets of the given traders from a room."""
+    for sid in _connected_sids(trader_names):
+        socketio.server.leave_room(sid, room, namespace='/')
+
+# ---------------------------------------------------------------------------
+# Shared Worker State
+# ---------------------------------------------------------------------------
+# With MULTI_WORKER every process keeps its own sockets, so the few facts other
+# workers need (who is online, latest prices, snapshots) go through the shared_state
+# table and single-owner jobs take a lease. Single-process mode never touches these.
+PRESENCE_PUBLISH_INTERVAL = 2.0   # seconds between presence publishes per worker
+PRESENCE_STALE_AFTER = 15.0       # a worker that hasn't published for this long is gone
+
+def shared_put(key, value):
+    """Publish a JSON-serialisable value for every worker to read."""
+    conn = get_db_standalone()
+    try:
+        conn.execute(
+            "INSERT INTO shared_state (key, value, worker_id, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value=excluded.value, worker_id=excluded.worker_id, "
+            "updated_at=excluded.updated_at",
+            (key, json.dumps(value), WORKER_ID, time.time()))
+        conn.commit()
+    finally:
+        conn.close()
+
+# Hot-path markers (trade spot prices, dirty flags) are write-behind: the latest value
+# per key waits in memory and one transaction flushes them every SHARED_FLUSH_INTERVAL
+# seconds, instead of a connection and commit per trade (see _shared_flush_loop)
+SHARED_FLUSH_INTERVAL = 0.25
+_shared_pending = {}
+_shared_pending_lock = Lock()
+
+def shared_put_later(key, value):
+    """Queue a shared value for the next flush. Readers see it stamped with the time of this call."""
+    with _shared_pending_lock:
+        _shared_pending[key] = (json.dumps(value), time.time())
+
+def flush_shared_state():
+    """Write queued shared values in one executemany. Returns the number flushed."""
+    with _shared_pending_lock:
+        if not _shared_pending:
+            return 0
+        pending = list(_shared_pending.items())
+        _shared_pending.clear()
+    conn = get_db_standalone()
+    try:
+        # Never let an older queued stamp overwrite a newer one another worker already flushed
+        conn.executemany(
+            "INSERT INTO shared_state (key, value, worker_id, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value=excluded.value, worker_id=excluded.worker_id, "
+            "updated_at=excluded.updated_at WHERE excluded.updated_at >= shared_state.updated_at",
+            [(key, value, WORKER_ID, ts) for key, (value, ts) in pending])
+        conn.commit()
+    except sqlite3.Error:
+        with _shared_pending_lock:
+            for key, entry in pending:
+                _shared_pending.setdefault(key, entry)
+        raise
+    finally:
+        conn.close()
+    return len(pending)
+
+def shared_get(key, max_age=None):
+    """Return (value, updated_at) for a shared key, or None if missing/older than max_age."""
+    conn = get_db_standalone()
+    try:
+        row = conn.execute("SELECT value, updated_at FROM shared_state WHERE key=?", (key,)).fetchone()
+    finally:
+        conn.close()
+    if not row or (max_age is not None and time.time() - row['updated_at'] > max_age):
+        return None
+    return json.loads(row['value']), row['updated_at']
+
+def shared_get_prefix(prefix, max_age=None):
+    """Return {key: value} for every shared key starting with prefix."""
+    conn = get_db_standalone()
+    try:
+        rows = conn.execute("SELECT key, value, updated_at FROM shared_state WHERE key >= ? AND key < ?",
+                            (prefix, prefix + '\uffff')).fetchall()
+    finally:
+        conn.close()
+    now = time.time()
+    return {r['key']: json.loads(r['value']) for r in rows
+            if max_age is None or now - r['updated_at'] <= max_age}
+
+def claim_lease(name, ttl):
+    """Take or renew a named lease for ttl seconds. True if this worker holds it.
+
+    Used to keep one copy of singleton jobs (leaderboard push, news ingest) running
+    across workers; another worker takes over once the holder stops renewing.
+    """
+    if not MULTI_WORKER:
+        return True
+    now = time.time()
+    conn = get_db_standalone()
+    try:
+        cur = conn.execute(
+            "INSERT INTO worker_leases (name, worker_id, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET worker_id=excluded.worker_id, expires_at=excluded.expires_at "
+            "WHERE worker_leases.worker_id = excluded.worker_id OR worker_leases.expires_at < ?",
+            (name, WORKER_ID, now + ttl, now))
+        conn.commit()
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+def _local_presence():
+    with trader_sids_lock:
+        traders = {name: sorted(sids) for name, sids in trader_sids.items()}
+    with connections_lock:
+        count = len(active_connections)
+    return {'connections': count, 'traders': traders}
+
+# Other workers publish every PRESENCE_PUBLISH_INTERVAL, so re-reading their presence on
+# every connect or room change would only return the same rows again
+_remote_presence = {'at': 0.0, 'workers': {}}
+_remote_presence_lock = Lock()
+
+def remote_presence():
+    """{presence key: presence} for every other live worker, re-read at most once a second."""
+    now = time.time()
+    with _remote_presence_lock:
+        if now - _remote_presence['at'] < PRESENCE_PUBLISH_INTERVAL / 2:
+            return _remote_presence['workers']
+    workers = shared_get_prefix('presence:', PRESENCE_STALE_AFTER)
+    workers.pop(f'presence:{WORKER_ID}', None)
+    with _remote_presence_lock:
+        _remote_presence.update(at=now, workers=workers)
+    return workers
+
+def online_traders():
+    """{trader_name: [sids]} across every live worker (this worker's view is always current)."""
+    local = _local_presence()['traders']
+    if not MULTI_WORKER:
+        return local
+    merged = {}
+    for presence in remote_presence().values():
+        for name, sids in presence['traders'].items():
+            merged.setdefault(name, []).extend(sids)
+    for name, sids in local.items():
+        merged.setdefault(name, []).extend(sids)
+    return merged
+
+def presence_elsewhere(trader_name):
+    """Whether another live worker has a socket open for trader_name (always False single-worker).
+
+    For presence_change: a trader is only online/offline when the first/last socket on
+    any worker opens/closes. Publishes this worker's presence before reading the others'
+    fresh, so when a trader's last tabs close on two workers at once one of them sees it.
+    """
+    if not MULTI_WORKER:
+        return False
+    shared_put(f'presence:{WORKER_ID}', _local_presence())
+    workers = shared_get_prefix('presence:', PRESENCE_STALE_AFTER)
+    workers.pop(f'presence:{WORKER_ID}', None)
+    with _remote_presence_lock:
+        _remote_presence.update(at=time.time(), workers=workers)
+    return any(trader_name in p['traders'] for p in workers.values())
+
+def connection_total():
+    """Connected sockets across every live worker."""
+    local = _local_presence()['connections']
+    if not MULTI_WORKER:
+        return local
+    return local + sum(p['connections'] for p in remote_presence().values())
+
+# Long-running jobs registered by blueprints (news ingest, refreshers, ...)
+_background_jobs = []
+_background_started = False
+_background_lock = Lock()
+
+def background_job(fn):
+    """Register a function to run as a background task once the server starts."""
+    _background_jobs.append(fn)
+    return fn
+
+@background_job
+def _presence_publish_loop():
+    """Publish this worker's sockets/traders so other workers see them (multi-worker only)."""
+    if not MULTI_WORKER:
+        return
+    last, last_at = None, 0.0
+    while True:
+        try:
+            presence = _local_presence()
+            # Unchanged presence still re-publishes as a heartbeat before it would go stale
+            if presence != last or time.time() - last_at > PRESENCE_STALE_AFTER / 3:
+                shared_put(f'presence:{WORKER_ID}', presence)
+                last, last_at = presence, time.time()
+        except Exception as e:
+            logger.warning(f"Presence publish failed: {e}")
+        socketio.sleep(PRESENCE_PUBLISH_INTERVAL)
+
+@background_job
+def _shared_flush_loop():
+    if not MULTI_WORKER:
+        return
+    while True:
+        socketio.sleep(SHARED_FLUSH_INTERVAL)
+        try:
+            flush_shared_state()
+        except Exception as e:
+            logger.warning(f"shared_state flush failed: {e}")
+
+@background_job
+def _last_seen_flush_loop():
+    while True:
+        socketio.sleep(LAST_SEEN_FLUSH_INTERVAL)
+        try:
+            flush_last_seen()
+        except Exception as e:
+            logger.warning(f"last_seen flush failed: {e}")
+
+# connection_count is broadcast at most once per interval, and only when it changed,
+# instead of on every connect/disconnect (O(N) sends each, O(N^2) during a reconnect storm)
+CONNECTION_COUNT_INTERVAL = 1.0
+
+@background_job
+def _connection_count_loop():
+    last = None
+    while True:
+        socketio.sleep(CONNECTION_COUNT_INTERVAL)
+        try:
+            if not claim_lease('connection_count', 5 * CONNECTION_COUNT_INTERVAL):
+                last = None
+                continue
+            count = connection_total()
+            if count != last:
+                socketio.emit('connection_count', {'count': count})
+                last = count
+        except Exception as e:
+            logger.warning(f"connection_count broadcast failed: {e}")
+
+def start_background_jobs():
+    """Start every registered background job. Safe to call more than once."""
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    atexit.register(flush_last_seen)
+    if MULTI_WORKER:
+        atexit.register(flush_shared_state)
+    for fn in _background_jobs:
+        socketio.start_background_task(fn)
+        logger.info(f"Background job started: {fn.__name__}")
+
+def run_blocking(fn, *args, **kwargs):
+    """Run a call that blocks in C (yfinance/curl, long SQLite work) off the event loop.
+
+    Monkey-patching makes sockets cooperative, but C extensions still block the whole
+    gevent/eventlet hub, so hand those calls to a real OS thread. In threading mode this
+    is a plain call. fn must not touch a connection opened on another thread.
+    """
+    mode = socketio.async_mode
+    if mode in ('gevent', 'gevent_uwsgi'):
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+    if mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+# ---------------------------------------------------------------------------
+# Scheduled Jobs
+# ---------------------------------------------------------------------------
+# One-shot deadlines (tournament start/end, news auto-flash) are rows in
+# scheduled_jobs keyed by (kind, ref_id), so scheduling again moves the deadline.
+# The worker holding the 'scheduler' lease mirrors PENDING rows into a heap, picking
+# up changes by seq, and runs the @scheduled_handler for each one as it comes due.
+# Each due job is its own task and runs its handler through run_blocking on its own
+# connection, so a slow tournament end neither blocks the event loop nor holds up
+# later jobs. Handlers return their emits, which are sent from the event loop.
+# Rows survive restarts: anything that fell due while the server was down fires on
+# boot. Handlers must be idempotent, because an interrupted run is retried.
+SCHEDULER_POLL_INTERVAL = 1.0    # seconds; bounds firing latency and new-job pickup
+
+_schedule_handlers = {}
+
+def scheduled_handler(kind):
+    """Register fn(conn, ref_id) to run when a job of this kind comes due.
+
+    fn commits, and returns [(event, payload, room)] to emit (room None = everyone) or None.
+    """
+    def register(fn):
+        _schedule_handlers[kind] = fn
+        return fn
+    return register
+
+def utc_seconds(ts):
+    """Epoch seconds for the naive-UTC timestamps the DB stores (ISO or SQLite format)."""
+    return (datetime.fromisoformat(str(ts).replace(' ', 'T')) - datetime(1970, 1, 1)).total_seconds()
+
+def schedule_job(db, kind, ref_id, due_at):
+    """Set or move the deadline (epoch seconds) for (kind, ref_id). Caller commits."""
+    db.execute(
+        "INSERT INTO scheduled_jobs (kind, ref_id, due_at, status, seq) "
+        "VALUES (?, ?, ?, 'PENDING', (SELECT IFNULL(MAX(seq), 0) + 1 FROM scheduled_jobs)) "
+        "ON CONFLICT(kind, ref_id) DO UPDATE SET due_at=excluded.due_at, status='PENDING', "
+        "error=NULL, fired_at=NULL, seq=excluded.seq",
+        (kind, ref_id, due_at))
+
+def cancel_jobs(db, kind, ref_ids=None):
+    """Cancel pending jobs of a kind: the given ref_ids, or all of them. Caller commits."""
+    sql = "UPDATE scheduled_jobs SET status='CANCELLED' WHERE kind=? AND status='PENDING'"
+    if ref_ids is None:
+        db.execute(sql, (kind,))
+    else:
+        db.executemany(sql + " AND ref_id=?", [(kind, r) for r in ref_ids])
+
+def _run_scheduled_job(due_at, kind, ref_id):
+    """Claim and run one due job on a connection of its own. Returns the handler's emits."""
+    conn = get_db_standalone()
+    try:
+        # The heap may hold entries that were since moved or cancelled; only the row
+        # still PENDING at this exact due_at is claimed
+        claimed = conn.execute(
+            "UPDATE scheduled_jobs SET status='RUNNING' WHERE kind=? AND ref_id=? AND status='PENDING' AND due_at=?",
+            (kind, ref_id, due_at)).rowcount
+        conn.commit()
+        if not claimed:
+            return []
+        status, error, emits = 'DONE', None, []
+        try:
+            handler = _schedule_handlers.get(kind)
+            if handler is None:
+                raise LookupError(f"no handler registered for '{kind}'")
+            emits = handler(conn, ref_id) or []
+        except Exception as e:
+            conn.rollback()
+            status, error = 'FAILED', str(e)
+            logger.warning(f"Scheduled job {kind}:{ref_id} failed: {e}")
+        # A handler that rescheduled its own job left it PENDING; don't overwrite that
+        conn.execute("UPDATE scheduled_jobs SET status=?, error=?, fired_at=? "
+                     "WHERE kind=? AND ref_id=? AND status='RUNNING'",
+                     (status, error, time.time(), kind, ref_id))
+        conn.commit()
+        return emits
+    finally:
+        conn.close()
+
+def _dispatch_scheduled_job(due_at, kind, ref_id):
+    try:
+        for event, payload, room in run_blocking(_run_scheduled_job, due_at, kind, ref_id):
+            socketio.emit(event, payload, to=room)
+    except Exception as e:
+        logger.warning(f"Scheduled job {kind}:{ref_id} dispatch failed: {e}")
+
+@background_job
+def _scheduler_loop():
+    """Fire scheduled jobs as they come due (one worker at a time, via the 'scheduler' lease)."""
+    heap, seen = [], None
+    while True:
+        socketio.sleep(SCHEDULER_POLL_INTERVAL)
+        try:
+            if not claim_lease('scheduler', max(10 * SCHEDULER_POLL_INTERVAL, 10)):
+                heap, seen = [], None
+                continue
+            conn = get_db_standalone()
+            try:
+                if seen is None:
+                    # Boot, or the lease moved here: retry whatever a previous run left RUNNING
+                    # and load every pending deadline
+                    conn.execute("UPDATE scheduled_jobs SET status='PENDING' WHERE status='RUNNING'")
+                    conn.commit()
+                    heap, seen = [], -1
+                for r in conn.execute("SELECT kind, ref_id, due_at, seq FROM scheduled_jobs "
+                                      "WHERE seq > ? AND status='PENDING' ORDER BY seq", (seen,)).fetchall():
+                    heapq.heappush(heap, (r['due_at'], r['kind'], r['ref_id']))
+                    seen = r['seq']
+                now = time.time()
+                while heap and heap[0][0] <= now:
+                    socketio.start_background_task(_dispatch_scheduled_job, *heapq.heappop(heap))
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Scheduler pass failed: {e}")
+
 # ---------------------------------------------------------------------------
 # Database Helpers
 # ---------------------------------------------------------------------------
 def get_db():
     """Get database connection for current request."""
     if 'db' not in g:
-        g.db = sqlite3.connect(DATABASE)
+        g.db = sqlite3.connect(DATABASE, uri=True)     # uri: shards are ATTACHed as mode=rw URIs
         g.db.row_factory = sqlite3.Row
         g.db.execute("PRAGMA journal_mode=WAL")
         g.db.execute("PRAGMA foreign_keys=ON")
@@ -117,14 +610,450 @@ def close_db(exception):
     if db is not None:
         db.close()
 
+@app.errorhandler(sqlite3.IntegrityError)
+def shard_closed(e):
+    """A tournament write that lost the race with the end-of-tournament merge."""
+    if SHARD_CLOSED not in str(e):
+        raise e
+    return jsonify({'success': False, 'error': 'Tournament has ended'}), 409
+
 def get_db_standalone():
     """Get database connection outside of request context."""
-    conn = sqlite3.connect(DATABASE)
+    conn = sqlite3.connect(DATABASE, uri=True)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
+# ---------------------------------------------------------------------------
+# Tournament Shards — per-tournament SQLite files while a tournament is live
+# ---------------------------------------------------------------------------
+# With TOURNAMENT_SHARDS=true, starting a tournament moves its entries, news and trades
+# into their own file, so a live event's trade and close writes take that file's WAL
+# lock instead of the one main-book trading, chat and snapshots queue on. Code reaches
+# those tables as f"{tournament_schema(db, tourn)}.tournament_trades": 'main', or the
+# shard ATTACHed to the connection on first use. Ending merges the rows back (ids were
+# reserved in main up front, so they never collide) and archives or deletes the file.
+# The merge seals the shard in the same transaction as the copy: triggers that reject
+# any further write, and user_version set to 1. A write that was waiting on the merge's
+# lock fails with SHARD_CLOSED instead of landing in a file that is about to go away.
+# Shards are attached read-write only (mode=rw), so a file removed by a merge is an
+# error on ATTACH, not a new empty database.
+TOURNAMENT_SHARDS = os.environ.get('TOURNAMENT_SHARDS', 'false').lower() == 'true'
+TOURNAMENT_SHARD_DIR = os.environ.get('TOURNAMENT_SHARD_DIR',
+                                      os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'shards'))
+TOURNAMENT_SHARD_ARCHIVE = os.environ.get('TOURNAMENT_SHARD_ARCHIVE', 'false').lower() == 'true'
+TOURNAMENT_SHARD_TABLES = ('tournament_entries', 'tournament_news_events', 'tournament_trades')
+TOURNAMENT_SHARD_ID_BLOCK = 10_000_000   # ids reserved in main per shard, per table
+TOURNAMENT_SHARD_ATTACH_MAX = 8          # SQLite allows 10 attached files per connection
+SHARD_CLOSED = 'tournament shard closed'  # error from a write to a merged shard
+
+_SHARD_INDEXES = {
+    'tournament_entries': 'UNIQUE INDEX {s}.uq_tourn_entries ON tournament_entries(tournament_id, trader_name)',
+    'tournament_news_events': 'INDEX {s}.idx_tourn_news_tid ON tournament_news_events(tournament_id)',
+    'tournament_trades': 'INDEX {s}.idx_tourn_trades_tid ON tournament_trades(tournament_id, trader_name)',
+}
+
+
+def _shard_alias(tid):
+    return f'tshard_{int(tid)}'
+
+
+def _shard_columns(db, schema, table):
+    return [c['name'] for c in db.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _shard_sealed(db, alias):
+    return db.execute(f"PRAGMA {alias}.user_version").fetchone()[0] == 1
+
+
+def _attach_shard(db, tid, path):
+    """ATTACH a shard under its alias (no-op if attached). Must run outside a transaction.
+
+    A sealed shard still attached from before a merge is re-attached, in case the
+    tournament has been sharded again into a new file under the same name.
+    """
+    alias = _shard_alias(tid)
+    attached = [r[1] for r in db.execute("PRAGMA database_list")]
+    if alias in attached:
+        if not _shard_sealed(db, alias):
+            return alias
+        db.execute(f"DETACH DATABASE {alias}")
+        attached.remove(alias)
+    shards = [a for a in attached if a.startswith('tshard_')]
+    if len(shards) >= TOURNAMENT_SHARD_ATTACH_MAX:
+        for other in shards:
+            db.execute(f"DETACH DATABASE {other}")
+    # WAL is persistent: set when the shard was made
+    db.execute(f"ATTACH DATABASE ? AS {alias}", (f"file:{pathname2url(path)}?mode=rw",))
+    return alias
+
+
+def tournament_schema(db, tourn):
+    """Schema holding a tournament's entries, news and trades on this connection.
+
+    tourn is a tournaments row (or dict) or an id. 'main' unless the tournament is
+    sharded; then its shard is attached on first use, which can't happen inside a
+    transaction, so call this before the first write.
+    """
+    if not isinstance(tourn, (dict, sqlite3.Row)):
+        tourn = db.execute("SELECT id, shard FROM tournaments WHERE id=?", (tourn,)).fetchone()
+    if tourn is None or 'shard' not in tourn.keys() or not tourn['shard']:
+        return 'main'
+    alias = missing = None
+    try:
+        alias = _attach_shard(db, tourn['id'], os.path.join(TOURNAMENT_SHARD_DIR, tourn['shard']))
+        if not _shard_sealed(db, alias):
+            return alias
+    except sqlite3.OperationalError as e:
+        missing = e
+    # Sealed or gone: merged back since the row was read, so look again
+    row = db.execute("SELECT shard FROM tournaments WHERE id=?", (tourn['id'],)).fetchone()
+    if not row or row['shard'] != tourn['shard']:
+        return tournament_schema(db, tourn['id'])
+    if missing:
+        raise missing
+    return alias        # sealed by a merge that never committed in main: close_tournament_shard repeats it
+
+
+def open_tournament_shard(db, tid):
+    """Move a tournament's entries, news and trades into a new shard file. Commits.
+
+    No-op (returns None) unless TOURNAMENT_SHARDS is on, or if already sharded; call
+    outside a transaction. Returns the shard's file name.
+    """
+    row = db.execute("SELECT shard FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if not TOURNAMENT_SHARDS or not row or row['shard']:
+        return None
+    name = f'tournament-{int(tid)}.db'
+    path = os.path.join(TOURNAMENT_SHARD_DIR, name)
+    os.makedirs(TOURNAMENT_SHARD_DIR, exist_ok=True)
+    for leftover in (path, path + '-wal', path + '-shm'):    # from an attempt that never committed
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+    shard = sqlite3.connect(path)
+    try:
+        shard.execute("PRAGMA journal_mode=WAL")
+        # Main stays write-locked from here to the hand-over, so no tournament row can change
+        # between the copy and the delete, and nothing else can take an id in the block
+        # reserved for the shard (so merged rows keep their ids)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for table in TOURNAMENT_SHARD_TABLES:
+                if not db.execute("UPDATE main.sqlite_sequence SET seq = seq + ? WHERE name=?",
+                                  (TOURNAMENT_SHARD_ID_BLOCK, table)).rowcount:
+                    db.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)",
+                               (table, TOURNAMENT_SHARD_ID_BLOCK))
+                base = db.execute("SELECT seq FROM main.sqlite_sequence WHERE name=?",
+                                  (table,)).fetchone()[0] - TOURNAMENT_SHARD_ID_BLOCK
+                # Same columns as main, minus foreign keys (tournaments stays in main)
+                defs, cols = [], []
+                for c in db.execute(f"PRAGMA main.table_info({table})"):
+                    cols.append(c['name'])
+                    if c['pk']:
+                        defs.append(f"{c['name']} INTEGER PRIMARY KEY AUTOINCREMENT")
+                        continue
+                    col = f"{c['name']} {c['type']}" + (' NOT NULL' if c['notnull'] else '')
+                    defs.append(col + (f" DEFAULT {c['dflt_value']}" if c['dflt_value'] is not None else ''))
+                shard.execute(f"CREATE TABLE {table} ({', '.join(defs)})")
+                shard.execute(f"CREATE {_SHARD_INDEXES[table].format(s='main')}")
+                rows = db.execute(f"SELECT {', '.join(cols)} FROM main.{table} WHERE tournament_id=?", (tid,))
+                shard.executemany(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                                  (tuple(r) for r in rows))
+                shard.execute("DELETE FROM sqlite_sequence WHERE name=?", (table,))
+                shard.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, base))
+            shard.commit()     # a crash after this leaves an unused file: main still owns the rows
+            for table in TOURNAMENT_SHARD_TABLES:
+                db.execute(f"DELETE FROM main.{table} WHERE tournament_id=?", (tid,))
+            db.execute("UPDATE tournaments SET shard=? WHERE id=?", (name, tid))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    finally:
+        shard.close()
+    logger.info(f"Tournament {tid} sharded to {path}")
+    return name
+
+
+def close_tournament_shard(db, tid):
+    """Merge a sharded tournament back into main, then archive or delete its file. Commits.
+
+    Returns True if there was a shard. Safe to repeat: rows keep their ids.
+    """
+    row = db.execute("SELECT id, shard FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if not row or not row['shard']:
+        return False
+    path = os.path.join(TOURNAMENT_SHARD_DIR, row['shard'])
+    try:
+        alias = tournament_schema(db, row)
+    except sqlite3.OperationalError:
+        if os.path.exists(path):
+            raise
+        alias = None
+    if alias == 'main':
+        return False        # merged by another connection since the row was read
+    if alias:
+        db.execute("BEGIN IMMEDIATE")      # write-locks the shard too: writers wait for the seal
+        try:
+            if db.execute("SELECT shard FROM tournaments WHERE id=?", (tid,)).fetchone()['shard'] != row['shard']:
+                db.rollback()
+                return False
+            for table in TOURNAMENT_SHARD_TABLES:
+                main_cols = set(_shard_columns(db, 'main', table))
+                cols = ', '.join(c for c in _shard_columns(db, alias, table) if c in main_cols)
+                db.execute(f"INSERT OR IGNORE INTO main.{table} ({cols}) SELECT {cols} FROM {alias}.{table}")
+                for op in ('INSERT', 'UPDATE', 'DELETE'):
+                    db.execute(f"CREATE TRIGGER IF NOT EXISTS {alias}.closed_{table}_{op.lower()} "
+                               f"BEFORE {op} ON {table} BEGIN SELECT RAISE(ABORT, '{SHARD_CLOSED}'); END")
+            db.execute(f"PRAGMA {alias}.user_version = 1")
+            db.execute("UPDATE tournaments SET shard=NULL WHERE id=?", (tid,))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    else:
+        logger.warning(f"Tournament {tid} shard {path} is missing; nothing to merge")
+        db.execute("UPDATE tournaments SET shard=NULL WHERE id=?", (tid,))
+        db.commit()
+    if alias:
+        db.execute(f"PRAGMA {alias}.wal_checkpoint(TRUNCATE)")
+        db.execute(f"DETACH DATABASE {alias}")
+        if TOURNAMENT_SHARD_ARCHIVE:
+            archive = os.path.join(TOURNAMENT_SHARD_DIR, 'archive')
+            os.makedirs(archive, exist_ok=True)
+            os.replace(path, os.path.join(archive, row['shard']))
+        else:
+            os.remove(path)
+    for leftover in (path + '-wal', path + '-shm'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    logger.info(f"Tournament {tid} shard merged back{' and archived' if TOURNAMENT_SHARD_ARCHIVE else ''}")
+    return True
+
+
+def discard_tournament_shards(db, shards):
+    """Detach and delete shard files (after their tournaments are deleted). Call after committing."""
+    attached = {r[2]: r[1] for r in db.execute("PRAGMA database_list")}
+    for name in filter(None, shards):
+        path = os.path.join(TOURNAMENT_SHARD_DIR, name)
+        alias = attached.get(os.path.abspath(path))
+        if alias:
+            db.execute(f"DETACH DATABASE {alias}")
+        for f in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(f):
+                os.remove(f)
+
+# ---------------------------------------------------------------------------
+# Conversation Summaries
+# ---------------------------------------------------------------------------
+# conversations.last_* and conversation_members.unread_count are denormalised so the
+# inbox never scans messages. Every write path goes through these helpers and they
+# never commit — the caller's transaction covers the message and its summary.
+# conversation_members.last_read_id is the newest message id the member had seen when
+# their count was last reset (a new member starts at the conversation's latest
+# message, see the conversation_members_ai trigger), so unpost_message knows exactly
+# whose count included a deleted message. Timestamps only have second resolution.
+MESSAGE_PREVIEW_CHARS = 200
+
+def post_message(db, conv_id, sender, text, image=''):
+    """Insert a message and update the conversation summary and unread counters. Returns its id."""
+    cur = db.execute("INSERT INTO messages (conversation_id, sender, text, image) VALUES (?, ?, ?, ?)",
+                     (conv_id, sender, text, image or ''))
+    msg_id = cur.lastrowid
+    db.execute("""
+        UPDATE conversations SET last_message_id=?, last_sender=?, last_preview=?,
+            last_msg_time=(SELECT created_at FROM messages WHERE id=?)
+        WHERE id=?
+    """, (msg_id, sender, text[:MESSAGE_PREVIEW_CHARS], msg_id, conv_id))
+    db.execute("UPDATE conversation_members SET unread_count=unread_count+1 WHERE conversation_id=? AND trader_name!=?",
+               (conv_id, sender))
+    db.execute("UPDATE conversation_members SET unread_count=0, last_read=CURRENT_TIMESTAMP, last_read_id=? "
+               "WHERE conversation_id=? AND trader_name=?", (msg_id, conv_id, sender))
+    return msg_id
+
+def mark_conversation_read(db, conv_id, trader_name):
+    db.execute("""
+        UPDATE conversation_members SET unread_count=0, last_read=CURRENT_TIMESTAMP,
+            last_read_id=COALESCE((SELECT MAX(id) FROM messages WHERE conversation_id=?), 0)
+        WHERE conversation_id=? AND trader_name=?
+    """, (conv_id, conv_id, trader_name))
+
+def unpost_message(db, msg):
+    """Delete a message row and roll its effect out of the summary and unread counters."""
+    conv_id = msg['conversation_id']
+    db.execute("DELETE FROM messages WHERE id=?", (msg['id'],))
+    # Members whose count was last reset before it arrived had it counted
+    db.execute("""
+        UPDATE conversation_members SET unread_count=MAX(unread_count-1, 0)
+        WHERE conversation_id=? AND trader_name!=? AND last_read_id < ?
+    """, (conv_id, msg['sender'], msg['id']))
+    conv = db.execute("SELECT last_message_id FROM conversations WHERE id=?", (conv_id,)).fetchone()
+    if conv and conv['last_message_id'] == msg['id']:
+        refresh_conversation_summary(db, conv_id)
+
+def refresh_conversation_summary(db, conv_id=None):
+    """Recompute last-message columns from history for one conversation (or all when conv_id is None)."""
+    where, params = ("WHERE id=?", (conv_id,)) if conv_id is not None else ("", ())
+    db.execute(f"""
+        UPDATE conversations
+        SET last_message_id=(SELECT MAX(id) FROM messages WHERE conversation_id=conversations.id)
+        {where}
+    """, params)
+    db.execute(f"""
+        UPDATE conversations SET
+            last_sender=(SELECT sender FROM messages WHERE id=conversations.last_message_id),
+            last_preview=(SELECT substr(text, 1, {MESSAGE_PREVIEW_CHARS}) FROM messages
+                          WHERE id=conversations.last_message_id),
+            last_msg_time=(SELECT created_at FROM messages WHERE id=conversations.last_message_id)
+        {where}
+    """, params)
+
+# ---------------------------------------------------------------------------
+# Full-text Search
+# ---------------------------------------------------------------------------
+def fts_query(text):
+    """Quote each search term so user input can't inject FTS5 query syntax."""
+    terms = [t.replace('"', '""') for t in text.split() if t.strip()]
+    return ' '.join(f'"{t}"' for t in terms)
+
+# ---------------------------------------------------------------------------
+# Mention Index
+# ---------------------------------------------------------------------------
+# Per-conversation prefix trie over members' lower-cased display names, plus exact
+# trader names, so resolving an @mention walks len(mention) nodes instead of scanning
+# every member. Built on first use; invalidate_mention_index() drops it on membership
+# or display-name changes, and MENTION_INDEX_TTL bounds staleness from other workers.
+MENTION_RE = re.compile(r'@(\w[\w\s]*?)(?=\s|$|[.,!?])')
+MENTION_INDEX_TTL = 60
+MENTION_INDEX_MAX = 512                 # conversations kept, least recently used evicted
+_mention_indexes = {}                   # conv_id -> (built_at, trie, exact); dict order = LRU
+_mention_lock = Lock()
+
+def invalidate_mention_index(conv_id=None):
+    """Drop one conversation's mention index, or every one when conv_id is None."""
+    with _mention_lock:
+        if conv_id is None:
+            _mention_indexes.clear()
+        else:
+            _mention_indexes.pop(conv_id, None)
+
+def _mention_index(db, conv_id):
+    now = time.monotonic()
+    with _mention_lock:
+        entry = _mention_indexes.pop(conv_id, None)
+        if entry and now - entry[0] < MENTION_INDEX_TTL:
+            _mention_indexes[conv_id] = entry
+            return entry[1], entry[2]
+    # Each trie node maps a character to its child; the '' key holds the trader names
+    # whose display name starts with the path to that node
+    trie, exact = {}, {}
+    for m in db.execute("""
+        SELECT t.trader_name, t.display_name FROM conversation_members cm
+        JOIN traders t ON cm.trader_name=t.trader_name
+        WHERE cm.conversation_id=?
+    """, (conv_id,)):
+        exact[m['trader_name'].lower()] = m['trader_name']
+        node = trie
+        for ch in (m['display_name'] or '').lower():
+            node = node.setdefault(ch, {})
+            node.setdefault('', set()).add(m['trader_name'])
+    with _mention_lock:
+        _mention_indexes[conv_id] = (now, trie, exact)
+        while len(_mention_indexes) > MENTION_INDEX_MAX:
+            del _mention_indexes[next(iter(_mention_indexes))]
+    return trie, exact
+
+def resolve_mentions(db, conv_id, text):
+    """Trader names @-mentioned in text: a display-name prefix or an exact trader name."""
+    mentions = MENTION_RE.findall(text or '')
+    if not mentions:
+        return set()
+    trie, exact = _mention_index(db, conv_id)
+    found = set()
+    for mention in mentions:
+        key = mention.strip().lower()
+        node = trie
+        for ch in key:
+            node = node.get(ch)
+            if node is None:
+                break
+        else:
+            found |= node.get('', set())
+        if key in exact:
+            found.add(exact[key])
+    return found
+
+# ---------------------------------------------------------------------------
+# Trade Rollups
+# ---------------------------------------------------------------------------
+# Running totals over the trades ledger: trader_trade_stats (trades, realized P&L and
+# notional per trader) and sector_trade_stats (trades and volume per sector). Triggers
+# on trades keep them current, so no write path has to know they exist;
+# rebuild_trade_rollups() recomputes them from the ledger. trade_data that isn't valid
+# JSON counts as a trade with no P&L, notional or sector, as the old per-row parse did.
+_ROLLUP_PNL = ("CASE WHEN json_valid({r}.trade_data) AND json_extract({r}.trade_data, '$.status')='CLOSED' "
+               "THEN CAST(COALESCE(json_extract({r}.trade_data, '$.realizedPnl'), 0) AS REAL) ELSE 0 END")
+_ROLLUP_VOLUME = ("CASE WHEN json_valid({r}.trade_data) "
+                  "THEN CAST(COALESCE(json_extract({r}.trade_data, '$.volume'), 0) AS REAL) ELSE 0 END")
+_ROLLUP_NOTIONAL = ("CASE WHEN json_valid({r}.trade_data) "
+                    "THEN CAST(COALESCE(json_extract({r}.trade_data, '$.volume'), 0) AS REAL)"
+                    " * ABS(CAST(COALESCE(json_extract({r}.trade_data, '$.entryPrice'), 0) AS REAL)) ELSE 0 END")
+_ROLLUP_SECTOR = ("CASE WHEN json_valid({r}.trade_data) "
+                  "THEN COALESCE(json_extract({r}.trade_data, '$.sector'), 'other') END")
+
+def _trade_rollup_triggers():
+    def add(r):
+        return f"""
+            INSERT INTO trader_trade_stats (trader_name, trade_count, realized_pnl, notional)
+            VALUES ({r}.trader_name, 1, {_ROLLUP_PNL.format(r=r)}, {_ROLLUP_NOTIONAL.format(r=r)})
+            ON CONFLICT(trader_name) DO UPDATE SET trade_count=trade_count+1,
+                realized_pnl=realized_pnl+excluded.realized_pnl, notional=notional+excluded.notional;
+            INSERT INTO sector_trade_stats (sector, trade_count, volume)
+            SELECT {_ROLLUP_SECTOR.format(r=r)}, 1, {_ROLLUP_VOLUME.format(r=r)}
+            WHERE json_valid({r}.trade_data)
+            ON CONFLICT(sector) DO UPDATE SET trade_count=trade_count+1, volume=volume+excluded.volume;"""
+
+    def remove(r):
+        return f"""
+            UPDATE trader_trade_stats SET trade_count=trade_count-1,
+                realized_pnl=realized_pnl-({_ROLLUP_PNL.format(r=r)}),
+                notional=notional-({_ROLLUP_NOTIONAL.format(r=r)})
+            WHERE trader_name={r}.trader_name;
+            UPDATE sector_trade_stats SET trade_count=trade_count-1, volume=volume-({_ROLLUP_VOLUME.format(r=r)})
+            WHERE sector={_ROLLUP_SECTOR.format(r=r)};"""
+
+    return f"""
+        DROP TRIGGER IF EXISTS trades_stats_ai;
+        DROP TRIGGER IF EXISTS trades_stats_ad;
+        DROP TRIGGER IF EXISTS trades_stats_au;
+        DROP TRIGGER IF EXISTS trades_rollup_ai;
+        DROP TRIGGER IF EXISTS trades_rollup_ad;
+        DROP TRIGGER IF EXISTS trades_rollup_au;
+        CREATE TRIGGER trades_rollup_ai AFTER INSERT ON trades BEGIN {add('new')}
+        END;
+        CREATE TRIGGER trades_rollup_ad AFTER DELETE ON trades BEGIN {remove('old')}
+        END;
+        CREATE TRIGGER trades_rollup_au AFTER UPDATE OF trader_name, trade_data ON trades BEGIN {remove('old')} {add('new')}
+        END;"""
+
+def rebuild_trade_rollups(db):
+    """Recompute both rollup tables from the trades ledger. Doesn't commit."""
+    db.execute("DELETE FROM trader_trade_stats")
+    db.execute(f"""
+        INSERT INTO trader_trade_stats (trader_name, trade_count, realized_pnl, notional)
+        SELECT trader_name, COUNT(*), SUM({_ROLLUP_PNL.format(r='trades')}),
+               SUM({_ROLLUP_NOTIONAL.format(r='trades')})
+        FROM trades GROUP BY trader_name
+    """)
+    db.execute("DELETE FROM sector_trade_stats")
+    db.execute(f"""
+        INSERT INTO sector_trade_stats (sector, trade_count, volume)
+        SELECT {_ROLLUP_SECTOR.format(r='trades')} as sector, COUNT(*), SUM({_ROLLUP_VOLUME.format(r='trades')})
+        FROM trades WHERE json_valid(trade_data) GROUP BY sector
+    """)
+
 def init_db():
     """Initialize database schema."""
     conn = get_db_standalone()
@@ -292,7 +1221,9 @@ def init_db():
         CREATE INDEX IF NOT EXISTS idx_traders_status ON traders(status);
         CREATE INDEX IF NOT EXISTS idx_snapshots_trader ON performance_snapshots(trader_name);
         CREATE INDEX IF NOT EXISTS idx_pending_orders_trader ON pending_orders(trader_name);
-        CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id);
+        DROP INDEX IF EXISTS idx_messages_conversation;
+        CREATE INDEX IF NOT EXISTS idx_messages_conv_id ON messages(conversation_id, id);
+        CREATE INDEX IF NOT EXISTS idx_conv_members_trader ON conversation_members(trader_name, conversation_id);
         CREATE INDEX IF NOT EXISTS idx_trade_feed_created ON trade_feed(created_at);
     """)
 
@@ -331,6 +1262,49 @@ def init_db():
     except sqlite3.OperationalError:
         cur.execute("ALTER TABLE messages ADD COLUMN edited_at TIMESTAMP")
 
+    # Migration: denormalised inbox summary (see post_message) — backfilled once from history
+    try:
+        cur.execute("SELECT last_message_id FROM conversations LIMIT 1")
+    except sqlite3.OperationalError:
+        for col, defn in [('last_message_id', 'INTEGER'), ('last_sender', "TEXT DEFAULT ''"),
+                          ('last_preview', "TEXT DEFAULT ''"), ('last_msg_time', 'TIMESTAMP')]:
+            cur.execute(f"ALTER TABLE conversations ADD COLUMN {col} {defn}")
+        cur.execute("ALTER TABLE conversation_members ADD COLUMN unread_count INTEGER NOT NULL DEFAULT 0")
+        refresh_conversation_summary(cur)
+        cur.execute("""
+            UPDATE conversation_members SET unread_count=(
+                SELECT COUNT(*) FROM messages m
+                WHERE m.conversation_id=conversation_members.conversation_id
+                  AND m.created_at > conversation_members.last_read
+                  AND m.sender != conversation_members.trader_name)
+        """)
+
+    # Migration: last_read_id (see post_message), backfilled so that exactly unread_count
+    # messages from others come after it
+    try:
+        cur.execute("SELECT last_read_id FROM conversation_members LIMIT 1")
+    except sqlite3.OperationalError:
+        cur.execute("ALTER TABLE conversation_members ADD COLUMN last_read_id INTEGER")
+        cur.execute("""
+            UPDATE conversation_members SET last_read_id=COALESCE((
+                SELECT MAX(id) FROM messages WHERE conversation_id=conversation_members.conversation_id), 0)
+        """)
+        unread = cur.execute("SELECT conversation_id, trader_name, unread_count FROM conversation_members "
+                             "WHERE unread_count > 0").fetchall()
+        for conv_id, name, count in unread:
+            nth = cur.execute("SELECT id FROM messages WHERE conversation_id=? AND sender!=? "
+                              "ORDER BY id DESC LIMIT 1 OFFSET ?", (conv_id, name, count - 1)).fetchone()
+            cur.execute("UPDATE conversation_members SET last_read_id=? WHERE conversation_id=? AND trader_name=?",
+                        (nth[0] - 1 if nth else 0, conv_id, name))
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS conversation_members_ai AFTER INSERT ON conversation_members
+        WHEN new.last_read_id IS NULL BEGIN
+            UPDATE conversation_members
+            SET last_read_id=COALESCE((SELECT MAX(id) FROM messages WHERE conversation_id=new.conversation_id), 0)
+            WHERE conversation_id=new.conversation_id AND trader_name=new.trader_name;
+        END
+    """)
+
     # Migration: add privileged column to traders (after-hours + backdate)
     try:
         cur.execute("SELECT privileged FROM traders LIMIT 1")
@@ -365,6 +1339,7 @@ def init_db():
         ('var_limit', "REAL DEFAULT 0"),
         ('price_snapshot', "TEXT DEFAULT '{}'"),
         ('config', "TEXT DEFAULT '{}'"),
+        ('shard', "TEXT"),
     ]:
         try:
             cur.execute(f"SELECT {col} FROM tournaments LIMIT 1")
@@ -403,6 +1378,7 @@ def init_db():
             status TEXT DEFAULT 'QUEUED',
             queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             flashed_at TIMESTAMP,
+            flash_at TIMESTAMP,
             FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
         );
 
@@ -419,6 +1395,152 @@ def init_db():
         CREATE INDEX IF NOT EXISTS idx_tourn_trades_tid ON tournament_trades(tournament_id, trader_name);
     """)
 
+    # Migration: scheduled auto-flash time on tournament news (NULL = flashed by hand)
+    try:
+        cur.execute("SELECT flash_at FROM tournament_news_events LIMIT 1")
+    except sqlite3.OperationalError:
+        cur.execute("ALTER TABLE tournament_news_events ADD COLUMN flash_at TIMESTAMP")
+
+    # Persistent news store (filled by the background ingester in routes/market.py)
+    cur.executescript("""
+        CREATE TABLE IF NOT EXISTS news_articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guid TEXT NOT NULL UNIQUE,
+            source TEXT NOT NULL,
+            headline TEXT NOT NULL,
+            description TEXT DEFAULT '',
+            url TEXT DEFAULT '',
+            published_at TIMESTAMP,
+            ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS news_article_tags (
+            article_id INTEGER NOT NULL,
+            commodity TEXT NOT NULL,
+            PRIMARY KEY (commodity, article_id),
+            FOREIGN KEY (article_id) REFERENCES news_articles(id) ON DELETE CASCADE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_news_published ON news_articles(published_at);
+        CREATE INDEX IF NOT EXISTS idx_news_tags_article ON news_article_tags(article_id);
+    """)
+
+    # Cross-worker state (multi-worker mode): presence/price snapshots and job leases
+    cur.executescript("""
+        CREATE TABLE IF NOT EXISTS shared_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            worker_id TEXT,
+            updated_at REAL NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS worker_leases (
+            name TEXT PRIMARY KEY,
+            worker_id TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+
+        -- One-shot deadlines fired by _scheduler_loop; seq orders changes for pickup
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            ref_id INTEGER NOT NULL,
+            due_at REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            seq INTEGER NOT NULL DEFAULT 0,
+            fired_at REAL,
+            error TEXT,
+            UNIQUE(kind, ref_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_seq ON scheduled_jobs(seq);
+    """)
+    # Tournaments that were already running before they had an end job still end on time
+    cur.execute("INSERT OR IGNORE INTO scheduled_jobs (kind, ref_id, due_at) "
+                "SELECT 'tournament_end', id, (julianday(end_time) - 2440587.5) * 86400.0 FROM tournaments "
+                "WHERE status='ACTIVE' AND end_time IS NOT NULL")
+
+    # Trade rollups (see rebuild_trade_rollups). Triggers are recreated on every boot, in
+    # one transaction, so their definitions follow the code.
+    had_rollups = cur.execute("SELECT 1 FROM sqlite_master WHERE name='sector_trade_stats'").fetchone()
+    cur.executescript("""
+        CREATE TABLE IF NOT EXISTS trader_trade_stats (
+            trader_name TEXT PRIMARY KEY,
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            realized_pnl REAL NOT NULL DEFAULT 0,
+            notional REAL NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS sector_trade_stats (
+            sector TEXT PRIMARY KEY,
+            trade_count INTEGER NOT NULL DEFAULT 0,
+            volume REAL NOT NULL DEFAULT 0
+        );
+    """)
+    try:
+        cur.execute("SELECT notional FROM trader_trade_stats LIMIT 1")
+    except sqlite3.OperationalError:
+        cur.execute("ALTER TABLE trader_trade_stats ADD COLUMN notional REAL NOT NULL DEFAULT 0")
+    cur.executescript("BEGIN;\n" + _trade_rollup_triggers() + "\nCOMMIT;")
+    if not had_rollups:
+        rebuild_trade_rollups(cur)
+
+    # Full-text index over the news store — search falls back to LIKE without FTS5
+    try:
+        cur.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+                headline, description, source,
+                content='news_articles', content_rowid='id'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS news_articles_ai AFTER INSERT ON news_articles BEGIN
+                INSERT INTO news_fts(rowid, headline, description, source)
+                VALUES (new.id, new.headline, new.description, new.source);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS news_articles_ad AFTER DELETE ON news_articles BEGIN
+                INSERT INTO news_fts(news_fts, rowid, headline, description, source)
+                VALUES ('delete', old.id, old.headline, old.description, old.source);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS news_articles_au AFTER UPDATE ON news_articles BEGIN
+                INSERT INTO news_fts(news_fts, rowid, headline, description, source)
+                VALUES ('delete', old.id, old.headline, old.description, old.source);
+                INSERT INTO news_fts(rowid, headline, description, source)
+                VALUES (new.id, new.headline, new.description, new.source);
+            END;
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 not available, news search will use LIKE: {e}")
+
+    # Full-text index over chat messages — /api/chat/search falls back to LIKE without FTS5
+    try:
+        had_index = cur.execute("SELECT 1 FROM sqlite_master WHERE name='messages_fts'").fetchone()
+        cur.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                text, content='messages', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE OF text ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+            END;
+        """)
+        if not had_index:
+            # Index the history that predates the triggers
+            cur.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 not available, chat search will use LIKE: {e}")
+
     conn.commit()
 
     # Auto-seed traders from traders_seed.json if the traders table is empty
@@ -562,6 +1684,10 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
 
+    # With the debug reloader only the child process should own background jobs
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
+
     logger.info(f"Starting Energy Desk v3.0 on {host}:{port}")
     logger.info(f"Database: {DATABASE}")
     logger.info(f"EIA API Key:  {'configured' if EIA_API_KEY else 'NOT SET'}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Censor filter benchmark: cached trie regex vs the old per-message loop.
+
+Loads a seeded list of censored words into admin_config, then censors the same batch
+of chat messages two ways: the previous implementation (read admin_config, parse the
+JSON, compile and run one regex per word, on every message) and `censor_text` as it is
+now (one cached trie-shaped regex, compiled once). Reports messages/sec for both, the
+one-off compile cost, and how many outputs differ.
+
+Usage:  python bench/censor_filter.py [--words 1000] [--messages 2000]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def legacy_censor_text(db, text):
+    """The pre-cache censor_text, kept verbatim apart from taking the connection."""
+    import re as _re
+    row = db.execute("SELECT value FROM admin_config WHERE key='censored_words'").fetchone()
+    if not row:
+        return text
+    words = json.loads(row['value'])
+    if not words:
+        return text
+    result = text
+    for word in words:
+        if not word:
+            continue
+        pattern = _re.compile(_re.escape(word), _re.IGNORECASE)
+        result = pattern.sub('*' * len(word), result)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--words', type=int, default=1000)
+    ap.add_argument('--messages', type=int, default=2000)
+    ap.add_argument('--seed', type=int, default=7)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='ed_bench_')
+    os.environ['DB_PATH'] = os.path.join(tmp, 'bench.db')
+    import logging
+    import app as ed
+    from routes import admin
+    logging.getLogger().setLevel(logging.WARNING)
+    ed.init_db()
+
+    rng = random.Random(args.seed)
+    words = sorted({''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+                    for _ in range(args.words)})
+    vocab = ['power', 'gas', 'spread', 'bid', 'offer', 'curve', 'basis', 'henry', 'hub', 'peak',
+             'the', 'is', 'at', 'on', 'for', 'short', 'long', 'winter', 'strip', 'lol']
+    messages = []
+    for _ in range(args.messages):
+        toks = [rng.choice(vocab) for _ in range(rng.randint(4, 30))]
+        if rng.random() < 0.2:
+            toks.insert(rng.randrange(len(toks)), rng.choice(words).upper())
+        messages.append(' '.join(toks))
+
+    with ed.app.app_context():
+        db = ed.get_db()
+        db.execute("INSERT OR REPLACE INTO admin_config (key, value) VALUES ('censored_words', ?)",
+                   (json.dumps(words),))
+        db.commit()
+
+        t = time.perf_counter()
+        legacy = [legacy_censor_text(db, m) for m in messages]
+        legacy_s = time.perf_counter() - t
+
+        t = time.perf_counter()
+        admin.compile_censor_pattern(words)
+        compile_ms = (time.perf_counter() - t) * 1000
+
+        admin.invalidate_censor_cache()
+        admin.censor_text('warm up')
+        t = time.perf_counter()
+        cached = [admin.censor_text(m) for m in messages]
+        cached_s = time.perf_counter() - t
+
+    differ = sum(1 for a, b in zip(legacy, cached) if a != b)
+    print(f'{len(words)} censored words, {len(messages)} messages '
+          f'({sum(1 for a, m in zip(cached, messages) if a != m)} contain a censored word)')
+    print(f'{"":>22} {"msgs/s":>10} {"us/msg":>10}')
+    print(f'{"per-message loop":>22} {len(messages) / legacy_s:>10.0f} {legacy_s / len(messages) * 1e6:>10.1f}')
+    print(f'{"cached trie regex":>22} {len(messages) / cached_s:>10.0f} {cached_s / len(messages) * 1e6:>10.1f}')
+    print(f'speed-up {legacy_s / cached_s:.0f}x; one-off compile {compile_ms:.1f} ms; '
+          f'{differ} outputs differ')
+
+
+if __name__ == '__main__':
+    main()
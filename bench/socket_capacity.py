@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Socket.IO capacity benchmark: concurrent WebSocket clients per server worker model.
+
+Starts `serve.py` in a subprocess with the chosen SOCKETIO_ASYNC_MODE, then opens N
+real Engine.IO v4 WebSocket connections from a gevent client (one greenlet each) and
+keeps them all open. Reports how many connected, connect latency, HTTP latency on a
+cheap endpoint while the sockets are held, the time for one server broadcast
+(`connection_count`) to reach every client, and the server's RSS and OS thread count.
+
+Usage:  python bench/socket_capacity.py [--mode gevent] [--clients 250,500,1000,2000]
+"""
+
+from gevent import monkey
+monkey.patch_all()
+
+import os
+import sys
+import json
+import base64
+import socket
+import struct
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+import gevent
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _pct(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def _proc_stats(pid):
+    stats = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'Threads'):
+                stats[key] = int(value.split()[0])
+    return stats.get('VmRSS', 0) / 1024, stats.get('Threads', 0)
+
+
+class Client:
+    """One Socket.IO connection over a minimal WebSocket client.
+
+    A hand-rolled RFC 6455 client keeps the load generator to one greenlet and one
+    socket per connection, so the measurement is bounded by the server, not the client.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.sock = None
+        self.buf = b''
+        self.connected = False
+        self.connect_ms = None
+        self.last_count_at = 0.0
+        self.last_count = 0
+
+    def _send(self, text):
+        payload = text.encode()
+        mask = os.urandom(4)
+        header = bytes([0x81, 0x80 | len(payload)])  # FIN+text, masked, payload < 126
+        self.sock.sendall(header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+    def _read(self, n):
+        while len(self.buf) < n:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError('closed')
+            self.buf += chunk
+        out, self.buf = self.buf[:n], self.buf[n:]
+        return out
+
+    def _recv(self):
+        b0, b1 = self._read(2)
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', self._read(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', self._read(8))[0]
+        data = self._read(length)
+        if b0 & 0x0F == 0x8:
+            raise ConnectionError('close frame')
+        return data.decode(errors='replace')
+
+    def run(self, timeout):
+        t0 = time.perf_counter()
+        try:
+            self.sock = socket.create_connection(('127.0.0.1', self.port), timeout=timeout)
+            self.sock.sendall(b'GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                              b'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+                              b'Sec-WebSocket-Key: ' + base64.b64encode(os.urandom(16)) + b'\r\n'
+                              b'Sec-WebSocket-Version: 13\r\n\r\n')
+            while b'\r\n\r\n' not in self.buf:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    return
+                self.buf += chunk
+            head, _, self.buf = self.buf.partition(b'\r\n\r\n')
+            if b' 101 ' not in head.split(b'\r\n')[0]:
+                return
+            if not self._recv().startswith('0'):
+                return
+            self._send('40')
+            while True:
+                if self.connected:
+                    self.sock.settimeout(None)
+                msg = self._recv()
+                if msg == '2':
+                    self._send('3')
+                elif msg.startswith('40') and not self.connected:
+                    self.connected = True
+                    self.connect_ms = (time.perf_counter() - t0) * 1000
+                elif msg.startswith('42["connection_count"'):
+                    self.last_count = json.loads(msg[2:])[1].get('count', 0)
+                    self.last_count_at = time.perf_counter()
+        except Exception:
+            return
+
+    def close(self):
+        try:
+            if self.sock:
+                self.sock.close()
+        except Exception:
+            pass
+
+
+def run_level(port, n, ramp, timeout):
+    clients = [Client(port) for _ in range(n)]
+    # Ramp in waves of `ramp` simultaneous handshakes; each greenlet then stays open
+    t0 = time.perf_counter()
+    greenlets = []
+    for i in range(0, n, ramp):
+        wave = [gevent.spawn(c.run, timeout) for c in clients[i:i + ramp]]
+        greenlets += wave
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline and not all(c.connected or g.dead for c, g in zip(clients[i:i + ramp], wave)):
+            gevent.sleep(0.05)
+    ramp_s = time.perf_counter() - t0
+    connected = [c for c in clients if c.connected]
+
+    # HTTP latency on an in-memory endpoint while every socket is held open
+    http_ms = []
+    for _ in range(20):
+        t = time.perf_counter()
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/traders/online', timeout=timeout).read()
+            http_ms.append((time.perf_counter() - t) * 1000)
+        except Exception:
+            pass
+        gevent.sleep(0.05)
+
+    # Fan-out: one extra connect makes the server broadcast connection_count to everyone
+    gevent.sleep(1.0)
+    probe = Client(port)
+    t = time.perf_counter()
+    probe_g = gevent.spawn(probe.run, timeout)
+    gevent.sleep(0)
+    deadline = t + timeout
+    expected = len(connected) + 1
+    while time.perf_counter() < deadline and sum(1 for c in connected if c.last_count >= expected) < len(connected):
+        gevent.sleep(0.01)
+    reached = [c for c in connected if c.last_count >= expected]
+    fanout_ms = (max(c.last_count_at for c in reached) - t) * 1000 if reached else float('nan')
+
+    result = {
+        'clients': n,
+        'connected': len(connected),
+        'ramp_s': ramp_s,
+        'connect_p50': _pct([c.connect_ms for c in connected], 50),
+        'connect_p99': _pct([c.connect_ms for c in connected], 99),
+        'http_p50': _pct(http_ms, 50),
+        'http_p99': _pct(http_ms, 99),
+        'http_ok': len(http_ms),
+        'fanout_ms': fanout_ms,
+        'fanout_reached': len(reached),
+    }
+    for c in clients + [probe]:
+        c.close()
+    gevent.joinall(greenlets + [probe_g], timeout=timeout)
+    gevent.killall([g for g in greenlets + [probe_g] if not g.dead])
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--mode', default='gevent', choices=['threading', 'gevent', 'eventlet'])
+    ap.add_argument('--clients', default='250,500,1000,2000',
+                    help='comma-separated connection counts, run in order against one server')
+    ap.add_argument('--ramp', type=int, default=100, help='simultaneous handshakes per wave')
+    ap.add_argument('--timeout', type=float, default=20.0)
+    ap.add_argument('--port', type=int, default=8791)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='ed_bench_')
+    env = dict(os.environ, SOCKETIO_ASYNC_MODE=args.mode, PORT=str(args.port), HOST='127.0.0.1',
+               DB_PATH=os.path.join(tmp, 'bench.db'))
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'serve.py')], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{args.port}/api/traders/online', timeout=1).read()
+                break
+            except Exception:
+                time.sleep(0.2)
+        idle_rss, idle_threads = _proc_stats(server.pid)
+        print(f'mode={args.mode}  idle: RSS {idle_rss:.0f} MB, {idle_threads} threads')
+        print(f'{"clients":>8} {"conn":>6} {"ramp s":>7} {"conn p50/p99 ms":>16} {"http p50/p99 ms":>16} '
+              f'{"fanout ms":>10} {"RSS MB":>7} {"threads":>8}')
+        for n in [int(x) for x in args.clients.split(',')]:
+            r = run_level(args.port, n, args.ramp, args.timeout)
+            rss, threads = _proc_stats(server.pid)
+            print(f'{r["clients"]:>8} {r["connected"]:>6} {r["ramp_s"]:>7.1f} '
+                  f'{r["connect_p50"]:>7.0f}/{r["connect_p99"]:<8.0f} {r["http_p50"]:>7.1f}/{r["http_p99"]:<8.1f} '
+                  f'{r["fanout_ms"]:>10.0f} {rss:>7.0f} {threads:>8}', flush=True)
+            if r['connected'] < n:
+                print(f'  {n - r["connected"]} connections failed; '
+                      f'{r["http_ok"]}/20 HTTP probes answered; '
+                      f'broadcast reached {r["fanout_reached"]}/{r["connected"]}')
+            gevent.sleep(2.0)
+    finally:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+if __name__ == '__main__':
+    main()
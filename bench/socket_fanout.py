@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Socket.IO fan-out benchmark: messages delivered per event with room-targeted emits.
+
+Connects N simulated traders through Flask-SocketIO's test client, registers each one
+(which joins its trader/conversation/team rooms), then drives a chat workload through
+the HTTP API — DMs, team-channel messages with @mentions, reactions and edits — and
+counts how many socket packets were actually delivered. The broadcast baseline is what
+the same events cost when every emit went to every connected socket.
+
+Usage:  python bench/socket_fanout.py [--traders 200] [--teams 10] [--messages 500]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--traders', type=int, default=200)
+    ap.add_argument('--teams', type=int, default=10)
+    ap.add_argument('--messages', type=int, default=500)
+    ap.add_argument('--seed', type=int, default=7)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='ed_bench_')
+    os.environ['DB_PATH'] = os.path.join(tmp, 'bench.db')
+    import logging
+    import app as ed
+    logging.getLogger().setLevel(logging.WARNING)
+    ed.init_db()
+
+    rng = random.Random(args.seed)
+    names = [f'trader{i:04d}' for i in range(args.traders)]
+    conn = ed.get_db_standalone()
+    team_ids = [conn.execute("INSERT INTO teams (name, color) VALUES (?, '#888')", (f'Team {t}',)).lastrowid
+                for t in range(args.teams)]
+    for i, n in enumerate(names):
+        conn.execute("INSERT INTO traders (trader_name, display_name, pin, status, team_id) "
+                     "VALUES (?, ?, '0000', 'ACTIVE', ?)", (n, f'Desk{i:04d}', team_ids[i % args.teams]))
+    conn.commit()
+    conn.close()
+
+    http = ed.app.test_client()
+    # Team channels plus a pool of DMs
+    team_convs = {}
+    for i, n in enumerate(names[:args.teams]):
+        team_convs[team_ids[i % args.teams]] = http.post(f'/api/chat/team-conversation/{n}').get_json()['conversation_id']
+    dms = []
+    for _ in range(args.traders):
+        a, b = rng.sample(names, 2)
+        cid = http.post('/api/chat/conversations', json={'type': 'dm', 'creator': a, 'members': [b]}).get_json()['conversation_id']
+        dms.append((cid, a, b))
+
+    clients = []
+    for n in names:
+        c = ed.socketio.test_client(ed.app)
+        c.emit('register_trader', {'trader_name': n})
+        clients.append(c)
+    for c in clients:
+        c.get_received()  # drop connect/presence chatter
+
+    # Count emit calls per event — the broadcast baseline is each call × every socket
+    emitted = Counter()
+    _emit = ed.socketio.emit
+
+    def counting_emit(event, *a, **kw):
+        emitted[event] += 1
+        return _emit(event, *a, **kw)
+    ed.socketio.emit = counting_emit
+
+    t0 = time.perf_counter()
+    last_msg = {}
+    for k in range(args.messages):
+        if k % 2 == 0:
+            cid, a, b = rng.choice(dms)
+            r = http.post(f'/api/chat/send/{cid}', json={'sender': a, 'text': f'dm {k}'}).get_json()
+        else:
+            i = rng.randrange(args.traders)
+            sender, team = names[i], team_ids[i % args.teams]
+            target = rng.randrange(args.traders // args.teams) * args.teams + (i % args.teams)
+            text = f'team {k} @Desk{target:04d} check the curve'
+            cid = team_convs[team]
+            r = http.post(f'/api/chat/send/{cid}', json={'sender': sender, 'text': text}).get_json()
+        last_msg[cid] = (r['message_id'], a if k % 2 == 0 else sender)
+        if k % 10 == 0:
+            mid, who = last_msg[cid]
+            http.post(f'/api/chat/reactions/{mid}', json={'trader': who, 'emoji': '👍'})
+            http.post(f'/api/chat/messages/{mid}/edit', json={'trader': who, 'text': f'edited {k}'})
+    elapsed = time.perf_counter() - t0
+    ed.socketio.emit = _emit
+
+    delivered = Counter()
+    for c in clients:
+        for pkt in c.get_received():
+            delivered[pkt['name']] += 1
+
+    n = len(clients)
+    print(f"traders={args.traders} teams={args.teams} messages={args.messages} "
+          f"workload={elapsed:.2f}s")
+    print(f"{'event':<24}{'emitted':>9}{'broadcast':>12}{'delivered':>12}{'reduction':>11}")
+    tot_b = tot_d = 0
+    for ev in ('new_message', 'mention_notification', 'reaction_update', 'message_edited'):
+        b = emitted[ev] * n
+        d = delivered[ev]
+        tot_b += b
+        tot_d += d
+        print(f"{ev:<24}{emitted[ev]:>9}{b:>12}{d:>12}{(b / d if d else float('inf')):>10.1f}x")
+    print(f"{'total':<24}{sum(emitted.values()):>9}{tot_b:>12}{tot_d:>12}{(tot_b / tot_d if tot_d else float('inf')):>10.1f}x")
+
+    for c in clients:
+        c.disconnect()
+
+
+if __name__ == '__main__':
+    main()
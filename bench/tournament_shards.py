@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Tournament shard benchmark: write throughput with and without per-tournament shards.
+
+Runs a live sector tournament with N entrants twice, once with its rows in the shared
+database and once in its own shard (TOURNAMENT_SHARDS). Every entrant is a thread that
+opens and closes trades through the HTTP routes, pausing a random think time (mean
+--think seconds) before each pair, while a few main-book writer threads
+insert into `trades` in the main file at a steady rate, standing in for desk trading,
+chat and snapshots (--main-rate 0 runs them flat out). Then the same load runs again
+as bare SQL, each write its own transaction, to isolate the WAL lock from the route's
+Python work. Reports writes/sec and latency for both sides, plus any failed writes.
+
+Usage:  python bench/tournament_shards.py [--traders 200] [--rounds 10] [--think 1] [--writers 4]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+def setup(ed, public, label, sharded, tmp, traders):
+    """Fresh database (and shard dir) with one started ng tournament; returns its id."""
+    ed.DATABASE = os.path.join(tmp, f'{label}.db')
+    ed.TOURNAMENT_SHARD_DIR = os.path.join(tmp, f'{label}-shards')
+    ed.TOURNAMENT_SHARDS = sharded
+    public.drop_tournament_prices()
+    public.invalidate_tournament_standings()
+    ed.init_db()
+    conn = ed.get_db_standalone()
+    conn.executemany("INSERT INTO traders (trader_name, display_name, pin, status) VALUES (?, ?, '0000', 'ACTIVE')",
+                     [(n, n.title()) for n in traders])
+    conn.commit()
+    conn.close()
+    http, admin = ed.app.test_client(), {'X-Admin-Pin': 'admin123'}
+    tid = http.post('/api/admin/tournaments', json={'name': 'Bench', 'sector': 'ng', 'duration_minutes': 600},
+                    headers=admin).get_json()['id']
+    http.post(f'/api/admin/tournaments/{tid}/enroll-all', headers=admin)
+    tourn = http.post(f'/api/admin/tournaments/{tid}/start', json={}, headers=admin).get_json()['tournament']
+    assert bool(tourn.get('shard')) == sharded
+    return tid
+
+
+def run(ed, public, tid, traders, args, mode):
+    """Drive the tournament and the main-book writers concurrently; returns the stats."""
+    start, stop = threading.Barrier(len(traders) + args.writers + 1), threading.Event()
+    t_lat, m_lat, errors = [], [], []
+    lock = threading.Lock()
+
+    def entrant(name, seed):
+        rng, lat = random.Random(seed), []
+        conn = ed.get_db_standalone()
+        tourn = conn.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+        schema = ed.tournament_schema(conn, tourn)
+        http, pin = ed.app.test_client(), {'X-Trader-Pin': '0000'}
+        start.wait()
+        try:
+            for k in range(args.rounds):
+                if args.think:
+                    time.sleep(rng.expovariate(1 / args.think))
+                marks = public.tournament_marks(conn, tourn)[1]
+                hub = rng.choice(list(marks))
+                # A distinct volume each round keeps the duplicate-trade check out of the way
+                trade = {'type': 'FIXED_PRICE', 'direction': rng.choice(['BUY', 'SELL']), 'hub': hub,
+                         'volume': (k + 1) * 100, 'entryPrice': marks[hub]}
+                t = time.perf_counter()
+                if mode == 'routes':
+                    r = http.post(f'/api/tournament/{tid}/trade/{name}', json=trade, headers=pin)
+                    lat.append(time.perf_counter() - t)
+                    if r.status_code != 200:
+                        errors.append((r.get_json() or {}).get('error', f'HTTP {r.status_code}'))
+                        continue
+                    t = time.perf_counter()
+                    r = http.put(f'/api/tournament/{tid}/trade/{name}/{r.get_json()["trade_id"]}',
+                                 json={'status': 'CLOSED'}, headers=pin)
+                    if r.status_code != 200:
+                        errors.append((r.get_json() or {}).get('error', f'HTTP {r.status_code}'))
+                else:
+                    trade['status'] = 'OPEN'
+                    cur = conn.execute(f"INSERT INTO {schema}.tournament_trades (tournament_id, trader_name, "
+                                       "trade_data) VALUES (?, ?, ?)", (tid, name, json.dumps(trade)))
+                    conn.commit()
+                    lat.append(time.perf_counter() - t)
+                    t = time.perf_counter()
+                    trade.update(status='CLOSED', closePrice=marks[hub], realizedPnl=0)
+                    conn.execute(f"UPDATE {schema}.tournament_trades SET trade_data=? WHERE id=?",
+                                 (json.dumps(trade), cur.lastrowid))
+                    conn.commit()
+                lat.append(time.perf_counter() - t)
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            conn.close()
+            with lock:
+                t_lat.extend(lat)
+
+    def main_writer(seed):
+        rng, lat = random.Random(seed), []
+        conn = ed.get_db_standalone()
+        start.wait()
+        due = time.perf_counter()
+        try:
+            while not stop.is_set():
+                if args.main_rate:
+                    due += 1 / args.main_rate
+                    time.sleep(max(due - time.perf_counter(), 0))
+                t = time.perf_counter()
+                conn.execute("INSERT INTO trades (trader_name, trade_data) VALUES (?, ?)",
+                             (rng.choice(traders), json.dumps({'hub': 'Henry Hub', 'volume': 100, 'status': 'OPEN'})))
+                conn.commit()
+                lat.append(time.perf_counter() - t)
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            conn.close()
+            with lock:
+                m_lat.extend(lat)
+
+    threads = [threading.Thread(target=entrant, args=(n, i)) for i, n in enumerate(traders)]
+    writers = [threading.Thread(target=main_writer, args=(10_000 + i,)) for i in range(args.writers)]
+    for th in threads + writers:
+        th.start()
+    start.wait()
+    began = time.perf_counter()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - began
+    stop.set()
+    for th in writers:
+        th.join()
+    return {'elapsed': elapsed, 't_lat': t_lat, 'm_lat': m_lat, 'errors': errors}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--traders', type=int, default=200)
+    ap.add_argument('--rounds', type=int, default=10, help='open+close pairs per entrant')
+    ap.add_argument('--think', type=float, default=1.0, help='mean seconds between pairs (0 = flat out)')
+    ap.add_argument('--writers', type=int, default=4, help='main-book writer threads')
+    ap.add_argument('--main-rate', type=float, default=100, help='writes/sec per main-book writer (0 = flat out)')
+    ap.add_argument('--dir', default=None, help='where to put the databases (default: a temp dir)')
+    args = ap.parse_args()
+
+    tmp = args.dir or tempfile.mkdtemp(prefix='ed_bench_')
+    os.environ['DB_PATH'] = os.path.join(tmp, 'bench.db')
+    import logging
+    import app as ed
+    from routes import public
+    logging.getLogger().setLevel(logging.WARNING)
+
+    traders = [f'trader{i:04d}' for i in range(args.traders)]
+    rate = f'{args.main_rate:.0f}/s each' if args.main_rate else 'flat out'
+    think = f'{args.think:g} s think time' if args.think else 'no think time'
+    print(f'{args.traders} entrants x {args.rounds} open/close pairs ({think}), '
+          f'{args.writers} main-book writers at {rate} ({tmp})')
+    print(f'{"":>16} {"tourn w/s":>10} {"p50/p99 ms":>14} {"main w/s":>10} {"p50/p99 ms":>14} {"errors":>7}')
+    for mode in ('routes', 'sql'):
+        for sharded in (False, True):
+            label = f'{mode}/{"sharded" if sharded else "shared"}'
+            tid = setup(ed, public, label.replace('/', '-'), sharded, tmp, traders)
+            r = run(ed, public, tid, traders, args, mode)
+            print(f'{label:>16} {len(r["t_lat"]) / r["elapsed"]:>10.0f} '
+                  f'{pct(r["t_lat"], .5):>6.1f}/{pct(r["t_lat"], .99):<7.1f} '
+                  f'{len(r["m_lat"]) / r["elapsed"]:>10.0f} '
+                  f'{pct(r["m_lat"], .5):>6.1f}/{pct(r["m_lat"], .99):<7.1f} {len(r["errors"]):>7}')
+            for err in sorted(set(map(str, r['errors'])))[:3]:
+                print(f'{"":>18}{err}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Socket.IO message queue (multi-worker dev/tests).
+
+Speaks just enough of the Redis protocol for python-socketio's RedisManager —
+HELLO / PUBLISH / SUBSCRIBE / UNSUBSCRIBE / PING — so workers point at it with the same
+`SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6390` they would use against real Redis.
+No persistence, no auth; bind it to localhost only.
+
+Usage:  python mq_broker.py [--host 127.0.0.1] [--port 6390]
+"""
+
+import argparse
+import logging
+import socketserver
+import threading
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger('mq_broker')
+
+_subscribers = {}          # channel -> set of handlers
+_subscribers_lock = threading.Lock()
+
+
+def _bulk(value):
+    if isinstance(value, str):
+        value = value.encode()
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _array(*items, kind=b'*'):
+    out = [kind + b'%d\r\n' % len(items)]
+    for item in items:
+        out.append(b':%d\r\n' % item if isinstance(item, int) else _bulk(item))
+    return b''.join(out)
+
+
+class BrokerHandler(socketserver.StreamRequestHandler):
+    """One client connection; RESP arrays in, RESP replies (and pushed messages) out."""
+
+    def setup(self):
+        super().setup()
+        self.channels = set()
+        self.push_kind = b'*'                      # RESP3 clients (HELLO 3) get '>' push frames
+        self.write_lock = threading.Lock()
+
+    def send(self, data):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.strip().split()            # inline command (e.g. from redis-cli/telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        try:
+            while True:
+                args = self.read_command()
+                if args is None:
+                    break
+                if args:
+                    self.dispatch(args[0].upper(), args[1:])
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            with _subscribers_lock:
+                for channel in self.channels:
+                    _subscribers.get(channel, set()).discard(self)
+
+    def dispatch(self, cmd, args):
+        if cmd == b'PUBLISH' and len(args) == 2:
+            channel, message = args
+            with _subscribers_lock:
+                targets = list(_subscribers.get(channel, ()))
+            for handler in targets:
+                try:
+                    handler.send(_array(b'message', channel, message, kind=handler.push_kind))
+                except Exception:
+                    pass
+            self.send(b':%d\r\n' % len(targets))
+        elif cmd == b'SUBSCRIBE':
+            for channel in args:
+                with _subscribers_lock:
+                    _subscribers.setdefault(channel, set()).add(self)
+                self.channels.add(channel)
+                self.send(_array(b'subscribe', channel, len(self.channels), kind=self.push_kind))
+        elif cmd == b'UNSUBSCRIBE':
+            for channel in (args or list(self.channels)):
+                with _subscribers_lock:
+                    _subscribers.get(channel, set()).discard(self)
+                self.channels.discard(channel)
+                self.send(_array(b'unsubscribe', channel, len(self.channels), kind=self.push_kind))
+        elif cmd == b'PING':
+            self.send(_array(b'pong', b'') if self.channels else b'+PONG\r\n')
+        elif cmd == b'HELLO':
+            proto = int(args[0]) if args else 2
+            if proto == 3:
+                self.push_kind = b'>'
+            info = (b'server', b'mq_broker', b'version', b'7.0.0', b'proto', proto)
+            # RESP3 maps count key/value pairs, RESP2 flattens them into an array
+            self.send(_array(*info) if proto != 3 else b'%3\r\n' + _array(*info)[4:])
+        elif cmd in (b'CLIENT', b'SELECT'):
+            self.send(b'+OK\r\n')                  # redis-py sends CLIENT SETINFO on connect
+        else:
+            self.send(b'-ERR unknown command\r\n')
+
+
+class Broker(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=6390)
+    args = ap.parse_args()
+    with Broker((args.host, args.port), BrokerHandler) as server:
+        logger.info(f"Message broker listening on redis://{args.host}:{args.port}")
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
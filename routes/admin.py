@@ -4,61 +4,149 @@
 import json
 import csv
 import io
+import itertools
+import re
 import random
 import sqlite3
 import string
 import base64
-from datetime import datetime, timedelta
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
 
 from flask import Blueprint, request, jsonify, Response
 
-from app import get_db, admin_required, socketio, EIA_API_KEY, NEWS_CACHE_TTL, logger, DATABASE
+from app import (get_db, get_db_standalone, admin_required, socketio, EIA_API_KEY, NEWS_CACHE_TTL, logger, DATABASE,
+                 trader_room, team_room, tournament_room, conversation_room, add_traders_to_room,
+                 remove_traders_from_room, post_message, rebuild_trade_rollups, scheduled_handler, schedule_job,
+                 cancel_jobs, utc_seconds, tournament_schema, open_tournament_shard, close_tournament_shard,
+                 discard_tournament_shards, invalidate_mention_index)
+from routes.public import (mark_leaderboard_dirty, leaderboard_push_interval,
+                           set_leaderboard_push_interval, tournament_standings,
+                           invalidate_tournament_standings, new_tournament_price_model,
+                           close_tournament_positions, drop_tournament_prices,
+                           disqualify_tournament_entry, tournament_risk_stats,
+                           drop_tournament_replay, tournament_replay_stats)
+from routes.misc import get_regional_bias
 
 admin_bp = Blueprint('admin', __name__)
 
 # ---------------------------------------------------------------------------
 # Admin API Endpoints
 # ---------------------------------------------------------------------------
+# Sortable roster columns -> SQL expression (NULLs folded so keyset comparisons hold)
+_ROSTER_SORTS = {
+    'created_at': "COALESCE(t.created_at, '')",
+    'display_name': "LOWER(t.display_name)",
+    'status': "t.status",
+    'trade_count': "COALESCE(s.trade_count, 0)",
+    'realized_pnl': "COALESCE(s.realized_pnl, 0)",
+    'last_seen': "COALESCE(t.last_seen, '')",
+}
+ROSTER_PAGE_MAX = 500
+
+def _encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def _decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
 @admin_bp.route('/api/admin/traders', methods=['GET'])
 @admin_required
 def admin_list_traders():
-    db = get_db()
-    traders = db.execute("""
-        SELECT t.*, tm.name as team_name, tm.color as team_color,
-               (SELECT COUNT(*) FROM trades WHERE trader_name=t.trader_name) as trade_count
-        FROM traders t
-        LEFT JOIN teams tm ON t.team_id = tm.id
-        WHERE t.status != 'DELETED'
-        ORDER BY t.created_at DESC
-    """).fetchall()
+    """Trader roster with trade counts and realized P&L from the trader_trade_stats rollup.
 
-    results = []
-    for t in traders:
-        trades = db.execute("SELECT trade_data FROM trades WHERE trader_name=?", (t['trader_name'],)).fetchall()
-        realized = sum(float(json.loads(r['trade_data']).get('realizedPnl', 0))
-                       for r in trades if json.loads(r['trade_data']).get('status') == 'CLOSED')
-
-        results.append({
-            'id': t['id'],
-            'trader_name': t['trader_name'],
-            'real_name': t['real_name'] if 'real_name' in t.keys() else t['display_name'],
-            'display_name': t['display_name'],
-            'firm': t['firm'],
-            'pin': t['pin'],
-            'status': t['status'],
-            'team_id': t['team_id'],
-            'team_name': t['team_name'],
-            'team_color': t['team_color'],
-            'starting_balance': t['starting_balance'],
-            'trade_count': t['trade_count'],
-            'realized_pnl': realized,
-            'photo_url': t['photo_url'],
-            'created_at': t['created_at'],
-            'last_seen': t['last_seen'],
-            'privileged': bool(t['privileged']) if 'privileged' in t.keys() else False
-        })
+    Query params (all optional): q (name/role/team substring), status, team (id or 'none'),
+    sort (see _ROSTER_SORTS), order (asc/desc), limit, cursor. Without limit the whole
+    filtered roster is returned; with it, pass back `next_cursor` for the next page.
+    `summary` always covers the whole roster.
+    """
+    sort = request.args.get('sort', 'created_at')
+    if sort not in _ROSTER_SORTS:
+        return jsonify({'success': False, 'error': f'sort must be one of {", ".join(_ROSTER_SORTS)}'}), 400
+    desc = request.args.get('order', 'desc').lower() != 'asc'
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(1, min(limit, ROSTER_PAGE_MAX))
+
+    where, params = ["t.status != 'DELETED'"], []
+    q = request.args.get('q', '').strip()
+    if q:
+        where.append("(t.display_name LIKE ? OR t.firm LIKE ? OR tm.name LIKE ?)")
+        params += [f'%{q}%'] * 3
+    status = request.args.get('status', '').strip().upper()
+    if status:
+        where.append("t.status = ?")
+        params.append(status)
+    team = request.args.get('team', '').strip()
+    if team == 'none':
+        where.append("t.team_id IS NULL")
+    elif team:
+        where.append("t.team_id = ?")
+        params.append(int(team) if team.isdigit() else -1)
+
+    keyset = ''
+    cursor = request.args.get('cursor', '')
+    if cursor:
+        try:
+            after_key, after_id = _decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        op = '<' if desc else '>'
+        keyset = f"WHERE sort_key {op} ? OR (sort_key = ? AND id {op} ?)"
+        params += [after_key, after_key, after_id]
+    direction = 'DESC' if desc else 'ASC'
 
-    return jsonify({'success': True, 'traders': results})
+    db = get_db()
+    rows = db.execute(f"""
+        SELECT * FROM (
+            SELECT t.id, t.trader_name, t.real_name, t.display_name, t.firm, t.pin, t.status, t.team_id,
+                   tm.name as team_name, tm.color as team_color, t.starting_balance, t.photo_url,
+                   t.created_at, t.last_seen, t.privileged,
+                   COALESCE(s.trade_count, 0) as trade_count, COALESCE(s.realized_pnl, 0) as realized_pnl,
+                   {_ROSTER_SORTS[sort]} as sort_key
+            FROM traders t
+            LEFT JOIN teams tm ON t.team_id = tm.id
+            LEFT JOIN trader_trade_stats s ON s.trader_name = t.trader_name
+            WHERE {' AND '.join(where)}
+        ) {keyset}
+        ORDER BY sort_key {direction}, id {direction}
+        {'LIMIT ?' if limit else ''}
+    """, params + ([limit + 1] if limit else [])).fetchall()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([rows[-1]['sort_key'], rows[-1]['id']])
+
+    summary = db.execute("""
+        SELECT COUNT(*) as total,
+               COALESCE(SUM(t.status = 'ACTIVE'), 0) as active,
+               COALESCE(SUM(t.status = 'PENDING'), 0) as pending,
+               COALESCE(SUM(s.realized_pnl), 0) as realized_pnl
+        FROM traders t LEFT JOIN trader_trade_stats s ON s.trader_name = t.trader_name
+        WHERE t.status != 'DELETED'
+    """).fetchone()
+
+    return jsonify({'success': True, 'summary': dict(summary), 'next_cursor': next_cursor, 'traders': [{
+        'id': t['id'],
+        'trader_name': t['trader_name'],
+        'real_name': t['real_name'],
+        'display_name': t['display_name'],
+        'firm': t['firm'],
+        'pin': t['pin'],
+        'status': t['status'],
+        'team_id': t['team_id'],
+        'team_name': t['team_name'],
+        'team_color': t['team_color'],
+        'starting_balance': t['starting_balance'],
+        'trade_count': t['trade_count'],
+        'realized_pnl': t['realized_pnl'],
+        'photo_url': t['photo_url'],
+        'created_at': t['created_at'],
+        'last_seen': t['last_seen'],
+        'privileged': bool(t['privileged'])
+    } for t in rows]})
 
 @admin_bp.route('/api/admin/traders/approve/<int:tid>', methods=['POST'])
 @admin_required
@@ -108,8 +196,8 @@ def admin_reset_individual(tid):
     db.execute("DELETE FROM trades WHERE trader_name=?", (trader['trader_name'],))
     db.execute("DELETE FROM performance_snapshots WHERE trader_name=?", (trader['trader_name'],))
     db.commit()
-    socketio.emit('trader_reset', {'trader_name': trader['trader_name']})
-    socketio.emit('leaderboard_update', {'reason': 'trader_reset'})
+    socketio.emit('trader_reset', {'trader_name': trader['trader_name']}, to=trader_room(trader['trader_name']))
+    mark_leaderboard_dirty('trader_reset')
     return jsonify({'success': True})
 
 @admin_bp.route('/api/admin/traders/<int:tid>', methods=['DELETE'])
@@ -123,17 +211,9 @@ def admin_delete_trader(tid):
     # Soft-delete: mark as DELETED so active sessions get silently revoked
     db.execute("UPDATE traders SET status='DELETED' WHERE id=?", (tid,))
     db.commit()
-    # Immediately kick via WebSocket if online
+    # Immediately kick via WebSocket if online (every socket in the trader's room)
     if trader:
-        try:
-            from routes.misc import trader_sids, trader_sids_lock
-            from app import socketio
-            with trader_sids_lock:
-                sid = trader_sids.get(trader['trader_name'])
-            if sid:
-                socketio.emit('session_revoked', {}, room=sid)
-        except Exception:
-            pass
+        socketio.emit('session_revoked', {}, to=trader_room(trader['trader_name']))
     return jsonify({'success': True})
 
 @admin_bp.route('/api/admin/traders/balance/<int:tid>', methods=['POST'])
@@ -216,6 +296,16 @@ def admin_update_team(tid):
     db.commit()
     return jsonify({'success': True})
 
+def _move_team_room(db, trader_id, new_team_id):
+    """Move a trader's connected sockets from their current team room to the new one."""
+    row = db.execute("SELECT trader_name, team_id FROM traders WHERE id=?", (trader_id,)).fetchone()
+    if not row:
+        return
+    if row['team_id']:
+        remove_traders_from_room(team_room(row['team_id']), [row['trader_name']])
+    if new_team_id:
+        add_traders_to_room(team_room(new_team_id), [row['trader_name']])
+
 @admin_bp.route('/api/admin/teams/<int:tid>', methods=['DELETE'])
 @admin_required
 def admin_delete_team(tid):
@@ -223,6 +313,7 @@ def admin_delete_team(tid):
     db.execute("UPDATE traders SET team_id=NULL WHERE team_id=?", (tid,))
     db.execute("DELETE FROM teams WHERE id=?", (tid,))
     db.commit()
+    socketio.close_room(team_room(tid))
     return jsonify({'success': True})
 
 @admin_bp.route('/api/admin/teams/<int:tid>/assign', methods=['POST'])
@@ -231,6 +322,7 @@ def admin_assign_to_team(tid):
     data = request.get_json()
     trader_id = data.get('trader_id')
     db = get_db()
+    _move_team_room(db, trader_id, tid)
     db.execute("UPDATE traders SET team_id=? WHERE id=?", (tid, trader_id))
     db.commit()
     return jsonify({'success': True})
@@ -241,8 +333,11 @@ def admin_remove_from_team(tid):
     data = request.get_json()
     trader_id = data.get('trader_id')
     db = get_db()
-    db.execute("UPDATE traders SET team_id=NULL WHERE id=? AND team_id=?", (trader_id, tid))
+    cur = db.execute("UPDATE traders SET team_id=NULL WHERE id=? AND team_id=?", (trader_id, tid))
     db.commit()
+    if cur.rowcount:
+        row = db.execute("SELECT trader_name FROM traders WHERE id=?", (trader_id,)).fetchone()
+        remove_traders_from_room(team_room(tid), [row['trader_name']])
     return jsonify({'success': True})
 
 @admin_bp.route('/api/admin/teams/transfer', methods=['POST'])
@@ -253,6 +348,7 @@ def admin_transfer_trader():
     trader_id = data.get('trader_id')
     to_team_id = data.get('to_team_id')
     db = get_db()
+    _move_team_room(db, trader_id, to_team_id)
     db.execute("UPDATE traders SET team_id=? WHERE id=?", (to_team_id, trader_id))
     db.commit()
     return jsonify({'success': True})
@@ -307,41 +403,174 @@ def admin_reset_all():
     db.execute("DELETE FROM performance_snapshots")
     db.commit()
     socketio.emit('trader_reset', {'trader_name': '__all__'})
-    socketio.emit('leaderboard_update', {'reason': 'reset_all'})
+    mark_leaderboard_dirty('reset_all')
     return jsonify({'success': True})
 
+# Trade export — streamed from a dedicated connection's cursor, EXPORT_BATCH rows at a time
+EXPORT_BATCH = 1000
+_EXPORT_COLUMNS = [
+    # (CSV header, columnar field, trade_data key or None for a trades column, numeric)
+    ('Trader', 'trader_name', None, False),
+    ('Type', 'type', 'type', False),
+    ('Direction', 'direction', 'direction', False),
+    ('Hub', 'hub', 'hub', False),
+    ('Volume', 'volume', 'volume', True),
+    ('Entry Price', 'entry_price', 'entryPrice', True),
+    ('Status', 'status', 'status', False),
+    ('Realized P&L', 'realized_pnl', 'realizedPnl', True),
+    ('Close Price', 'close_price', 'closePrice', True),
+    ('Notes', 'notes', 'notes', False),
+    ('Created At', 'created_at', None, False),
+    ('Sector', 'sector', 'sector', False),
+]
+
+def _export_query(args):
+    """WHERE clause and params for the export filters; raises ValueError on bad input."""
+    where, params = [], []
+    if args.get('trader'):
+        where.append("t.trader_name = ?")
+        params.append(args['trader'])
+    if args.get('team'):
+        where.append("t.trader_name IN (SELECT trader_name FROM traders WHERE team_id = ?)")
+        params.append(int(args['team']))
+    if args.get('start'):
+        where.append("t.created_at >= ?")
+        params.append(datetime.strptime(args['start'], '%Y-%m-%d').strftime('%Y-%m-%d'))
+    if args.get('end'):
+        # Inclusive end date
+        end = datetime.strptime(args['end'], '%Y-%m-%d') + timedelta(days=1)
+        where.append("t.created_at < ?")
+        params.append(end.strftime('%Y-%m-%d'))
+    for arg in ('status', 'sector'):
+        if args.get(arg):
+            where.append(f"json_valid(t.trade_data) AND UPPER(json_extract(t.trade_data, '$.{arg}')) = ?")
+            params.append(args[arg].upper())
+    sql = "SELECT t.trader_name, t.trade_data, t.created_at FROM trades t"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY t.created_at DESC", params
+
+def _export_batches(sql, params):
+    """Yield lists of export rows (one value per _EXPORT_COLUMNS entry) off a server-side cursor."""
+    conn = get_db_standalone()
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(EXPORT_BATCH)
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                try:
+                    td = json.loads(row['trade_data'])
+                except ValueError:
+                    td = {}
+                batch.append([row[field] if key is None else td.get(key, '')
+                              for _, field, key, _ in _EXPORT_COLUMNS])
+            yield batch
+    finally:
+        conn.close()
+
+def _export_csv(batches, compress=False):
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([header for header, _, _, _ in _EXPORT_COLUMNS])
+    for batch in itertools.chain([[]], batches):
+        writer.writerows(batch)
+        chunk = buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+        if gz:
+            chunk = gz.compress(chunk)
+        if chunk:
+            yield chunk
+    if gz:
+        yield gz.flush()
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands pyarrow's output back in chunks as it is written."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks, self.pos = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.pos
+
+    def drain(self):
+        out, self.chunks = b''.join(self.chunks), []
+        return out
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _export_columnar(batches, pa, fmt):
+    """Parquet (zstd) or Arrow IPC stream, one row group / record batch per EXPORT_BATCH rows."""
+    schema = pa.schema([(field, pa.float64() if numeric else pa.string())
+                        for _, field, _, numeric in _EXPORT_COLUMNS])
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+    for batch in batches:
+        columns = list(zip(*batch))
+        arrays = [pa.array([_to_float(v) for v in col] if numeric else
+                           [None if v is None else str(v) for v in col], type=schema.field(i).type)
+                  for i, (col, (_, _, _, numeric)) in enumerate(zip(columns, _EXPORT_COLUMNS))]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
 @admin_bp.route('/api/admin/export', methods=['GET'])
 @admin_required
 def admin_export():
-    db = get_db()
-    rows = db.execute(
-        "SELECT t.trader_name, t.trade_data, t.created_at FROM trades t ORDER BY t.created_at DESC"
-    ).fetchall()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Trader', 'Type', 'Direction', 'Hub', 'Volume', 'Entry Price', 'Status',
-                     'Realized P&L', 'Close Price', 'Notes', 'Created At'])
-    for row in rows:
-        td = json.loads(row['trade_data'])
-        writer.writerow([
-            row['trader_name'],
-            td.get('type', ''),
-            td.get('direction', ''),
-            td.get('hub', ''),
-            td.get('volume', ''),
-            td.get('entryPrice', ''),
-            td.get('status', ''),
-            td.get('realizedPnl', ''),
-            td.get('closePrice', ''),
-            td.get('notes', ''),
-            row['created_at']
-        ])
+    """Stream the trade ledger as CSV (default), gzip CSV, Parquet or Arrow IPC.
 
+    Filters: trader, team (id), start / end (YYYY-MM-DD, inclusive), status, sector.
+    format=parquet|arrow needs pyarrow; without it the export falls back to gzip CSV.
+    """
+    try:
+        sql, params = _export_query(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'team must be an id; start/end must be YYYY-MM-DD'}), 400
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in ('csv', 'csv.gz', 'parquet', 'arrow'):
+        return jsonify({'success': False, 'error': 'format must be csv, csv.gz, parquet or arrow'}), 400
+    if fmt in ('parquet', 'arrow'):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            logger.warning(f"pyarrow not installed — {fmt} export falling back to gzip CSV")
+            fmt = 'csv.gz'
+
+    batches = _export_batches(sql, params)
+    if fmt == 'parquet':
+        body, mimetype, ext = _export_columnar(batches, pa, 'parquet'), 'application/vnd.apache.parquet', 'parquet'
+    elif fmt == 'arrow':
+        body, mimetype, ext = _export_columnar(batches, pa, 'arrow'), 'application/vnd.apache.arrow.stream', 'arrows'
+    elif fmt == 'csv.gz':
+        body, mimetype, ext = _export_csv(batches, compress=True), 'application/gzip', 'csv.gz'
+    else:
+        body, mimetype, ext = _export_csv(batches), 'text/csv', 'csv'
     return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=energy_desk_trades.csv'}
+        body,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=energy_desk_trades.{ext}'}
     )
 
 @admin_bp.route('/api/admin/change-pin', methods=['POST'])
@@ -380,9 +609,22 @@ def admin_get_config():
     config['eia_api_key'] = eia_key if (reveal and eia_key) else ('****' if eia_key else 'NOT SET')
     config['database'] = DATABASE
     config['news_cache_ttl'] = NEWS_CACHE_TTL
+    config['leaderboard_push_interval'] = leaderboard_push_interval()
     return jsonify({'success': True, 'config': config})
 
 
+@admin_bp.route('/api/admin/config/leaderboard-push', methods=['PUT'])
+@admin_required
+def admin_update_leaderboard_push():
+    """Change the leaderboard push interval (seconds) — raise it to shed load."""
+    data = request.get_json() or {}
+    try:
+        interval = set_leaderboard_push_interval(data.get('interval'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'interval must be a number of seconds'}), 400
+    return jsonify({'success': True, 'interval': interval})
+
+
 @admin_bp.route('/api/admin/config/eia-key', methods=['PUT'])
 @admin_required
 def admin_update_eia_key():
@@ -418,28 +660,60 @@ def set_censored_words():
     db.execute("INSERT OR REPLACE INTO admin_config (key, value) VALUES ('censored_words', ?)",
                (json.dumps(words),))
     db.commit()
+    invalidate_censor_cache()
     return jsonify({'success': True, 'words': words, 'count': len(words)})
 
 
+# Censor filter: the word list compiled once, cached per process. Admin edits invalidate
+# it locally; other workers pick the change up at the next revalidation.
+CENSOR_REVALIDATE_SECONDS = 30
+_censor_cache = {'raw': None, 'pattern': None, 'checked_at': 0.0}
+_censor_lock = threading.Lock()
+
+def _trie_regex(node):
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+def compile_censor_pattern(words):
+    """Compile censored words into one case-insensitive regex, or None for an empty list.
+
+    Words are merged into a prefix trie so the alternation is factored (a 1,000-word
+    list is a single pass over the text). At any position the longest word wins.
+    """
+    trie = {}
+    for word in {w.lower() for w in words if w}:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    return re.compile(_trie_regex(trie), re.IGNORECASE) if trie else None
+
+def invalidate_censor_cache():
+    with _censor_lock:
+        _censor_cache['checked_at'] = 0.0
+
+def _censor_pattern():
+    now = time.monotonic()
+    if now - _censor_cache['checked_at'] < CENSOR_REVALIDATE_SECONDS:
+        return _censor_cache['pattern']
+    row = get_db().execute("SELECT value FROM admin_config WHERE key='censored_words'").fetchone()
+    raw = row['value'] if row else '[]'
+    with _censor_lock:
+        if raw != _censor_cache['raw']:
+            _censor_cache['pattern'] = compile_censor_pattern(json.loads(raw))
+            _censor_cache['raw'] = raw
+        _censor_cache['checked_at'] = now
+        return _censor_cache['pattern']
+
 def censor_text(text):
     """Replace censored words/phrases with asterisks."""
-    db = get_db()
-    row = db.execute("SELECT value FROM admin_config WHERE key='censored_words'").fetchone()
-    if not row:
-        return text
-    words = json.loads(row['value'])
-    if not words:
+    pattern = _censor_pattern()
+    if pattern is None or not text:
         return text
-    result = text
-    for word in words:
-        if not word:
-            continue
-        # Case-insensitive replacement
-        import re as _re
-        pattern = _re.compile(_re.escape(word), _re.IGNORECASE)
-        replacement = '*' * len(word)
-        result = pattern.sub(replacement, result)
-    return result
+    return pattern.sub(lambda m: '*' * len(m.group()), text)
 
 
 # ---------------------------------------------------------------------------
@@ -470,7 +744,6 @@ def send_broadcast():
     broadcast_id = cur.lastrowid
     # Also deliver broadcast as a chat message to all traders
     try:
-        traders = db.execute("SELECT trader_name FROM traders WHERE status='ACTIVE'").fetchall()
         # Find or create a "System Broadcasts" conversation
         sys_convo = db.execute("SELECT id FROM conversations WHERE name='System Broadcasts' AND type='system'").fetchone()
         if not sys_convo:
@@ -478,18 +751,25 @@ def send_broadcast():
             sys_convo_id = cur2.lastrowid
         else:
             sys_convo_id = sys_convo['id']
-        # Ensure all active traders are members
-        for t in traders:
-            existing = db.execute("SELECT conversation_id FROM conversation_members WHERE conversation_id=? AND trader_name=?",
-                                  (sys_convo_id, t['trader_name'])).fetchone()
-            if not existing:
-                db.execute("INSERT INTO conversation_members (conversation_id, trader_name, last_read) VALUES (?, ?, '2000-01-01 00:00:00')",
-                           (sys_convo_id, t['trader_name']))
+        # Ensure all active traders are members — one statement whatever the roster size.
+        # Newcomers start with every earlier broadcast unread.
+        added = db.execute("""
+            INSERT INTO conversation_members (conversation_id, trader_name, last_read, last_read_id, unread_count)
+            SELECT ?, t.trader_name, '2000-01-01 00:00:00', 0,
+                   (SELECT COUNT(*) FROM messages WHERE conversation_id=?)
+            FROM traders t
+            WHERE t.status='ACTIVE' AND NOT EXISTS (
+                SELECT 1 FROM conversation_members cm
+                WHERE cm.conversation_id=? AND cm.trader_name=t.trader_name)
+            RETURNING trader_name
+        """, (sys_convo_id, sys_convo_id, sys_convo_id)).fetchall()
+        if added:
+            invalidate_mention_index(sys_convo_id)
+        add_traders_to_room(conversation_room(sys_convo_id), [r['trader_name'] for r in added])
         # Insert the broadcast as a message from "SYSTEM"
         prefix = '🔴 URGENT: ' if priority == 'urgent' else '📡 '
         msg_text = prefix + (subject or 'Broadcast') + ('\n' + body if body else '')
-        db.execute("INSERT INTO messages (conversation_id, sender, text) VALUES (?, 'SYSTEM', ?)",
-                   (sys_convo_id, msg_text))
+        post_message(db, sys_convo_id, 'SYSTEM', msg_text)
         db.commit()
     except Exception as e:
         logger.warning(f"Broadcast chat delivery failed: {e}")
@@ -559,60 +839,61 @@ def delete_censored_word(word):
     db.execute("INSERT OR REPLACE INTO admin_config (key, value) VALUES ('censored_words', ?)",
                (json.dumps(words),))
     db.commit()
+    invalidate_censor_cache()
     return jsonify({'success': True, 'words': words, 'count': len(words)})
 
 
 # ---------------------------------------------------------------------------
 # Admin Dashboard Metrics
 # ---------------------------------------------------------------------------
+# The dashboard reads the trade rollup tables (app.rebuild_trade_rollups), never the
+# ledger; the assembled snapshot is reused for METRICS_CACHE_TTL seconds.
+METRICS_CACHE_TTL = 10
+_metrics_cache = {'snapshot': None, 'computed_at': 0.0}
+_metrics_lock = threading.Lock()
+
+def _compute_admin_metrics(db):
+    traders = db.execute("""
+        SELECT COUNT(*) as total, COALESCE(SUM(status = 'ACTIVE'), 0) as active FROM traders
+    """).fetchone()
+    totals = db.execute("""
+        SELECT COALESCE(SUM(trade_count), 0) as trades, COALESCE(SUM(realized_pnl), 0) as pnl,
+               COALESCE(SUM(notional), 0) as notional
+        FROM trader_trade_stats
+    """).fetchone()
+    sectors = db.execute("""
+        SELECT sector, trade_count, volume FROM sector_trade_stats
+        WHERE trade_count > 0 ORDER BY trade_count DESC
+    """).fetchall()
+    top = db.execute("""
+        SELECT t.trader_name, COALESCE(s.realized_pnl, 0) as pnl, COALESCE(s.trade_count, 0) as trades
+        FROM traders t LEFT JOIN trader_trade_stats s ON s.trader_name = t.trader_name
+        ORDER BY pnl DESC LIMIT 5
+    """).fetchall()
+    return {
+        'total_traders': traders['total'],
+        'active_traders': traders['active'],
+        'total_trades': totals['trades'],
+        'total_realized_pnl': round(totals['pnl'], 2),
+        'total_notional': round(totals['notional'], 2),
+        'sector_breakdown': [{'sector': r['sector'], 'count': r['trade_count'], 'volume': round(r['volume'], 6)}
+                             for r in sectors],
+        'top_traders': [{'trader_name': r['trader_name'], 'pnl': round(r['pnl'], 2), 'trades': r['trades']}
+                        for r in top],
+    }
+
 @admin_bp.route('/api/admin/metrics', methods=['GET'])
 @admin_required
 def get_admin_metrics():
-    """Aggregate metrics for the admin dashboard."""
+    """Aggregate metrics for the admin dashboard; ?refresh=1 skips the cached snapshot."""
     db = get_db()
-
-    traders = db.execute("SELECT trader_name, status, starting_balance FROM traders").fetchall()
-    total_traders = len(traders)
-    active_traders = sum(1 for t in traders if t['status'] == 'ACTIVE')
-
-    all_trades = db.execute("SELECT trade_data FROM trades").fetchall()
-    total_trades = len(all_trades)
-    total_realized_pnl = 0.0
-    total_notional = 0.0
-    sector_map = {}  # sector -> {count, volume}
-
-    for row in all_trades:
-        try:
-            td = json.loads(row['trade_data'])
-        except Exception:
-            continue
-        if td.get('status') == 'CLOSED':
-            total_realized_pnl += float(td.get('realizedPnl', 0) or 0)
-        volume = float(td.get('volume', 0) or 0)
-        entry = float(td.get('entryPrice', 0) or 0)
-        total_notional += volume * abs(entry)
-        sector = td.get('sector', 'other')
-        if sector not in sector_map:
-            sector_map[sector] = {'sector': sector, 'count': 0, 'volume': 0}
-        sector_map[sector]['count'] += 1
-        sector_map[sector]['volume'] += volume
-
-    sector_breakdown = sorted(sector_map.values(), key=lambda x: x['count'], reverse=True)
-
-    # Top 5 traders by realized P&L
-    trader_pnl = []
-    for t in traders:
-        rows = db.execute("SELECT trade_data FROM trades WHERE trader_name=?", (t['trader_name'],)).fetchall()
-        pnl = 0.0
-        for r in rows:
-            try:
-                td = json.loads(r['trade_data'])
-                if td.get('status') == 'CLOSED':
-                    pnl += float(td.get('realizedPnl', 0) or 0)
-            except Exception:
-                pass
-        trader_pnl.append({'trader_name': t['trader_name'], 'pnl': round(pnl, 2), 'trades': len(rows)})
-    top_traders = sorted(trader_pnl, key=lambda x: x['pnl'], reverse=True)[:5]
+    now = time.time()
+    with _metrics_lock:
+        if (request.args.get('refresh') or _metrics_cache['snapshot'] is None
+                or now - _metrics_cache['computed_at'] >= METRICS_CACHE_TTL):
+            _metrics_cache['snapshot'] = _compute_admin_metrics(db)
+            _metrics_cache['computed_at'] = now
+        snapshot, computed_at = _metrics_cache['snapshot'], _metrics_cache['computed_at']
 
     recent_feed = db.execute(
         "SELECT * FROM trade_feed ORDER BY id DESC LIMIT 10"
@@ -620,16 +901,27 @@ def get_admin_metrics():
 
     return jsonify({
         'success': True,
-        'total_traders': total_traders,
-        'active_traders': active_traders,
-        'total_trades': total_trades,
-        'total_realized_pnl': round(total_realized_pnl, 2),
-        'total_notional': round(total_notional, 2),
-        'sector_breakdown': sector_breakdown,
-        'top_traders': top_traders,
+        **snapshot,
         'recent_feed': [dict(r) for r in recent_feed],
+        'tournament_risk': tournament_risk_stats(),
+        'tournament_replay': tournament_replay_stats(),
+        'computed_at': datetime.fromtimestamp(computed_at, timezone.utc).replace(tzinfo=None).isoformat() + 'Z',
+        'age_seconds': round(now - computed_at, 1),
     })
 
+@admin_bp.route('/api/admin/metrics/rebuild', methods=['POST'])
+@admin_required
+def rebuild_admin_metrics():
+    """Recompute the trade rollups from the ledger (repairs drift; normally never needed)."""
+    db = get_db()
+    t0 = time.perf_counter()
+    rebuild_trade_rollups(db)
+    db.commit()
+    with _metrics_lock:
+        _metrics_cache['snapshot'] = None
+    logger.info(f"Trade rollups rebuilt in {time.perf_counter() - t0:.2f}s")
+    return jsonify({'success': True, 'seconds': round(time.perf_counter() - t0, 3)})
+
 
 # ---------------------------------------------------------------------------
 # Tournament Admin Endpoints
@@ -643,7 +935,7 @@ def list_tournaments():
     for r in rows:
         t = dict(r)
         t['entry_count'] = db.execute(
-            "SELECT COUNT(*) as c FROM tournament_entries WHERE tournament_id=?", (r['id'],)
+            f"SELECT COUNT(*) as c FROM {tournament_schema(db, r)}.tournament_entries WHERE tournament_id=?", (r['id'],)
         ).fetchone()['c']
         result.append(t)
     return jsonify({'success': True, 'tournaments': result})
@@ -656,15 +948,21 @@ def create_tournament():
     name = (data.get('name') or '').strip()
     if not name:
         return jsonify({'success': False, 'error': 'Name is required'}), 400
+    try:
+        start_time, end_time = _parse_utc(data.get('start_time')), _parse_utc(data.get('end_time'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid start_time or end_time'}), 400
     db = get_db()
     cur = db.execute(
         "INSERT INTO tournaments (name, description, start_time, end_time, starting_balance, sector, duration_minutes, var_limit) VALUES (?,?,?,?,?,?,?,?)",
-        (name, data.get('description', ''), data.get('start_time'), data.get('end_time'),
+        (name, data.get('description', ''), start_time, end_time,
          float(data.get('starting_balance', 1000000)),
          data.get('sector', ''),
          int(data.get('duration_minutes', 60)),
          float(data.get('var_limit', 0)))
     )
+    # A start_time on a new (PENDING) tournament schedules its auto-start
+    sync_tournament_schedule(db, db.execute("SELECT * FROM tournaments WHERE id=?", (cur.lastrowid,)).fetchone())
     db.commit()
     return jsonify({'success': True, 'id': cur.lastrowid})
 
@@ -681,12 +979,16 @@ def update_tournament(tid):
     name = data.get('name', row['name'])
     desc = data.get('description', row['description'])
     status = data.get('status', row['status'])
-    start_time = data.get('start_time', row['start_time'])
-    end_time = data.get('end_time', row['end_time'])
+    try:
+        start_time = _parse_utc(data['start_time']) if 'start_time' in data else row['start_time']
+        end_time = _parse_utc(data['end_time']) if 'end_time' in data else row['end_time']
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid start_time or end_time'}), 400
     balance = float(data.get('starting_balance', row['starting_balance']))
     sector = data.get('sector', row['sector'] or '')
     duration_minutes = int(data.get('duration_minutes', row['duration_minutes'] or 60))
     var_limit = float(data.get('var_limit', row['var_limit'] or 0))
+    tournament_schema(db, row)     # attach a shard before the first write
 
     # Auto-set start_time when activating
     if status == 'ACTIVE' and row['status'] == 'PENDING' and not start_time:
@@ -697,7 +999,13 @@ def update_tournament(tid):
         "starting_balance=?, sector=?, duration_minutes=?, var_limit=? WHERE id=?",
         (name, desc, status, start_time, end_time, balance, sector, duration_minutes, var_limit, tid)
     )
+    sync_tournament_schedule(db, db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone())
     db.commit()
+    if status == 'ACTIVE':
+        open_tournament_shard(db, tid)
+    else:
+        close_tournament_shard(db, tid)
+    invalidate_tournament_standings(tid)
     socketio.emit('tournament_update', {'id': tid, 'status': status})
     return jsonify({'success': True})
 
@@ -706,11 +1014,21 @@ def update_tournament(tid):
 @admin_required
 def delete_tournament(tid):
     db = get_db()
-    db.execute("DELETE FROM tournament_news_events WHERE tournament_id=?", (tid,))
-    db.execute("DELETE FROM tournament_trades WHERE tournament_id=?", (tid,))
-    db.execute("DELETE FROM tournament_entries WHERE tournament_id=?", (tid,))
+    row = db.execute("SELECT id, shard FROM tournaments WHERE id=?", (tid,)).fetchone()
+    schema = tournament_schema(db, row)
+    cancel_jobs(db, 'tournament_start', [tid])
+    cancel_jobs(db, 'tournament_end', [tid])
+    cancel_jobs(db, 'news_flash', _tournament_news_ids(db, tid))
+    db.execute(f"DELETE FROM {schema}.tournament_news_events WHERE tournament_id=?", (tid,))
+    db.execute(f"DELETE FROM {schema}.tournament_trades WHERE tournament_id=?", (tid,))
+    db.execute(f"DELETE FROM {schema}.tournament_entries WHERE tournament_id=?", (tid,))
     db.execute("DELETE FROM tournaments WHERE id=?", (tid,))
     db.commit()
+    if row:
+        discard_tournament_shards(db, [row['shard']])
+    invalidate_tournament_standings(tid)
+    drop_tournament_prices(tid)
+    drop_tournament_replay(tid)
     return jsonify({'success': True})
 
 
@@ -719,11 +1037,18 @@ def delete_tournament(tid):
 def delete_all_tournaments():
     """Delete every tournament and all associated data."""
     db = get_db()
+    shards = [r['shard'] for r in db.execute("SELECT shard FROM tournaments WHERE shard IS NOT NULL")]
+    for kind in ('tournament_start', 'tournament_end', 'news_flash'):
+        cancel_jobs(db, kind)
     db.execute("DELETE FROM tournament_news_events")
     db.execute("DELETE FROM tournament_trades")
     db.execute("DELETE FROM tournament_entries")
     db.execute("DELETE FROM tournaments")
     db.commit()
+    discard_tournament_shards(db, shards)
+    invalidate_tournament_standings()
+    drop_tournament_prices()
+    drop_tournament_replay()
     return jsonify({'success': True})
 
 
@@ -731,18 +1056,22 @@ def delete_all_tournaments():
 @admin_required
 def enroll_all_traders(tid):
     db = get_db()
-    if not db.execute("SELECT id FROM tournaments WHERE id=?", (tid,)).fetchone():
+    tourn = db.execute("SELECT id, shard FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if not tourn:
         return jsonify({'success': False, 'error': 'Tournament not found'}), 404
+    schema = tournament_schema(db, tourn)
     traders = db.execute("SELECT trader_name FROM traders WHERE status='ACTIVE'").fetchall()
     enrolled = 0
     for t in traders:
         try:
-            db.execute("INSERT OR IGNORE INTO tournament_entries (tournament_id, trader_name) VALUES (?,?)",
+            db.execute(f"INSERT OR IGNORE INTO {schema}.tournament_entries (tournament_id, trader_name) VALUES (?,?)",
                        (tid, t['trader_name']))
             enrolled += 1
         except Exception:
             pass
     db.commit()
+    invalidate_tournament_standings(tid)
+    add_traders_to_room(tournament_room(tid), [t['trader_name'] for t in traders])
     return jsonify({'success': True, 'enrolled': enrolled})
 
 
@@ -757,109 +1086,125 @@ def get_active_tournament():
         return jsonify({'success': True, 'tournament': None})
     t = dict(row)
     t['entry_count'] = db.execute(
-        "SELECT COUNT(*) as c FROM tournament_entries WHERE tournament_id=?", (row['id'],)
+        f"SELECT COUNT(*) as c FROM {tournament_schema(db, row)}.tournament_entries WHERE tournament_id=?",
+        (row['id'],)
     ).fetchone()['c']
     return jsonify({'success': True, 'tournament': t})
 
 
 @admin_bp.route('/api/tournament/<int:tid>/standings', methods=['GET'])
 def get_tournament_standings(tid):
-    """Return P&L standings for a tournament, scoped to its time window."""
+    """Return P&L standings for a tournament, scoped to its time window.
+
+    Open positions are marked by the server: the tournament price engine for sector
+    tournaments, the spot price cache otherwise. ACTIVE tournaments are served from
+    the in-memory standings book.
+    """
     db = get_db()
     tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
     if not tourn:
         return jsonify({'success': False, 'error': 'Not found'}), 404
 
-    prices_raw = request.args.get('prices', '{}')
-    try:
-        prices = json.loads(prices_raw)
-    except Exception:
-        prices = {}
-
-    entries = db.execute(
-        "SELECT e.trader_name, e.status as entry_status, t.display_name, t.photo_url, "
-        "tm.name as team_name, tm.color as team_color "
-        "FROM tournament_entries e "
-        "JOIN traders t ON e.trader_name = t.trader_name "
-        "LEFT JOIN teams tm ON t.team_id = tm.id "
-        "WHERE e.tournament_id=?", (tid,)
-    ).fetchall()
-
-    start = tourn['start_time']
-    end = tourn['end_time'] or datetime.utcnow().isoformat()
-    balance = tourn['starting_balance']
-    use_tournament_trades = bool(tourn['sector'])
-
-    standings = []
-    for e in entries:
-        if use_tournament_trades:
-            trades = db.execute(
-                "SELECT trade_data FROM tournament_trades WHERE tournament_id=? AND trader_name=?",
-                (tid, e['trader_name'])
-            ).fetchall()
-        elif start:
-            trades = db.execute(
-                "SELECT trade_data FROM trades WHERE trader_name=? AND created_at>=? AND created_at<=?",
-                (e['trader_name'], start, end)
-            ).fetchall()
-        else:
-            trades = db.execute(
-                "SELECT trade_data FROM trades WHERE trader_name=?", (e['trader_name'],)
-            ).fetchall()
-
-        realized = 0.0
-        unrealized = 0.0
-        trade_count = 0
-        for row in trades:
-            try:
-                td = json.loads(row['trade_data'])
-            except Exception:
-                continue
-            trade_count += 1
-            if td.get('status') == 'CLOSED':
-                realized += float(td.get('realizedPnl', 0) or 0)
-            elif td.get('status') == 'OPEN':
-                hub = td.get('hub', '')
-                price = prices.get(hub, float(td.get('entryPrice', 0) or 0))
-                entry = float(td.get('entryPrice', 0) or 0)
-                volume = float(td.get('volume', 0) or 0)
-                direction = td.get('direction', 'BUY')
-                mult = 1 if direction == 'BUY' else -1
-                unrealized += mult * (price - entry) * volume
-
-        total_pnl = realized + unrealized
-        equity = balance + total_pnl
-        ret_pct = (total_pnl / balance * 100) if balance else 0
-
-        standings.append({
-            'trader_name': e['trader_name'],
-            'display_name': e['display_name'],
-            'photo_url': e['photo_url'] or '',
-            'team_name': e['team_name'] or '',
-            'team_color': e['team_color'] or '#888',
-            'entry_status': e['entry_status'] or 'ACTIVE',
-            'equity': round(equity, 2),
-            'total_pnl': round(total_pnl, 2),
-            'realized_pnl': round(realized, 2),
-            'unrealized_pnl': round(unrealized, 2),
-            'ret_pct': round(ret_pct, 2),
-            'trades': trade_count,
-        })
-
-    standings.sort(key=lambda x: x['total_pnl'], reverse=True)
-    for i, s in enumerate(standings):
-        s['rank'] = i + 1
-
     return jsonify({
         'success': True,
         'tournament': dict(tourn),
-        'standings': standings,
+        'standings': tournament_standings(db, tourn),
     })
 
 
 # ---------------------------------------------------------------------------
 # Tournament Lifecycle — Start / End
 # ---------------------------------------------------------------------------
+def _tournament_news_ids(db, tid):
+    return [r['id'] for r in db.execute(
+        f"SELECT id FROM {tournament_schema(db, tid)}.tournament_news_events "
+        "WHERE tournament_id=? AND status='QUEUED'", (tid,))]
+
+
+def sync_tournament_schedule(db, tourn):
+    """Align a tournament's scheduled jobs with its row. Caller commits.
+
+    PENDING with a start_time auto-starts then; ACTIVE ends at end_time and auto-flashes
+    queued news that has a flash_at. Anything else has nothing pending.
+    """
+    tid = tourn['id']
+    if tourn['status'] == 'PENDING' and tourn['start_time']:
+        schedule_job(db, 'tournament_start', tid, utc_seconds(tourn['start_time']))
+    else:
+        cancel_jobs(db, 'tournament_start', [tid])
+    if tourn['status'] == 'ACTIVE' and tourn['end_time']:
+        schedule_job(db, 'tournament_end', tid, utc_seconds(tourn['end_time']))
+    else:
+        cancel_jobs(db, 'tournament_end', [tid])
+    if tourn['status'] == 'ACTIVE':
+        for ev in db.execute(f"SELECT id, flash_at FROM {tournament_schema(db, tourn)}.tournament_news_events "
+                             "WHERE tournament_id=? AND status='QUEUED' AND flash_at IS NOT NULL", (tid,)).fetchall():
+            schedule_job(db, 'news_flash', ev['id'], utc_seconds(ev['flash_at']))
+    else:
+        cancel_jobs(db, 'news_flash', _tournament_news_ids(db, tid))
+
+
+def _parse_utc(value):
+    """Naive-UTC ISO string for an ISO timestamp (offset or 'Z' allowed), None for blank."""
+    if value in (None, ''):
+        return None
+    ts = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.isoformat()
+
+
+def _emit(emits, event, payload, room=None):
+    """socketio.emit now, or queue it on `emits` for a scheduled job to send from the event loop."""
+    if emits is None:
+        socketio.emit(event, payload, to=room)
+    else:
+        emits.append((event, payload, room))
+
+
+def begin_tournament(db, row, price_snapshot=None, emits=None):
+    """Activate a PENDING tournament now: opening prices, times, schedule. Commits and emits (see _emit)."""
+    tid = row['id']
+    if isinstance(price_snapshot, str):
+        try:
+            price_snapshot = json.loads(price_snapshot)
+        except ValueError:
+            price_snapshot = {}
+    # Sector tournaments are priced by the server engine: fill in every hub's opening
+    # price and fix the seed (and weather bias) the whole path derives from
+    try:
+        config = json.loads(row['config'] or '{}')
+    except ValueError:
+        config = {}
+    if row['sector']:
+        price_snapshot, price_config = new_tournament_price_model(row['sector'], price_snapshot,
+                                                                  get_regional_bias)
+        config.update(price_config)
+    price_snapshot = json.dumps(price_snapshot or {})
+
+    now = datetime.utcnow()
+    duration = row['duration_minutes'] or 60
+    start_time = now.isoformat()
+    end_time = (now + timedelta(minutes=duration)).isoformat()
+
+    db.execute(
+        "UPDATE tournaments SET status='ACTIVE', start_time=?, end_time=?, price_snapshot=?, config=? WHERE id=?",
+        (start_time, end_time, price_snapshot, json.dumps(config), tid)
+    )
+    tourn = dict(db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone())
+    sync_tournament_schedule(db, tourn)
+    db.commit()
+    tourn['shard'] = open_tournament_shard(db, tid)
+    invalidate_tournament_standings(tid)
+
+    tourn['entry_count'] = db.execute(
+        f"SELECT COUNT(*) as c FROM {tournament_schema(db, tourn)}.tournament_entries WHERE tournament_id=?", (tid,)
+    ).fetchone()['c']
+
+    _emit(emits, 'tournament_start', tourn)
+    return tourn
+
+
 @admin_bp.route('/api/admin/tournaments/<int:tid>/start', methods=['POST'])
 @admin_required
 def start_tournament(tid):
@@ -872,28 +1217,75 @@ def start_tournament(tid):
         return jsonify({'success': False, 'error': 'Tournament must be PENDING to start'}), 400
 
     data = request.get_json() or {}
-    price_snapshot = data.get('price_snapshot', '{}')
-    if isinstance(price_snapshot, dict):
-        price_snapshot = json.dumps(price_snapshot)
+    tourn = begin_tournament(db, row, data.get('price_snapshot', {}))
+    return jsonify({'success': True, 'tournament': tourn})
 
-    now = datetime.utcnow()
-    duration = row['duration_minutes'] or 60
-    start_time = now.isoformat()
-    end_time = (now + timedelta(minutes=duration)).isoformat()
 
+@scheduled_handler('tournament_start')
+def _scheduled_tournament_start(conn, tid):
+    emits = []
+    row = conn.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if row and row['status'] == 'PENDING':
+        begin_tournament(conn, row, emits=emits)
+        logger.info(f"Tournament {tid} started on schedule")
+    return emits
+
+
+def finish_tournament(db, row, reason, emits=None):
+    """End an ACTIVE tournament: close positions, finalize entries, merge back its shard.
+
+    Commits and emits (see _emit); returns standings.
+    """
+    tid = row['id']
+    schema = tournament_schema(db, row)
+    now = datetime.utcnow().isoformat()
+    db.execute("UPDATE tournaments SET status='ENDED', end_time=? WHERE id=?", (now, tid))
+
+    # Close OPEN trades at the price engine's final marks; anything it doesn't price
+    # (no sector, unknown hub) is closed with zero P&L, keeping a realizedPnl the client
+    # already synced (json_insert)
+    close_tournament_positions(db, row, 'TOURNAMENT_ENDED', when=now)
     db.execute(
-        "UPDATE tournaments SET status='ACTIVE', start_time=?, end_time=?, price_snapshot=? WHERE id=?",
-        (start_time, end_time, price_snapshot, tid)
+        f"UPDATE {schema}.tournament_trades SET trade_data = json_insert(json_set(trade_data, "
+        "'$.status', 'CLOSED', '$.closedAt', ?, '$.closeReason', 'TOURNAMENT_ENDED'), '$.realizedPnl', 0) "
+        "WHERE tournament_id=? AND json_valid(trade_data) AND json_extract(trade_data, '$.status')='OPEN'",
+        (now, tid)
     )
-    db.commit()
 
-    tourn = dict(db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone())
-    tourn['entry_count'] = db.execute(
-        "SELECT COUNT(*) as c FROM tournament_entries WHERE tournament_id=?", (tid,)
-    ).fetchone()['c']
+    # Finalize every entry from one aggregate over tournament_trades
+    balance = row['starting_balance']
+    db.execute(f"""
+        UPDATE {schema}.tournament_entries SET
+            final_pnl = ROUND(s.pnl, 2),
+            final_equity = ROUND(? + s.pnl, 2),
+            trade_count = s.n,
+            status = CASE WHEN tournament_entries.status='DISQUALIFIED' THEN 'DISQUALIFIED' ELSE 'COMPLETED' END
+        FROM (
+            SELECT e.trader_name,
+                   COUNT(CASE WHEN json_valid(tt.trade_data) THEN 1 END) AS n,
+                   TOTAL(CASE WHEN json_valid(tt.trade_data) AND json_extract(tt.trade_data, '$.status')='CLOSED'
+                              THEN CAST(COALESCE(json_extract(tt.trade_data, '$.realizedPnl'), 0) AS REAL) END) AS pnl
+            FROM {schema}.tournament_entries e
+            LEFT JOIN {schema}.tournament_trades tt ON tt.tournament_id = e.tournament_id AND tt.trader_name = e.trader_name
+            WHERE e.tournament_id=?
+            GROUP BY e.trader_name
+        ) s
+        WHERE tournament_entries.tournament_id=? AND tournament_entries.trader_name = s.trader_name
+    """, (balance, tid, tid))
+
+    standings = [dict(r) for r in db.execute(
+        "SELECT trader_name, final_pnl AS total_pnl, final_equity AS equity, trade_count AS trades, "
+        "status AS entry_status, ROW_NUMBER() OVER (ORDER BY final_pnl DESC, id) AS rank "
+        f"FROM {schema}.tournament_entries WHERE tournament_id=? ORDER BY rank", (tid,)
+    )]
+    cancel_jobs(db, 'tournament_end', [tid])
+    cancel_jobs(db, 'news_flash', _tournament_news_ids(db, tid))
+    db.commit()
+    close_tournament_shard(db, tid)
+    invalidate_tournament_standings(tid)
 
-    socketio.emit('tournament_start', tourn)
-    return jsonify({'success': True, 'tournament': tourn})
+    _emit(emits, 'tournament_end', {'id': tid, 'standings': standings, 'reason': reason})
+    return standings
 
 
 @admin_bp.route('/api/admin/tournaments/<int:tid>/end', methods=['POST'])
@@ -907,71 +1299,33 @@ def end_tournament(tid):
     if row['status'] != 'ACTIVE':
         return jsonify({'success': False, 'error': 'Tournament must be ACTIVE to end'}), 400
 
-    now = datetime.utcnow().isoformat()
-    db.execute("UPDATE tournaments SET status='ENDED', end_time=? WHERE id=?", (now, tid))
+    standings = finish_tournament(db, row, 'admin')
+    return jsonify({'success': True, 'standings': standings})
 
-    # Force-close any remaining OPEN trades (server can't compute P&L from simulated prices,
-    # so we mark them CLOSED with zero P&L — clients should have force-closed with actual P&L)
-    open_trades = db.execute(
-        "SELECT id, trade_data FROM tournament_trades WHERE tournament_id=?", (tid,)
-    ).fetchall()
-    for ot in open_trades:
-        try:
-            td = json.loads(ot['trade_data'])
-        except Exception:
-            continue
-        if td.get('status') == 'OPEN':
-            td['status'] = 'CLOSED'
-            td['closedAt'] = now
-            td['closeReason'] = 'TOURNAMENT_ENDED'
-            # Keep existing realizedPnl if client already synced, otherwise 0
-            if 'realizedPnl' not in td:
-                td['realizedPnl'] = 0
-            db.execute("UPDATE tournament_trades SET trade_data=? WHERE id=?",
-                       (json.dumps(td), ot['id']))
-
-    # Finalize entry stats from tournament_trades
-    entries = db.execute("SELECT * FROM tournament_entries WHERE tournament_id=?", (tid,)).fetchall()
-    balance = row['starting_balance']
-    standings = []
-    for e in entries:
-        trades = db.execute(
-            "SELECT trade_data FROM tournament_trades WHERE tournament_id=? AND trader_name=?",
-            (tid, e['trader_name'])
-        ).fetchall()
-        realized = 0.0
-        trade_count = 0
-        for tr in trades:
-            try:
-                td = json.loads(tr['trade_data'])
-            except Exception:
-                continue
-            trade_count += 1
-            if td.get('status') == 'CLOSED':
-                realized += float(td.get('realizedPnl', 0) or 0)
-        total_pnl = realized
-        equity = balance + total_pnl
-        entry_status = e['status'] if e['status'] == 'DISQUALIFIED' else 'COMPLETED'
-        db.execute(
-            "UPDATE tournament_entries SET final_pnl=?, final_equity=?, trade_count=?, status=? "
-            "WHERE tournament_id=? AND trader_name=?",
-            (round(total_pnl, 2), round(equity, 2), trade_count, entry_status, tid, e['trader_name'])
-        )
-        standings.append({
-            'trader_name': e['trader_name'],
-            'total_pnl': round(total_pnl, 2),
-            'equity': round(equity, 2),
-            'trades': trade_count,
-            'entry_status': entry_status,
-        })
-    db.commit()
 
-    standings.sort(key=lambda x: x['total_pnl'], reverse=True)
-    for i, s in enumerate(standings):
-        s['rank'] = i + 1
+@scheduled_handler('tournament_end')
+def _scheduled_tournament_end(conn, tid):
+    emits = []
+    row = conn.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if row and row['status'] == 'ACTIVE':
+        finish_tournament(conn, row, 'time_expired', emits=emits)
+        logger.info(f"Tournament {tid} ended on schedule")
+    return emits
 
-    socketio.emit('tournament_end', {'id': tid, 'standings': standings, 'reason': 'admin'})
-    return jsonify({'success': True, 'standings': standings})
+
+@admin_bp.route('/api/admin/scheduled-jobs', methods=['GET'])
+@admin_required
+def list_scheduled_jobs():
+    """Pending scheduled jobs (auto-start/end, news auto-flash), soonest first, plus recent failures."""
+    db = get_db()
+    rows = db.execute(
+        "SELECT kind, ref_id, due_at, status, fired_at, error FROM scheduled_jobs "
+        "WHERE status='PENDING' OR (status='FAILED' AND fired_at > ?) ORDER BY due_at LIMIT 500",
+        (time.time() - 86400,)
+    ).fetchall()
+    jobs = [dict(r, due_at=datetime.fromtimestamp(r['due_at'], timezone.utc).replace(tzinfo=None).isoformat())
+            for r in rows]
+    return jsonify({'success': True, 'jobs': jobs})
 
 
 # ---------------------------------------------------------------------------
@@ -982,7 +1336,8 @@ def end_tournament(tid):
 def list_tournament_news(tid):
     db = get_db()
     rows = db.execute(
-        "SELECT * FROM tournament_news_events WHERE tournament_id=? ORDER BY queued_at DESC", (tid,)
+        f"SELECT * FROM {tournament_schema(db, tid)}.tournament_news_events "
+        "WHERE tournament_id=? ORDER BY queued_at DESC", (tid,)
     ).fetchall()
     events = []
     for r in rows:
@@ -999,8 +1354,10 @@ def list_tournament_news(tid):
 @admin_required
 def create_tournament_news(tid):
     db = get_db()
-    if not db.execute("SELECT id FROM tournaments WHERE id=?", (tid,)).fetchone():
+    tourn = db.execute("SELECT id, shard FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if not tourn:
         return jsonify({'success': False, 'error': 'Tournament not found'}), 404
+    schema = tournament_schema(db, tourn)
 
     data = request.get_json()
     headline = (data.get('headline') or '').strip()
@@ -1010,12 +1367,16 @@ def create_tournament_news(tid):
     affected_hubs = data.get('affected_hubs', [])
     if isinstance(affected_hubs, list):
         affected_hubs = json.dumps(affected_hubs)
+    try:
+        flash_at = _news_flash_at(data)
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid flash_at or flash_in_seconds'}), 400
 
     cur = db.execute(
-        "INSERT INTO tournament_news_events "
+        f"INSERT INTO {schema}.tournament_news_events "
         "(tournament_id, headline, description, category, impact_type, impact_direction, "
-        "impact_pct, delay_seconds, duration_ticks, affected_hubs, is_noise) "
-        "VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+        "impact_pct, delay_seconds, duration_ticks, affected_hubs, is_noise, flash_at) "
+        "VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
         (tid, headline, data.get('description', ''),
          data.get('category', 'general'),
          data.get('impact_type', 'shock'),
@@ -1024,8 +1385,10 @@ def create_tournament_news(tid):
          int(data.get('delay_seconds', 5)),
          int(data.get('duration_ticks', 5)),
          affected_hubs,
-         1 if data.get('is_noise') else 0)
+         1 if data.get('is_noise') else 0,
+         flash_at)
     )
+    _sync_news_schedule(db, tid, cur.lastrowid, flash_at)
     db.commit()
     return jsonify({'success': True, 'id': cur.lastrowid})
 
@@ -1034,8 +1397,9 @@ def create_tournament_news(tid):
 @admin_required
 def update_tournament_news(tid, nid):
     db = get_db()
+    schema = tournament_schema(db, tid)
     row = db.execute(
-        "SELECT * FROM tournament_news_events WHERE id=? AND tournament_id=?", (nid, tid)
+        f"SELECT * FROM {schema}.tournament_news_events WHERE id=? AND tournament_id=?", (nid, tid)
     ).fetchone()
     if not row:
         return jsonify({'success': False, 'error': 'Not found'}), 404
@@ -1046,11 +1410,15 @@ def update_tournament_news(tid, nid):
     affected_hubs = data.get('affected_hubs', json.loads(row['affected_hubs'] or '[]'))
     if isinstance(affected_hubs, list):
         affected_hubs = json.dumps(affected_hubs)
+    try:
+        flash_at = _news_flash_at(data, row['flash_at'])
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid flash_at or flash_in_seconds'}), 400
 
     db.execute(
-        "UPDATE tournament_news_events SET headline=?, description=?, category=?, impact_type=?, "
-        "impact_direction=?, impact_pct=?, delay_seconds=?, duration_ticks=?, affected_hubs=?, is_noise=? "
-        "WHERE id=?",
+        f"UPDATE {schema}.tournament_news_events SET headline=?, description=?, category=?, impact_type=?, "
+        "impact_direction=?, impact_pct=?, delay_seconds=?, duration_ticks=?, affected_hubs=?, is_noise=?, "
+        "flash_at=? WHERE id=?",
         (data.get('headline', row['headline']),
          data.get('description', row['description']),
          data.get('category', row['category']),
@@ -1061,8 +1429,10 @@ def update_tournament_news(tid, nid):
          int(data.get('duration_ticks', row['duration_ticks'])),
          affected_hubs,
          1 if data.get('is_noise', row['is_noise']) else 0,
+         flash_at,
          nid)
     )
+    _sync_news_schedule(db, tid, nid, flash_at)
     db.commit()
     return jsonify({'success': True})
 
@@ -1071,34 +1441,49 @@ def update_tournament_news(tid, nid):
 @admin_required
 def delete_tournament_news(tid, nid):
     db = get_db()
+    schema = tournament_schema(db, tid)
     row = db.execute(
-        "SELECT * FROM tournament_news_events WHERE id=? AND tournament_id=?", (nid, tid)
+        f"SELECT * FROM {schema}.tournament_news_events WHERE id=? AND tournament_id=?", (nid, tid)
     ).fetchone()
     if not row:
         return jsonify({'success': False, 'error': 'Not found'}), 404
-    db.execute("DELETE FROM tournament_news_events WHERE id=?", (nid,))
+    cancel_jobs(db, 'news_flash', [nid])
+    db.execute(f"DELETE FROM {schema}.tournament_news_events WHERE id=?", (nid,))
     db.commit()
     return jsonify({'success': True})
 
 
-@admin_bp.route('/api/admin/tournaments/<int:tid>/news/<int:nid>/flash', methods=['POST'])
-@admin_required
-def flash_tournament_news(tid, nid):
-    """Flash a queued news event — sends it to all clients."""
-    db = get_db()
-    row = db.execute(
-        "SELECT * FROM tournament_news_events WHERE id=? AND tournament_id=?", (nid, tid)
-    ).fetchone()
-    if not row:
-        return jsonify({'success': False, 'error': 'Not found'}), 404
-    if row['status'] == 'FLASHED':
-        return jsonify({'success': False, 'error': 'Already flashed'}), 400
+def _news_flash_at(data, current=None):
+    """flash_at for a news event from a request: ISO flash_at, or flash_in_seconds from now.
 
+    Neither key keeps current; a blank/null value clears it (manual flash only).
+    """
+    if data.get('flash_in_seconds') not in (None, ''):
+        return (datetime.utcnow() + timedelta(seconds=float(data['flash_in_seconds']))).isoformat()
+    if 'flash_at' in data:
+        return _parse_utc(data['flash_at'])
+    return current
+
+
+def _sync_news_schedule(db, tid, nid, flash_at):
+    """Schedule (or cancel) one queued event's auto-flash. Events of tournaments that
+    haven't started are scheduled by sync_tournament_schedule when they do."""
+    tourn = db.execute("SELECT status FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if flash_at and tourn and tourn['status'] == 'ACTIVE':
+        schedule_job(db, 'news_flash', nid, utc_seconds(flash_at))
+    else:
+        cancel_jobs(db, 'news_flash', [nid])
+
+
+def flash_news_event(db, row, emits=None):
+    """Mark a queued event FLASHED and send it to the tournament room (see _emit). Commits."""
+    nid, tid = row['id'], row['tournament_id']
     now = datetime.utcnow().isoformat()
     db.execute(
-        "UPDATE tournament_news_events SET status='FLASHED', flashed_at=? WHERE id=?",
+        f"UPDATE {tournament_schema(db, tid)}.tournament_news_events SET status='FLASHED', flashed_at=? WHERE id=?",
         (now, nid)
     )
+    cancel_jobs(db, 'news_flash', [nid])
     db.commit()
 
     try:
@@ -1118,32 +1503,62 @@ def flash_tournament_news(tid, nid):
     })
     _ep = base64.b64encode(_impact_payload.encode()).decode()
 
-    socketio.emit('tournament_news_flash', {
+    _emit(emits, 'tournament_news_flash', {
         'event_id': nid,
         'tournament_id': tid,
         'flashed_at': now,
         '_ep': _ep,
-    })
+    }, tournament_room(tid))
 
     # Public event — headline only, no impact params (traders can't see signal vs noise)
-    socketio.emit('tournament_news_public', {
+    _emit(emits, 'tournament_news_public', {
         'event_id': nid,
         'tournament_id': tid,
         'headline': row['headline'],
         'description': row['description'],
         'flashed_at': now,
-    })
+    }, tournament_room(tid))
+
 
+@admin_bp.route('/api/admin/tournaments/<int:tid>/news/<int:nid>/flash', methods=['POST'])
+@admin_required
+def flash_tournament_news(tid, nid):
+    """Flash a queued news event — sends it to all clients."""
+    db = get_db()
+    row = db.execute(
+        f"SELECT * FROM {tournament_schema(db, tid)}.tournament_news_events WHERE id=? AND tournament_id=?",
+        (nid, tid)
+    ).fetchone()
+    if not row:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    if row['status'] == 'FLASHED':
+        return jsonify({'success': False, 'error': 'Already flashed'}), 400
+
+    flash_news_event(db, row)
     return jsonify({'success': True})
 
 
+@scheduled_handler('news_flash')
+def _scheduled_news_flash(conn, nid):
+    # The event lives in main or in its live tournament's shard (ids are unique across both)
+    for tourn in conn.execute("SELECT id, shard FROM tournaments WHERE status='ACTIVE'").fetchall():
+        row = conn.execute(
+            f"SELECT * FROM {tournament_schema(conn, tourn)}.tournament_news_events "
+            "WHERE id=? AND tournament_id=? AND status='QUEUED'", (nid, tourn['id'])
+        ).fetchone()
+        if row:
+            emits = []
+            flash_news_event(conn, row, emits=emits)
+            return emits
+
+
 # Public: flashed news feed (no admin auth)
 @admin_bp.route('/api/tournament/<int:tid>/news/feed', methods=['GET'])
 def tournament_news_feed(tid):
     """Return flashed events for traders — headline/desc only, no impact params."""
     db = get_db()
     rows = db.execute(
-        "SELECT id, headline, description, flashed_at FROM tournament_news_events "
+        f"SELECT id, headline, description, flashed_at FROM {tournament_schema(db, tid)}.tournament_news_events "
         "WHERE tournament_id=? AND status='FLASHED' ORDER BY flashed_at DESC", (tid,)
     ).fetchall()
     return jsonify({'success': True, 'events': [dict(r) for r in rows]})
@@ -1156,8 +1571,9 @@ def tournament_news_feed(tid):
 @admin_required
 def disqualify_trader(tid, trader):
     db = get_db()
-    entry = db.execute(
-        "SELECT * FROM tournament_entries WHERE tournament_id=? AND trader_name=?",
+    tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    entry = tourn and db.execute(
+        f"SELECT * FROM {tournament_schema(db, tourn)}.tournament_entries WHERE tournament_id=? AND trader_name=?",
         (tid, trader)
     ).fetchone()
     if not entry:
@@ -1167,62 +1583,15 @@ def disqualify_trader(tid, trader):
 
     data = request.get_json() or {}
     reason = data.get('reason', 'ADMIN_DISQUALIFIED')
-    now = datetime.utcnow().isoformat()
-
-    db.execute(
-        "UPDATE tournament_entries SET status='DISQUALIFIED', disqualified_at=?, disqualification_reason=? "
-        "WHERE tournament_id=? AND trader_name=?",
-        (now, reason, tid, trader)
-    )
+    disqualify_tournament_entry(db, tourn, trader, reason)
     db.commit()
+    invalidate_tournament_standings(tid)
 
     socketio.emit('tournament_disqualify', {
         'tournament_id': tid,
         'trader_name': trader,
         'reason': reason,
-    })
-    return jsonify({'success': True})
-
-
-# Also allow client-initiated DQ (VaR breach)
-@admin_bp.route('/api/tournament/<int:tid>/disqualify/<trader>', methods=['POST'])
-def self_disqualify_trader(tid, trader):
-    """Client-initiated DQ when VaR limit is breached."""
-    db = get_db()
-
-    # Validate tournament is active
-    tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
-    if not tourn or tourn['status'] != 'ACTIVE':
-        return jsonify({'success': False, 'error': 'Tournament not active'}), 400
-
-    entry = db.execute(
-        "SELECT * FROM tournament_entries WHERE tournament_id=? AND trader_name=?",
-        (tid, trader)
-    ).fetchone()
-    if not entry:
-        return jsonify({'success': False, 'error': 'Entry not found'}), 404
-    if entry['status'] == 'DISQUALIFIED':
-        return jsonify({'success': True})  # Already DQ'd
-
-    data = request.get_json() or {}
-    reason = data.get('reason', 'VAR_LIMIT_EXCEEDED')
-    # Only allow specific DQ reasons from client
-    if reason not in ('VAR_LIMIT_EXCEEDED', 'TOURNAMENT_ENDED'):
-        reason = 'VAR_LIMIT_EXCEEDED'
-    now = datetime.utcnow().isoformat()
-
-    db.execute(
-        "UPDATE tournament_entries SET status='DISQUALIFIED', disqualified_at=?, disqualification_reason=? "
-        "WHERE tournament_id=? AND trader_name=?",
-        (now, reason, tid, trader)
-    )
-    db.commit()
-
-    socketio.emit('tournament_disqualify', {
-        'tournament_id': tid,
-        'trader_name': trader,
-        'reason': reason,
-    })
+    }, to=tournament_room(tid))
     return jsonify({'success': True})
 
 
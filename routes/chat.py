@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 """Chat routes: conversations, messages, reactions, pins."""
 
+import html
 import json
 import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
 from flask import Blueprint, request, jsonify
 
-from app import get_db, socketio
+from app import (get_db, socketio, trader_room, conversation_room,
+                 add_traders_to_room, remove_traders_from_room,
+                 post_message, unpost_message, mark_conversation_read, MESSAGE_PREVIEW_CHARS,
+                 resolve_mentions, invalidate_mention_index, fts_query)
 from routes.admin import censor_text
 
 chat_bp = Blueprint('chat', __name__)
@@ -125,6 +134,8 @@ def add_conversation_members(conv_id):
                        (conv_id, m))
             added.append(m)
     db.commit()
+    invalidate_mention_index(conv_id)
+    add_traders_to_room(conversation_room(conv_id), added)
     return jsonify({'success': True, 'added': added, 'count': len(added)})
 
 
@@ -151,6 +162,8 @@ def remove_conversation_member(conv_id):
     db.execute("DELETE FROM conversation_members WHERE conversation_id=? AND trader_name=?",
                (conv_id, member_to_remove))
     db.commit()
+    invalidate_mention_index(conv_id)
+    remove_traders_from_room(conversation_room(conv_id), [member_to_remove])
     return jsonify({'success': True})
 
 
@@ -158,27 +171,30 @@ def remove_conversation_member(conv_id):
 # ---------------------------------------------------------------------------
 @chat_bp.route('/api/chat/conversations/<trader>', methods=['GET'])
 def get_conversations(trader):
+    """Inbox: one query over the denormalised summaries plus one batched member query."""
     db = get_db()
     rows = db.execute("""
-        SELECT c.id, c.name, c.type, c.team_id, c.avatar, cm.last_read,
-            (SELECT COUNT(*) FROM messages m WHERE m.conversation_id=c.id AND m.created_at > cm.last_read AND m.sender != ?) as unread,
-            (SELECT m.text FROM messages m WHERE m.conversation_id=c.id ORDER BY m.id DESC LIMIT 1) as last_msg,
-            (SELECT m.sender FROM messages m WHERE m.conversation_id=c.id ORDER BY m.id DESC LIMIT 1) as last_sender,
-            (SELECT m.created_at FROM messages m WHERE m.conversation_id=c.id ORDER BY m.id DESC LIMIT 1) as last_msg_time
-        FROM conversations c
-        JOIN conversation_members cm ON c.id=cm.conversation_id AND cm.trader_name=?
-        ORDER BY last_msg_time DESC NULLS LAST
-    """, (trader, trader)).fetchall()
+        SELECT c.id, c.name, c.type, c.team_id, c.avatar, cm.unread_count,
+               c.last_preview, c.last_sender, c.last_msg_time
+        FROM conversation_members cm JOIN conversations c ON c.id=cm.conversation_id
+        WHERE cm.trader_name=?
+        ORDER BY c.last_msg_time DESC NULLS LAST
+    """, (trader,)).fetchall()
+    members_by_conv = {}
+    for m in db.execute("""
+        SELECT cm.conversation_id, t.trader_name, t.display_name, t.photo_url, t.last_seen,
+               tm.name as team_name, tm.color as team_color
+        FROM conversation_members mine
+        JOIN conversation_members cm ON cm.conversation_id=mine.conversation_id
+        JOIN traders t ON cm.trader_name=t.trader_name
+        LEFT JOIN teams tm ON t.team_id=tm.id
+        WHERE mine.trader_name=? AND IFNULL(t.status, '') != 'DELETED'
+    """, (trader,)):
+        members_by_conv.setdefault(m['conversation_id'], []).append(m)
     convos = []
     for r in rows:
-        members = db.execute("""
-            SELECT t.trader_name, t.display_name, t.photo_url, t.last_seen, t.status,
-                   tm.name as team_name, tm.color as team_color
-            FROM conversation_members cm JOIN traders t ON cm.trader_name=t.trader_name
-            LEFT JOIN teams tm ON t.team_id=tm.id WHERE cm.conversation_id=?
-        """, (r['id'],)).fetchall()
-        # Filter out DELETED traders from member list
-        active_members = [m for m in members if m['status'] != 'DELETED']
+        # DELETED traders are filtered out above
+        active_members = members_by_conv.get(r['id'], [])
         # For DM conversations, skip entirely if the other party was deleted
         if r['type'] == 'dm':
             others = [m for m in active_members if m['trader_name'] != trader]
@@ -187,7 +203,7 @@ def get_conversations(trader):
         convos.append({
             'id': r['id'], 'name': r['name'], 'type': r['type'], 'team_id': r['team_id'],
             'avatar': r['avatar'] or '',
-            'unread': r['unread'] or 0, 'last_msg': r['last_msg'], 'last_sender': r['last_sender'],
+            'unread': r['unread_count'] or 0, 'last_msg': r['last_preview'], 'last_sender': r['last_sender'],
             'last_msg_time': r['last_msg_time'],
             'members': [{'trader_name': m['trader_name'], 'display_name': m['display_name'],
                          'photo_url': m['photo_url'] or '',
@@ -220,6 +236,7 @@ def create_conversation():
     for m in set(members + [creator]):
         db.execute("INSERT OR IGNORE INTO conversation_members (conversation_id, trader_name) VALUES (?, ?)", (conv_id, m))
     db.commit()
+    add_traders_to_room(conversation_room(conv_id), set(members + [creator]))
     return jsonify({'success': True, 'conversation_id': conv_id})
 
 @chat_bp.route('/api/chat/team-conversation/<trader>', methods=['POST'])
@@ -233,6 +250,8 @@ def ensure_team_conversation(trader):
     if existing:
         db.execute("INSERT OR IGNORE INTO conversation_members (conversation_id, trader_name) VALUES (?, ?)", (existing['id'], trader))
         db.commit()
+        invalidate_mention_index(existing['id'])
+        add_traders_to_room(conversation_room(existing['id']), [trader])
         return jsonify({'success': True, 'conversation_id': existing['id']})
     cur = db.execute("INSERT INTO conversations (name, type, team_id) VALUES (?, 'team', ?)", (team['name'], me['team_id']))
     conv_id = cur.lastrowid
@@ -240,54 +259,244 @@ def ensure_team_conversation(trader):
     for t in teammates:
         db.execute("INSERT OR IGNORE INTO conversation_members (conversation_id, trader_name) VALUES (?, ?)", (conv_id, t['trader_name']))
     db.commit()
+    add_traders_to_room(conversation_room(conv_id), [t['trader_name'] for t in teammates])
     return jsonify({'success': True, 'conversation_id': conv_id})
 
+MESSAGE_PAGE_MAX = 200
+
 @chat_bp.route('/api/chat/messages/<int:conv_id>', methods=['GET'])
 def get_messages(conv_id):
+    """One page of history, oldest first.
+
+    No cursor: the newest `limit` messages. `before_id`: the page just older than that id
+    (scrolling back). `after_id`: everything newer than that id (reconnect / new-message
+    sync). `has_more` says whether another page exists in the same direction. Sender
+    profiles come once per page in `senders`, minus any listed in `known_senders`.
+    """
     db = get_db()
     trader = request.args.get('trader', '')
-    member = db.execute("SELECT * FROM conversation_members WHERE conversation_id=? AND trader_name=?", (conv_id, trader)).fetchone()
+    member = db.execute("SELECT 1 FROM conversation_members WHERE conversation_id=? AND trader_name=?", (conv_id, trader)).fetchone()
     if not member:
         return jsonify({'success': False, 'error': 'Not a member'}), 403
-    limit = int(request.args.get('limit', 100))
-    rows = db.execute("""
-        SELECT m.*, t.display_name, t.photo_url, tm.name as team_name, tm.color as team_color
-        FROM messages m LEFT JOIN traders t ON m.sender=t.trader_name
-        LEFT JOIN teams tm ON t.team_id=tm.id
-        WHERE m.conversation_id=? ORDER BY m.id DESC LIMIT ?
-    """, (conv_id, limit)).fetchall()
-    db.execute("UPDATE conversation_members SET last_read=CURRENT_TIMESTAMP WHERE conversation_id=? AND trader_name=?", (conv_id, trader))
-    db.commit()
+    limit = max(1, min(request.args.get('limit', 100, type=int), MESSAGE_PAGE_MAX))
+    before_id = request.args.get('before_id', type=int)
+    after_id = request.args.get('after_id', type=int)
+    known_senders = set(filter(None, request.args.get('known_senders', '').split(',')))
+
+    # Seek on idx_messages_conv_id; fetch one extra row to learn whether there is more
+    if after_id is not None:
+        rows = db.execute("""
+            SELECT id, sender, text, image, edited_at, created_at FROM messages
+            WHERE conversation_id=? AND id>? ORDER BY id LIMIT ?
+        """, (conv_id, after_id, limit + 1)).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        rows = db.execute("""
+            SELECT id, sender, text, image, edited_at, created_at FROM messages
+            WHERE conversation_id=? AND id<? ORDER BY id DESC LIMIT ?
+        """, (conv_id, before_id if before_id is not None else 2 ** 63 - 1, limit + 1)).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+    if before_id is None:
+        mark_conversation_read(db, conv_id, trader)
+        db.commit()
 
-    # Fetch reactions and pins in batch for all returned messages
-    msg_ids = [r['id'] for r in rows]
+    # Reactions, pins and sender profiles for the page's id range
     reactions_map = {}
     pins_set = set()
-    if msg_ids:
-        placeholders = ','.join('?' * len(msg_ids))
-        react_rows = db.execute(f"""
-            SELECT message_id, emoji, GROUP_CONCAT(trader_name) as traders, COUNT(*) as count
-            FROM message_reactions WHERE message_id IN ({placeholders}) GROUP BY message_id, emoji
-        """, msg_ids).fetchall()
-        for rr in react_rows:
-            mid = rr['message_id']
-            if mid not in reactions_map:
-                reactions_map[mid] = []
-            reactions_map[mid].append({'emoji': rr['emoji'], 'traders': rr['traders'].split(','), 'count': rr['count']})
-        pin_rows = db.execute(f"SELECT message_id FROM pinned_messages WHERE conversation_id=? AND message_id IN ({placeholders})",
-                              [conv_id] + msg_ids).fetchall()
-        pins_set = {pr['message_id'] for pr in pin_rows}
-
-    return jsonify({'success': True, 'messages': [{
-        'id': r['id'], 'sender': r['sender'], 'display_name': r['display_name'] or r['sender'],
-        'photo_url': (r['photo_url'] or '') if r['display_name'] else '',
-        'team_name': r['team_name'] or '', 'team_color': r['team_color'] or '#888',
-        'text': r['text'], 'image': r['image'] if 'image' in r.keys() else '',
-        'edited_at': r['edited_at'] if 'edited_at' in r.keys() else '',
+    senders = {}
+    if rows:
+        lo, hi = rows[0]['id'], rows[-1]['id']
+        for rr in db.execute("""
+            SELECT r.message_id, r.emoji, GROUP_CONCAT(r.trader_name) as traders, COUNT(*) as count
+            FROM messages m JOIN message_reactions r ON r.message_id=m.id
+            WHERE m.conversation_id=? AND m.id BETWEEN ? AND ?
+            GROUP BY r.message_id, r.emoji
+        """, (conv_id, lo, hi)):
+            reactions_map.setdefault(rr['message_id'], []).append(
+                {'emoji': rr['emoji'], 'traders': rr['traders'].split(','), 'count': rr['count']})
+        pins_set = {pr['message_id'] for pr in db.execute(
+            "SELECT message_id FROM pinned_messages WHERE conversation_id=? AND message_id BETWEEN ? AND ?",
+            (conv_id, lo, hi))}
+        wanted = {r['sender'] for r in rows} - known_senders
+        if wanted:
+            for name in wanted:
+                senders[name] = {'display_name': name, 'photo_url': '', 'team_name': '', 'team_color': '#888'}
+            placeholders = ','.join('?' * len(wanted))
+            for t in db.execute(f"""
+                SELECT t.trader_name, t.display_name, t.photo_url, tm.name as team_name, tm.color as team_color
+                FROM traders t LEFT JOIN teams tm ON t.team_id=tm.id
+                WHERE t.trader_name IN ({placeholders})
+            """, list(wanted)):
+                senders[t['trader_name']] = {
+                    'display_name': t['display_name'] or t['trader_name'],
+                    'photo_url': (t['photo_url'] or '') if t['display_name'] else '',
+                    'team_name': t['team_name'] or '', 'team_color': t['team_color'] or '#888'}
+
+    return jsonify({'success': True, 'has_more': has_more, 'senders': senders, 'messages': [{
+        'id': r['id'], 'sender': r['sender'],
+        'text': r['text'], 'image': r['image'] or '',
+        'edited_at': r['edited_at'] or '',
         'created_at': r['created_at'],
         'reactions': reactions_map.get(r['id'], []),
         'pinned': r['id'] in pins_set
-    } for r in reversed(rows)]})
+    } for r in rows]})
+
+# ---------------------------------------------------------------------------
+# Chat Search
+# ---------------------------------------------------------------------------
+# bm25 scores use whole-index statistics, so re-running a query for page 2 can reorder
+# it as messages arrive. The first page ranks up to SEARCH_RANK_MAX matches once and
+# keeps the id list on this worker; next_cursor points into that list. REST calls must
+# stick to one worker (the load balancer's sticky sessions already do this).
+SEARCH_PAGE_MAX = 50
+SEARCH_RANK_MAX = 500        # matches one search can page through
+SEARCH_CURSOR_TTL = 600      # seconds a ranking is kept after its last page
+SEARCH_CURSORS_MAX = 256     # rankings kept per worker, least recently used dropped
+_SNIPPET_OPEN, _SNIPPET_CLOSE = '\x02', '\x03'
+_search_rankings = OrderedDict()     # token -> (last used, (trader, q, conversation_id), ids)
+_search_lock = threading.Lock()
+
+def _snippet_html(snippet):
+    """Escape a snippet and turn the match sentinels into <mark> tags."""
+    return html.escape(snippet).replace(_SNIPPET_OPEN, '<mark>').replace(_SNIPPET_CLOSE, '</mark>')
+
+def _like_snippet(text, q, width=60):
+    pos = text.lower().find(q.lower())
+    if pos < 0:
+        return text[:2 * width]
+    start = max(0, pos - width)
+    end = pos + len(q)
+    return (('…' if start else '') + text[start:pos] + _SNIPPET_OPEN + text[pos:end] + _SNIPPET_CLOSE
+            + text[end:end + width] + ('…' if end + width < len(text) else ''))
+
+def _rank_search(db, trader, q, conv_id):
+    """Ids of the trader's messages matching q, best first, and whether FTS5 ranked them."""
+    conv_filter = "AND m.conversation_id=?" if conv_id is not None else ""
+    conv_args = (conv_id,) if conv_id is not None else ()
+    try:
+        rows = db.execute(f"""
+            SELECT id FROM (
+                SELECT m.id, bm25(messages_fts) AS score
+                FROM messages_fts
+                JOIN messages m ON m.id = messages_fts.rowid
+                JOIN conversation_members cm ON cm.conversation_id = m.conversation_id AND cm.trader_name = ?
+                WHERE messages_fts MATCH ? {conv_filter}
+            )
+            ORDER BY score, id DESC
+            LIMIT ?
+        """, (trader, fts_query(q)) + conv_args + (SEARCH_RANK_MAX,)).fetchall()
+        return [r['id'] for r in rows], True
+    except sqlite3.OperationalError:
+        # No FTS5 in this SQLite build — plain substring match, newest first
+        rows = db.execute(f"""
+            SELECT m.id FROM messages m
+            JOIN conversation_members cm ON cm.conversation_id = m.conversation_id AND cm.trader_name = ?
+            WHERE m.text LIKE ? {conv_filter}
+            ORDER BY m.id DESC
+            LIMIT ?
+        """, (trader, f"%{q}%") + conv_args + (SEARCH_RANK_MAX,)).fetchall()
+        return [r['id'] for r in rows], False
+
+def _search_rows(db, trader, q, ids, fts):
+    """Result rows with snippets for ids, in the order given (ids the trader lost access to are dropped)."""
+    marks = ','.join('?' * len(ids))
+    if fts:
+        rows = db.execute(f"""
+            SELECT m.id, m.conversation_id, m.sender, m.created_at,
+                   snippet(messages_fts, 0, ?, ?, '…', 16) AS snippet
+            FROM messages_fts
+            JOIN messages m ON m.id = messages_fts.rowid
+            JOIN conversation_members cm ON cm.conversation_id = m.conversation_id AND cm.trader_name = ?
+            WHERE messages_fts MATCH ? AND messages_fts.rowid IN ({marks})
+        """, (_SNIPPET_OPEN, _SNIPPET_CLOSE, trader, fts_query(q)) + tuple(ids)).fetchall()
+        by_id = {r['id']: dict(r) for r in rows}
+    else:
+        rows = db.execute(f"""
+            SELECT m.id, m.conversation_id, m.sender, m.created_at, m.text
+            FROM messages m
+            JOIN conversation_members cm ON cm.conversation_id = m.conversation_id AND cm.trader_name = ?
+            WHERE m.id IN ({marks})
+        """, (trader,) + tuple(ids)).fetchall()
+        by_id = {r['id']: dict(r, snippet=_like_snippet(r['text'], q)) for r in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+@chat_bp.route('/api/chat/search', methods=['GET'])
+def search_messages():
+    """Search message history across the conversations the trader belongs to.
+
+    Query params: trader, q (required), conversation_id (optional), limit, cursor.
+    Results are best match first (bm25), newest first on ties; pass back `next_cursor`
+    with the same trader, q and conversation_id for the following page. Pages come from
+    the ranking made for the first one, so they never skip or repeat a result; only the
+    first SEARCH_RANK_MAX matches can be paged through. An expired cursor is a 410.
+    """
+    trader = request.args.get('trader', '')
+    q = request.args.get('q', '').strip()
+    if not trader or not q:
+        return jsonify({'success': False, 'error': 'trader and q are required'}), 400
+    conv_id = request.args.get('conversation_id', type=int)
+    limit = max(1, min(request.args.get('limit', 20, type=int), SEARCH_PAGE_MAX))
+    search = (trader, q, conv_id)
+    db = get_db()
+    # Cursor "<token>:<offset>": the ranking kept for the first page, and the results already returned
+    cursor = request.args.get('cursor', '')
+    now = time.time()
+    if cursor:
+        token, _, offset_s = cursor.partition(':')
+        try:
+            offset = int(offset_s)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        with _search_lock:
+            ranking = _search_rankings.get(token)
+            if ranking and now - ranking[0] > SEARCH_CURSOR_TTL:
+                del _search_rankings[token]
+                ranking = None
+            if ranking:
+                _search_rankings[token] = (now,) + ranking[1:]
+                _search_rankings.move_to_end(token)
+        if not ranking:
+            return jsonify({'success': False, 'error': 'Search expired, run it again'}), 410
+        if ranking[1] != search or offset < 0:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        ids, fts = ranking[2]
+    else:
+        token, offset = None, 0
+        ids, fts = _rank_search(db, trader, q, conv_id)
+
+    page_ids = ids[offset:offset + limit]
+    results = _search_rows(db, trader, q, page_ids, fts) if page_ids else []
+    next_cursor = None
+    if offset + limit < len(ids):
+        if token is None:
+            token = secrets.token_urlsafe(12)
+            with _search_lock:
+                _search_rankings[token] = (now, search, (ids, fts))
+                while len(_search_rankings) > SEARCH_CURSORS_MAX:
+                    _search_rankings.popitem(last=False)
+        next_cursor = f"{token}:{offset + limit}"
+
+    # Conversation and sender labels for the page in two lookups
+    conv_ids = {r['conversation_id'] for r in results}
+    senders = {r['sender'] for r in results}
+    convs, names = {}, {}
+    if conv_ids:
+        convs = {c['id']: c for c in db.execute(
+            f"SELECT id, name, type FROM conversations WHERE id IN ({','.join('?' * len(conv_ids))})",
+            list(conv_ids))}
+        names = {t['trader_name']: t['display_name'] for t in db.execute(
+            f"SELECT trader_name, display_name FROM traders WHERE trader_name IN ({','.join('?' * len(senders))})",
+            list(senders))}
+    return jsonify({'success': True, 'next_cursor': next_cursor, 'results': [{
+        'id': r['id'], 'conversation_id': r['conversation_id'],
+        'conversation_name': convs[r['conversation_id']]['name'] if r['conversation_id'] in convs else '',
+        'conversation_type': convs[r['conversation_id']]['type'] if r['conversation_id'] in convs else '',
+        'sender': r['sender'], 'display_name': names.get(r['sender']) or r['sender'],
+        'created_at': r['created_at'],
+        'snippet_html': _snippet_html(r['snippet']),
+    } for r in results]})
 
 @chat_bp.route('/api/chat/send/<int:conv_id>', methods=['POST'])
 def send_message(conv_id):
@@ -315,10 +524,7 @@ def send_message(conv_id):
         return jsonify({'success': False, 'error': 'This is a read-only broadcast channel'}), 403
     # Apply word filter
     text = censor_text(text)
-    cur = db.execute("INSERT INTO messages (conversation_id, sender, text, image) VALUES (?, ?, ?, ?)", (conv_id, sender, text, image or ''))
-    db.commit()
-    msg_id = cur.lastrowid
-    db.execute("UPDATE conversation_members SET last_read=CURRENT_TIMESTAMP WHERE conversation_id=? AND trader_name=?", (conv_id, sender))
+    msg_id = post_message(db, conv_id, sender, text, image)
     db.commit()
     sender_info = db.execute("""
         SELECT t.display_name, tm.name as team_name, tm.color as team_color
@@ -330,31 +536,17 @@ def send_message(conv_id):
         'team_name': sender_info['team_name'] if sender_info else '',
         'team_color': sender_info['team_color'] if sender_info else '#888',
         'text': text, 'created_at': datetime.utcnow().isoformat()
-    })
-
-    # Detect @mentions and emit notifications
-    import re as _re
-    mentions = _re.findall(r'@(\w[\w\s]*?)(?=\s|$|[.,!?])', text)
-    if mentions:
-        # Get all conversation members to match display names
-        members = db.execute("""
-            SELECT t.trader_name, t.display_name FROM conversation_members cm
-            JOIN traders t ON cm.trader_name=t.trader_name
-            WHERE cm.conversation_id=?
-        """, (conv_id,)).fetchall()
-        sender_display = sender_info['display_name'] if sender_info else sender
-        for mention in mentions:
-            mention_lower = mention.strip().lower()
-            for member in members:
-                if (member['display_name'].lower().startswith(mention_lower) or
-                    member['trader_name'].lower() == mention_lower):
-                    if member['trader_name'] != sender:
-                        socketio.emit('mention_notification', {
-                            'mentioned_trader': member['trader_name'],
-                            'sender_display': sender_display,
-                            'conversation_id': conv_id,
-                            'text_preview': text[:100]
-                        })
+    }, to=conversation_room(conv_id))
+
+    # Detect @mentions and notify each mentioned member once, in their own room
+    sender_display = sender_info['display_name'] if sender_info else sender
+    for mentioned in resolve_mentions(db, conv_id, text) - {sender}:
+        socketio.emit('mention_notification', {
+            'mentioned_trader': mentioned,
+            'sender_display': sender_display,
+            'conversation_id': conv_id,
+            'text_preview': text[:100]
+        }, to=trader_room(mentioned))
 
     return jsonify({'success': True, 'message_id': msg_id})
 
@@ -374,9 +566,10 @@ def delete_message(message_id):
     # Delete related reactions and pins first
     db.execute("DELETE FROM message_reactions WHERE message_id=?", (message_id,))
     db.execute("DELETE FROM pinned_messages WHERE message_id=?", (message_id,))
-    db.execute("DELETE FROM messages WHERE id=?", (message_id,))
+    unpost_message(db, msg)
     db.commit()
-    socketio.emit('message_deleted', {'conversation_id': conv_id, 'message_id': message_id})
+    socketio.emit('message_deleted', {'conversation_id': conv_id, 'message_id': message_id},
+                  to=conversation_room(conv_id))
     return jsonify({'success': True})
 
 
@@ -399,19 +592,21 @@ def edit_message(message_id):
         return jsonify({'success': False, 'error': 'You can only edit your own messages'}), 403
     new_text = censor_text(new_text)
     db.execute("UPDATE messages SET text=?, edited_at=CURRENT_TIMESTAMP WHERE id=?", (new_text, message_id))
+    db.execute("UPDATE conversations SET last_preview=? WHERE id=? AND last_message_id=?",
+               (new_text[:MESSAGE_PREVIEW_CHARS], msg['conversation_id'], message_id))
     db.commit()
     conv_id = msg['conversation_id']
     socketio.emit('message_edited', {
         'conversation_id': conv_id, 'message_id': message_id,
         'text': new_text, 'edited_at': datetime.utcnow().isoformat()
-    })
+    }, to=conversation_room(conv_id))
     return jsonify({'success': True})
 
 
 @chat_bp.route('/api/chat/mark-read/<int:conv_id>/<trader>', methods=['POST'])
 def mark_read(conv_id, trader):
     db = get_db()
-    db.execute("UPDATE conversation_members SET last_read=CURRENT_TIMESTAMP WHERE conversation_id=? AND trader_name=?", (conv_id, trader))
+    mark_conversation_read(db, conv_id, trader)
     db.commit()
     return jsonify({'success': True})
 
@@ -459,8 +654,11 @@ def toggle_reaction(message_id):
         FROM message_reactions WHERE message_id=? GROUP BY emoji
     """, (message_id,)).fetchall()
     reactions = [{'emoji': r['emoji'], 'traders': r['traders'].split(','), 'count': r['count']} for r in rows]
-    # Broadcast reaction update
-    socketio.emit('reaction_update', {'message_id': message_id, 'reactions': reactions})
+    # Notify the message's conversation
+    msg = db.execute("SELECT conversation_id FROM messages WHERE id=?", (message_id,)).fetchone()
+    if msg:
+        socketio.emit('reaction_update', {'message_id': message_id, 'reactions': reactions},
+                      to=conversation_room(msg['conversation_id']))
     return jsonify({'success': True, 'action': action, 'reactions': reactions})
 
 
@@ -531,7 +729,8 @@ def pin_message(conv_id, message_id):
     if existing:
         db.execute("DELETE FROM pinned_messages WHERE id=?", (existing['id'],))
         db.commit()
-        socketio.emit('pin_update', {'conversation_id': conv_id, 'message_id': message_id, 'action': 'unpinned'})
+        socketio.emit('pin_update', {'conversation_id': conv_id, 'message_id': message_id, 'action': 'unpinned'},
+                      to=conversation_room(conv_id))
         return jsonify({'success': True, 'action': 'unpinned'})
     else:
         # Limit to 25 pins per conversation
@@ -541,7 +740,8 @@ def pin_message(conv_id, message_id):
         db.execute("INSERT INTO pinned_messages (conversation_id, message_id, pinned_by) VALUES (?, ?, ?)",
                    (conv_id, message_id, trader))
         db.commit()
-        socketio.emit('pin_update', {'conversation_id': conv_id, 'message_id': message_id, 'action': 'pinned'})
+        socketio.emit('pin_update', {'conversation_id': conv_id, 'message_id': message_id, 'action': 'pinned'},
+                      to=conversation_room(conv_id))
         return jsonify({'success': True, 'action': 'pinned'})
 
 
@@ -573,13 +773,15 @@ def message_admin():
                           (convo_id, sender)).fetchone()
     if not existing:
         db.execute("INSERT INTO conversation_members (conversation_id, trader_name) VALUES (?, ?)", (convo_id, sender))
+        invalidate_mention_index(convo_id)
+        add_traders_to_room(conversation_room(convo_id), [sender])
     # Build message text
     display = trader['display_name'] or sender
     msg_text = f"[From {display}] "
     if subject:
         msg_text += f"{subject}: "
     msg_text += body
-    db.execute("INSERT INTO messages (conversation_id, sender, text) VALUES (?, ?, ?)", (convo_id, sender, msg_text))
+    post_message(db, convo_id, sender, msg_text)
     db.commit()
     # Also store as an admin broadcast record so admin panel can see it
     try:
@@ -1,24 +1,27 @@
 #!/usr/bin/env python3
-"""Market data routes: news proxy, EIA, COT, market hours, trade feed."""
+"""Market data routes: news store/search, EIA, COT, market hours, trade feed."""
 
 import re
 import time
 import json
+import sqlite3
+import hashlib
 import logging
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
 from threading import Lock
 
 import requests
 import feedparser
 from flask import Blueprint, request, jsonify
 
-from app import (get_db, logger, news_cache, news_cache_lock, NEWS_CACHE_TTL,
-                 eia_cache, eia_cache_lock, EIA_CACHE_TTL, EIA_API_KEY)
+from app import (get_db, get_db_standalone, logger, socketio, background_job, claim_lease,
+                 news_cache, news_cache_lock, NEWS_CACHE_TTL,
+                 eia_cache, eia_cache_lock, EIA_CACHE_TTL, EIA_API_KEY, fts_query)
 
 market_bp = Blueprint('market', __name__)
 
 # ---------------------------------------------------------------------------
-# News Proxy
+# News Store
 # ---------------------------------------------------------------------------
 def _strip_html(text):
     """Strip all HTML tags, decode entities, collapse whitespace."""
@@ -37,165 +40,315 @@ def _strip_html(text):
     return clean
 
 
+# Per-commodity RSS feeds and keyword filters
+NEWS_FEEDS = {
+    'ng': {
+        'feeds': [
+            ('https://oilprice.com/rss/main', 'OilPrice'),
+            ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
+        ],
+        'keywords': ['natural gas', 'storage', 'henry hub', 'pipeline', 'gas storage',
+                     'gas export', 'gas demand', 'gas production', 'gas price', 'mcf', 'bcf',
+                     'marcellus', 'permian gas', 'freeport', 'sabine', 'cheniere',
+                     'nymex gas', 'gas futures', 'heating degree', 'gas rig']
+    },
+    'lng': {
+        'feeds': [
+            ('https://www.naturalgasintel.com/feed/', 'NGI'),
+            ('https://oilprice.com/rss/main', 'OilPrice'),
+            ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
+            ('https://gcaptain.com/feed/', 'gCaptain'),
+        ],
+        'keywords': ['lng', 'liquefied natural gas', 'liquefaction', 'regasification',
+                     'lng export', 'lng import', 'lng terminal', 'lng carrier',
+                     'lng tanker', 'lng cargo', 'lng spot', 'freeport lng',
+                     'sabine pass', 'cheniere', 'cameron lng', 'golden pass',
+                     'plaquemines', 'venture global', 'next decade',
+                     'jktc', 'ttf', 'des', 'fob lng', 'lng train',
+                     'qatar lng', 'australia lng', 'mozambique lng',
+                     'lng demand', 'lng supply', 'floating lng', 'flng',
+                     'lng vessel', 'lng shipping', 'lng bunkering']
+    },
+    'ngls': {
+        'feeds': [
+            ('https://www.naturalgasintel.com/feed/', 'NGI'),
+            ('https://oilprice.com/rss/main', 'OilPrice'),
+            ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
+        ],
+        'keywords': ['ngl', 'natural gas liquid', 'ethane', 'propane', 'butane',
+                     'isobutane', 'natural gasoline', 'y-grade', 'mont belvieu',
+                     'conway', 'fractionat', 'ngl pipeline', 'ngl export',
+                     'purity product', 'ngl supply', 'ngl demand',
+                     'petrochemical', 'cracker', 'ethylene', 'propylene',
+                     'ngl price', 'ngl spread', 'frac spread',
+                     'enterprise product', 'targa', 'oneok', 'dcp midstream',
+                     'ngl barrel', 'gas processing', 'ngl recovery',
+                     'midstream', 'gas plant', 'ngl storage']
+    },
+    'crude': {
+        'feeds': [
+            ('https://oilprice.com/rss/main', 'OilPrice'),
+            ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
+        ],
+        'keywords': ['crude', 'oil', 'opec', 'barrel', 'wti', 'brent', 'petroleum',
+                     'refinery', 'gasoline', 'diesel', 'cushing', 'bakken', 'shale',
+                     'oil price', 'oil production', 'oil demand', 'drilling', 'rig count']
+    },
+    'power': {
+        'feeds': [
+            ('https://www.utilitydive.com/feeds/news/', 'UtilityDive'),
+            ('https://oilprice.com/rss/main', 'OilPrice'),
+        ],
+        'keywords': ['power', 'electric', 'grid', 'renewable', 'ercot', 'pjm', 'solar',
+                     'wind', 'utility', 'generation', 'caiso', 'nuclear', 'battery',
+                     'capacity', 'megawatt', 'blackout', 'transmission', 'energy storage',
+                     'power plant', 'coal plant', 'gas plant', 'grid operator',
+                     'wholesale power', 'electricity price', 'load forecast',
+                     'demand response', 'interconnect', 'ferc']
+    },
+    'freight': {
+        'feeds': [
+            ('https://gcaptain.com/feed/', 'gCaptain'),
+            ('https://www.hellenicshippingnews.com/feed/', 'Hellenic Shipping'),
+        ],
+        'keywords': ['shipping', 'freight', 'tanker', 'baltic', 'vessel', 'vlcc', 'cargo',
+                     'maritime', 'bulk', 'container', 'charter', 'tonnage', 'port',
+                     'suezmax', 'panamax', 'capesize', 'lng carrier', 'dry bulk']
+    },
+    'ag': {
+        'feeds': [
+            ('https://www.agweb.com/rss/news', 'AgWeb'),
+            ('https://www.feedstuffs.com/rss.xml', 'Feedstuffs'),
+        ],
+        'keywords': ['corn', 'soybean', 'wheat', 'grain', 'crop', 'usda', 'cattle',
+                     'hog', 'livestock', 'cotton', 'sugar', 'coffee', 'cocoa', 'harvest',
+                     'planting', 'drought', 'yield', 'agriculture', 'farm', 'ethanol']
+    },
+    'metals': {
+        'feeds': [
+            ('https://news.goldseek.com/newsRSS.xml', 'GoldSeek'),
+            ('https://www.mining.com/feed/', 'Mining.com'),
+            ('https://www.northernminer.com/feed/', 'Northern Miner'),
+            ('https://www.canadianminingjournal.com/feed/', 'CMJ'),
+        ],
+        'keywords': ['gold', 'silver', 'copper', 'platinum', 'palladium', 'aluminum',
+                     'aluminium', 'nickel', 'iron ore', 'steel', 'zinc', 'metal',
+                     'mining', 'bullion', 'comex', 'lme', 'precious', 'base metal',
+                     'ore', 'cobalt', 'lithium', 'tin', 'lead', 'manganese',
+                     'smelter', 'refining', 'scrap metal', 'gold price',
+                     'copper price', 'silver price', 'metal market']
+    }
+}
+
+NEWS_MAX_ARTICLES = 15           # articles returned per commodity
+NEWS_RETENTION_DAYS = 90         # stored articles older than this are pruned
+NEWS_FEED_AGENT = 'Mozilla/5.0 (compatible; EnergyTradingTerminal/1.0)'
+
+
+def _parse_published(entry):
+    """Return an entry's publish time as a naive UTC 'YYYY-MM-DD HH:MM:SS' string."""
+    pub = entry.get('published', entry.get('updated', ''))
+    try:
+        from email.utils import parsedate_to_datetime
+        dt = parsedate_to_datetime(pub)
+        if dt.tzinfo:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt.strftime('%Y-%m-%d %H:%M:%S')
+    except Exception:
+        return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _time_label(published_at):
+    """Relative age label ('5m ago', '3h ago', '2d ago') for a stored timestamp."""
+    try:
+        age = datetime.utcnow() - datetime.strptime(published_at, '%Y-%m-%d %H:%M:%S')
+        hrs = int(age.total_seconds() / 3600)
+        if hrs < 1:
+            return f"{max(0, int(age.total_seconds() / 60))}m ago"
+        if hrs < 24:
+            return f"{hrs}h ago"
+        return f"{hrs // 24}d ago"
+    except Exception:
+        return (published_at or '')[:16]
+
+
+def ingest_news():
+    """Fetch every configured feed once and upsert keyword-matched articles into the store.
+
+    Feeds shared between commodities are only fetched once per cycle. Returns the
+    number of new articles stored.
+    """
+    feed_targets = {}
+    for commodity, config in NEWS_FEEDS.items():
+        for feed_url, source_name in config['feeds']:
+            feed_targets.setdefault((feed_url, source_name), []).append(commodity)
+
+    conn = get_db_standalone()
+    added = 0
+    try:
+        for (feed_url, source_name), commodities in feed_targets.items():
+            try:
+                feed = feedparser.parse(feed_url, agent=NEWS_FEED_AGENT)
+            except Exception as e:
+                logger.warning(f"RSS fetch failed for {source_name}: {e}")
+                continue
+            for entry in feed.entries[:30]:
+                headline = _strip_html(entry.get('title', ''))
+                if not headline:
+                    continue
+                description = _strip_html(entry.get('summary', ''))
+                combined = headline.lower() + ' ' + description.lower()
+                tags = [c for c in commodities
+                        if any(kw in combined for kw in NEWS_FEEDS[c]['keywords'])]
+                if not tags:
+                    continue
+                # Deduplicate by headline, same as the old per-request proxy
+                guid = hashlib.sha1(headline.lower().encode('utf-8')).hexdigest()
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO news_articles "
+                    "(guid, source, headline, description, url, published_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (guid, source_name, headline, description[:200],
+                     entry.get('link', ''), _parse_published(entry)))
+                added += cur.rowcount
+                conn.executemany(
+                    "INSERT OR IGNORE INTO news_article_tags (article_id, commodity) "
+                    "SELECT id, ? FROM news_articles WHERE guid = ?",
+                    [(c, guid) for c in tags])
+            conn.commit()
+
+        cutoff = (datetime.utcnow() - timedelta(days=NEWS_RETENTION_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+        conn.execute("DELETE FROM news_article_tags WHERE article_id IN "
+                     "(SELECT id FROM news_articles WHERE published_at < ?)", (cutoff,))
+        conn.execute("DELETE FROM news_articles WHERE published_at < ?", (cutoff,))
+        conn.commit()
+    finally:
+        conn.close()
+
+    with news_cache_lock:
+        news_cache.clear()
+    return added
+
+
+@background_job
+def _news_ingest_loop():
+    """Keep the news store fresh so request handlers never call upstream feeds."""
+    while True:
+        try:
+            # One worker ingests per cycle; the lease outlives the sleep so the holder keeps it
+            if claim_lease('news_ingest', NEWS_CACHE_TTL + 60):
+                added = ingest_news()
+                logger.info(f"News ingest complete: {added} new articles")
+        except Exception as e:
+            logger.warning(f"News ingest failed: {e}")
+        socketio.sleep(NEWS_CACHE_TTL)
+
+
+def _article_row(row):
+    return {
+        'source': row['source'],
+        'headline': row['headline'],
+        'description': row['description'] or '',
+        'time': _time_label(row['published_at']),
+        'url': row['url'] or '',
+    }
+
+
 @market_bp.route('/api/news/<commodity>')
 def get_news(commodity):
+    """Latest stored articles for a commodity (populated by the background ingester)."""
+    if commodity not in NEWS_FEEDS:
+        commodity = 'crude'
     with news_cache_lock:
         cached = news_cache.get(commodity)
         if cached and time.time() - cached['ts'] < NEWS_CACHE_TTL:
             return jsonify({'success': True, 'articles': cached['data']})
 
-    # Per-commodity RSS feeds and keyword filters
-    feed_config = {
-        'ng': {
-            'feeds': [
-                ('https://oilprice.com/rss/main', 'OilPrice'),
-                ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
-            ],
-            'keywords': ['natural gas', 'storage', 'henry hub', 'pipeline', 'gas storage',
-                         'gas export', 'gas demand', 'gas production', 'gas price', 'mcf', 'bcf',
-                         'marcellus', 'permian gas', 'freeport', 'sabine', 'cheniere',
-                         'nymex gas', 'gas futures', 'heating degree', 'gas rig']
-        },
-        'lng': {
-            'feeds': [
-                ('https://www.naturalgasintel.com/feed/', 'NGI'),
-                ('https://oilprice.com/rss/main', 'OilPrice'),
-                ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
-                ('https://gcaptain.com/feed/', 'gCaptain'),
-            ],
-            'keywords': ['lng', 'liquefied natural gas', 'liquefaction', 'regasification',
-                         'lng export', 'lng import', 'lng terminal', 'lng carrier',
-                         'lng tanker', 'lng cargo', 'lng spot', 'freeport lng',
-                         'sabine pass', 'cheniere', 'cameron lng', 'golden pass',
-                         'plaquemines', 'venture global', 'next decade',
-                         'jktc', 'ttf', 'des', 'fob lng', 'lng train',
-                         'qatar lng', 'australia lng', 'mozambique lng',
-                         'lng demand', 'lng supply', 'floating lng', 'flng',
-                         'lng vessel', 'lng shipping', 'lng bunkering']
-        },
-        'ngls': {
-            'feeds': [
-                ('https://www.naturalgasintel.com/feed/', 'NGI'),
-                ('https://oilprice.com/rss/main', 'OilPrice'),
-                ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
-            ],
-            'keywords': ['ngl', 'natural gas liquid', 'ethane', 'propane', 'butane',
-                         'isobutane', 'natural gasoline', 'y-grade', 'mont belvieu',
-                         'conway', 'fractionat', 'ngl pipeline', 'ngl export',
-                         'purity product', 'ngl supply', 'ngl demand',
-                         'petrochemical', 'cracker', 'ethylene', 'propylene',
-                         'ngl price', 'ngl spread', 'frac spread',
-                         'enterprise product', 'targa', 'oneok', 'dcp midstream',
-                         'ngl barrel', 'gas processing', 'ngl recovery',
-                         'midstream', 'gas plant', 'ngl storage']
-        },
-        'crude': {
-            'feeds': [
-                ('https://oilprice.com/rss/main', 'OilPrice'),
-                ('https://www.rigzone.com/news/rss/rigzone_latest.aspx', 'Rigzone'),
-            ],
-            'keywords': ['crude', 'oil', 'opec', 'barrel', 'wti', 'brent', 'petroleum',
-                         'refinery', 'gasoline', 'diesel', 'cushing', 'bakken', 'shale',
-                         'oil price', 'oil production', 'oil demand', 'drilling', 'rig count']
-        },
-        'power': {
-            'feeds': [
-                ('https://www.utilitydive.com/feeds/news/', 'UtilityDive'),
-                ('https://oilprice.com/rss/main', 'OilPrice'),
-            ],
-            'keywords': ['power', 'electric', 'grid', 'renewable', 'ercot', 'pjm', 'solar',
-                         'wind', 'utility', 'generation', 'caiso', 'nuclear', 'battery',
-                         'capacity', 'megawatt', 'blackout', 'transmission', 'energy storage',
-                         'power plant', 'coal plant', 'gas plant', 'grid operator',
-                         'wholesale power', 'electricity price', 'load forecast',
-                         'demand response', 'interconnect', 'ferc']
-        },
-        'freight': {
-            'feeds': [
-                ('https://gcaptain.com/feed/', 'gCaptain'),
-                ('https://www.hellenicshippingnews.com/feed/', 'Hellenic Shipping'),
-            ],
-            'keywords': ['shipping', 'freight', 'tanker', 'baltic', 'vessel', 'vlcc', 'cargo',
-                         'maritime', 'bulk', 'container', 'charter', 'tonnage', 'port',
-                         'suezmax', 'panamax', 'capesize', 'lng carrier', 'dry bulk']
-        },
-        'ag': {
-            'feeds': [
-                ('https://www.agweb.com/rss/news', 'AgWeb'),
-                ('https://www.feedstuffs.com/rss.xml', 'Feedstuffs'),
-            ],
-            'keywords': ['corn', 'soybean', 'wheat', 'grain', 'crop', 'usda', 'cattle',
-                         'hog', 'livestock', 'cotton', 'sugar', 'coffee', 'cocoa', 'harvest',
-                         'planting', 'drought', 'yield', 'agriculture', 'farm', 'ethanol']
-        },
-        'metals': {
-            'feeds': [
-                ('https://news.goldseek.com/newsRSS.xml', 'GoldSeek'),
-                ('https://www.mining.com/feed/', 'Mining.com'),
-                ('https://www.northernminer.com/feed/', 'Northern Miner'),
-                ('https://www.canadianminingjournal.com/feed/', 'CMJ'),
-            ],
-            'keywords': ['gold', 'silver', 'copper', 'platinum', 'palladium', 'aluminum',
-                         'aluminium', 'nickel', 'iron ore', 'steel', 'zinc', 'metal',
-                         'mining', 'bullion', 'comex', 'lme', 'precious', 'base metal',
-                         'ore', 'cobalt', 'lithium', 'tin', 'lead', 'manganese',
-                         'smelter', 'refining', 'scrap metal', 'gold price',
-                         'copper price', 'silver price', 'metal market']
-        }
-    }
-
-    config = feed_config.get(commodity, feed_config.get('crude'))
-    articles = []
-
-    for feed_url, source_name in config['feeds']:
-        try:
-            feed = feedparser.parse(feed_url, agent='Mozilla/5.0 (compatible; EnergyTradingTerminal/1.0)')
-            for entry in feed.entries[:30]:
-                raw_title = entry.get('title', '')
-                raw_summary = entry.get('summary', '')
-                # Strip HTML for keyword matching
-                clean_title = _strip_html(raw_title).lower()
-                clean_summary = _strip_html(raw_summary).lower()
-                combined = clean_title + ' ' + clean_summary
-                # Deduplicate by headline
-                headline_text = _strip_html(raw_title)
-                if any(a['headline'] == headline_text for a in articles):
-                    continue
-                if any(kw in combined for kw in config['keywords']):
-                    # Parse time
-                    pub = entry.get('published', entry.get('updated', ''))
-                    try:
-                        from email.utils import parsedate_to_datetime
-                        dt = parsedate_to_datetime(pub)
-                        age = datetime.now(dt.tzinfo) - dt if dt.tzinfo else datetime.utcnow() - dt
-                        hrs = int(age.total_seconds() / 3600)
-                        if hrs < 1:
-                            time_label = f"{int(age.total_seconds()/60)}m ago"
-                        elif hrs < 24:
-                            time_label = f"{hrs}h ago"
-                        else:
-                            time_label = f"{hrs//24}d ago"
-                    except Exception:
-                        time_label = pub[:16] if pub else ''
-
-                    articles.append({
-                        'source': source_name,
-                        'headline': _strip_html(raw_title),
-                        'description': _strip_html(raw_summary)[:200],
-                        'time': time_label,
-                        'url': entry.get('link', '')
-                    })
-                if len(articles) >= 15:
-                    break
-        except Exception as e:
-            logger.warning(f"RSS fetch failed for {source_name} ({commodity}): {e}")
-            continue
+    db = get_db()
+    rows = db.execute("""
+        SELECT a.source, a.headline, a.description, a.url, a.published_at
+        FROM news_article_tags t
+        JOIN news_articles a ON a.id = t.article_id
+        WHERE t.commodity = ?
+        ORDER BY a.published_at DESC, a.id DESC
+        LIMIT ?
+    """, (commodity, NEWS_MAX_ARTICLES)).fetchall()
+    articles = [_article_row(r) for r in rows]
 
     with news_cache_lock:
         news_cache[commodity] = {'data': articles, 'ts': time.time()}
     return jsonify({'success': True, 'articles': articles})
 
 
+@market_bp.route('/api/news/search')
+def search_news():
+    """Full-text search over the news store.
+
+    Query params: q (required), commodity (optional tag filter), page, per_page.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'success': False, 'error': 'q is required'}), 400
+    commodity = request.args.get('commodity', '').strip().lower()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(max(1, request.args.get('per_page', 20, type=int)), 100)
+    offset = (page - 1) * per_page
+
+    tag_join = "JOIN news_article_tags t ON t.article_id = a.id AND t.commodity = ?" if commodity else ""
+    tag_args = (commodity,) if commodity else ()
+
+    db = get_db()
+    try:
+        match = fts_query(q)
+        total = db.execute(f"""
+            SELECT COUNT(*) FROM news_fts
+            JOIN news_articles a ON a.id = news_fts.rowid {tag_join}
+            WHERE news_fts MATCH ?
+        """, tag_args + (match,)).fetchone()[0]
+        rows = db.execute(f"""
+            SELECT a.id, a.source, a.headline, a.description, a.url, a.published_at
+            FROM news_fts
+            JOIN news_articles a ON a.id = news_fts.rowid {tag_join}
+            WHERE news_fts MATCH ?
+            ORDER BY bm25(news_fts), a.published_at DESC
+            LIMIT ? OFFSET ?
+        """, tag_args + (match, per_page, offset)).fetchall()
+    except sqlite3.OperationalError:
+        # No FTS5 in this SQLite build — plain substring match, newest first
+        like = f"%{q}%"
+        total = db.execute(f"""
+            SELECT COUNT(*) FROM news_articles a {tag_join}
+            WHERE a.headline LIKE ? OR a.description LIKE ?
+        """, tag_args + (like, like)).fetchone()[0]
+        rows = db.execute(f"""
+            SELECT a.id, a.source, a.headline, a.description, a.url, a.published_at
+            FROM news_articles a {tag_join}
+            WHERE a.headline LIKE ? OR a.description LIKE ?
+            ORDER BY a.published_at DESC
+            LIMIT ? OFFSET ?
+        """, tag_args + (like, like, per_page, offset)).fetchall()
+
+    # Batch-load commodity tags for the page
+    ids = [r['id'] for r in rows]
+    tags = {}
+    if ids:
+        ph = ','.join('?' * len(ids))
+        for t in db.execute(f"SELECT article_id, commodity FROM news_article_tags "
+                            f"WHERE article_id IN ({ph})", ids).fetchall():
+            tags.setdefault(t['article_id'], []).append(t['commodity'])
+
+    results = []
+    for r in rows:
+        article = _article_row(r)
+        article['published_at'] = r['published_at']
+        article['commodities'] = sorted(tags.get(r['id'], []))
+        results.append(article)
+
+    return jsonify({'success': True, 'articles': results, 'total': total,
+                    'page': page, 'per_page': per_page,
+                    'has_more': offset + len(results) < total})
+
+
 # ---------------------------------------------------------------------------
 # EIA Proxy
 # ---------------------------------------------------------------------------
@@ -1,20 +1,26 @@
 #!/usr/bin/env python3
 """Miscellaneous routes: OTC system, weather, WebSocket events, margin calc."""
 
+import os
 import json
-import math
 import logging
 import threading
 import time as _time
+from collections import namedtuple
 from datetime import datetime, date, timedelta
 
+import numpy as np
 import requests
-from flask import Blueprint, request, jsonify
-from flask_socketio import emit
+from flask import Blueprint, request, jsonify, Response
+from flask_socketio import emit, join_room
 
-from app import (get_db, get_db_standalone, logger, socketio,
+from app import (get_db, get_db_standalone, logger, socketio, background_job, tournament_schema,
                  active_connections, connections_lock,
-                 trader_sids, trader_sids_lock)
+                 presence_register, presence_unregister, presence_elsewhere, touch_last_seen,
+                 online_traders, connection_total,
+                 trader_room, trader_rooms,
+                 conversation_room, team_room, tournament_room)
+from routes.public import mark_leaderboard_dirty, leaderboard_snapshot
 
 misc_bp = Blueprint('misc', __name__)
 
@@ -116,7 +122,7 @@ def submit_otc_proposal(trader):
         'id': proposal_id, 'from_trader': trader, 'from_name': me_name,
         'to_trader': cpty_name, 'direction': direction, 'volume': volume,
         'hub': hub, 'price': price, 'type': trade_data['type'],
-    })
+    }, to=trader_rooms(cpty_name, trader))
 
     return jsonify({'success': True, 'proposal_id': proposal_id})
 
@@ -240,11 +246,14 @@ def accept_otc_proposal(trader, proposal_id):
                (from_trader, 'OTC_TRADE', feed_summary, me_team['name'] if me_team else ''))
     db.commit()
 
-    socketio.emit('trade_submitted', {'trader_name': from_trader, 'trade_id': init_id, 'otc': True})
-    socketio.emit('trade_submitted', {'trader_name': trader, 'trade_id': mirror_id, 'otc': True})
+    socketio.emit('trade_submitted', {'trader_name': from_trader, 'trade_id': init_id, 'otc': True},
+                  to=trader_room(from_trader))
+    socketio.emit('trade_submitted', {'trader_name': trader, 'trade_id': mirror_id, 'otc': True},
+                  to=trader_room(trader))
     socketio.emit('otc_proposal_resolved', {'id': proposal_id, 'status': 'ACCEPTED',
-                                             'from_trader': from_trader, 'to_trader': trader})
-    socketio.emit('leaderboard_update', {'reason': 'otc_trade'})
+                                             'from_trader': from_trader, 'to_trader': trader},
+                  to=trader_rooms(from_trader, trader))
+    mark_leaderboard_dirty('otc_trade')
 
     return jsonify({'success': True, 'trade_id': mirror_id, 'mirror_id': init_id})
 
@@ -263,7 +272,8 @@ def reject_otc_proposal(trader, proposal_id):
                (datetime.utcnow().isoformat(), json.dumps(revs), proposal_id))
     db.commit()
     socketio.emit('otc_proposal_resolved', {'id': proposal_id, 'status': 'REJECTED',
-                                             'from_trader': prop['from_trader'], 'to_trader': prop['to_trader']})
+                                             'from_trader': prop['from_trader'], 'to_trader': prop['to_trader']},
+                  to=trader_rooms(prop['from_trader'], prop['to_trader']))
     return jsonify({'success': True})
 
 
@@ -281,7 +291,8 @@ def withdraw_otc_proposal(trader, proposal_id):
                (datetime.utcnow().isoformat(), json.dumps(revs), proposal_id))
     db.commit()
     socketio.emit('otc_proposal_resolved', {'id': proposal_id, 'status': 'WITHDRAWN',
-                                             'from_trader': prop['from_trader'], 'to_trader': prop['to_trader']})
+                                             'from_trader': prop['from_trader'], 'to_trader': prop['to_trader']},
+                  to=trader_rooms(prop['from_trader'], prop['to_trader']))
     return jsonify({'success': True})
 
 
@@ -332,7 +343,7 @@ def counter_otc_proposal(trader, proposal_id):
         'id': proposal_id, 'by': trader, 'by_name': me_name,
         'to': other, 'trade_data': td, 'revision_count': new_count,
         'message': data.get('message', '')
-    })
+    }, to=trader_room(other))
 
     return jsonify({'success': True, 'revision_count': new_count})
 
@@ -381,21 +392,15 @@ def close_otc_trade(trader, trade_id):
                 mpnl = (close_price - float(mtd['entryPrice'])) * float(mtd['volume']) if mtd['direction'] == 'BUY' else (float(mtd['entryPrice']) - close_price) * float(mtd['volume'])
             mtd['realizedPnl'] = mpnl
             db.execute("UPDATE trades SET trade_data=? WHERE id=?", (json.dumps(mtd), mirror_id))
-            socketio.emit('trade_closed', {'trader_name': mrow['trader_name'], 'trade_id': mirror_id})
+            socketio.emit('trade_closed', {'trader_name': mrow['trader_name'], 'trade_id': mirror_id},
+                          to=trader_room(mrow['trader_name']))
 
     db.commit()
-    socketio.emit('trade_closed', {'trader_name': trader, 'trade_id': trade_id})
-    socketio.emit('leaderboard_update', {'reason': 'otc_close'})
+    socketio.emit('trade_closed', {'trader_name': trader, 'trade_id': trade_id}, to=trader_room(trader))
+    mark_leaderboard_dirty('otc_close')
     return jsonify({'success': True})
 
 
-# ---------------------------------------------------------------------------
-
-
-# ---------------------------------------------------------------------------
-# WebSocket Events
-# ---------------------------------------------------------------------------
-
 # ---------------------------------------------------------------------------
 # Weather Forecasts (Open-Meteo API + synthetic fallback)
 # ---------------------------------------------------------------------------
@@ -419,192 +424,339 @@ WEATHER_CITIES = [
      'hubs': ['Opal', 'Kern River'], 'normal_jan': 32, 'normal_jul': 88, 'sector': 'ng'},
 ]
 
-_weather_cache = {'data': None, 'timestamp': 0, 'source': 'none'}
-_weather_lock = threading.Lock()
-WEATHER_TTL = 6 * 3600  # 6 hours
+WEATHER_LOCATIONS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                      'data', 'weather_locations.json')
 
 
-def _get_normal_temp(city, day_of_year):
-    """Sinusoidal normal temp based on Jan/Jul normals."""
-    jan, jul = city['normal_jan'], city['normal_jul']
-    mid = (jan + jul) / 2.0
-    amp = (jul - jan) / 2.0
+def _load_weather_locations(path):
+    """Load the weighted location grid and hub regions from the data file."""
+    try:
+        with open(path) as f:
+            cfg = json.load(f)
+        return cfg.get('regions', {}), cfg.get('locations', [])
+    except Exception as e:
+        logger.warning(f"Weather locations not loaded ({path}): {e}")
+        return {}, []
+
+
+WEATHER_REGIONS, WEATHER_LOCATIONS = _load_weather_locations(WEATHER_LOCATIONS_FILE)
+# Display cities first, then the weighted grid — rows of every weather array follow this order
+_WEATHER_POINTS = WEATHER_CITIES + WEATHER_LOCATIONS
+_N_DISPLAY = len(WEATHER_CITIES)
+
+WEATHER_TTL = 6 * 3600  # 6 hours — refresh cadence of the background ingester
+WEATHER_HORIZON = 14    # forecast days per location
+DEGREE_DAY_BASE = 65.0  # °F base for HDD/CDD
+WEATHER_FETCH_CHUNK = 50    # coordinates per Open-Meteo request
+WEATHER_FETCH_WORKERS = 4   # concurrent Open-Meteo requests
+
+# Immutable snapshot shared by every weather reader. The refresher builds a complete
+# new one (including serialized responses) and swaps the reference in one assignment.
+WeatherSnapshot = namedtuple('WeatherSnapshot', [
+    'version', 'source', 'timestamp', 'is_heating',
+    'hub_bias', 'region_bias', 'forecast_json', 'bias_json'])
+_weather_snapshot = None
+_weather_refresh_lock = threading.Lock()
+
+
+def _build_normals_table(points):
+    """Sinusoidal normal temps for every location × day-of-year, computed once at import.
+
+    Row i is _WEATHER_POINTS[i]; column d is day-of-year d (0..366 + horizon) so a
+    forecast window starting on any day is a plain slice.
+    """
+    jan = np.array([c['normal_jan'] for c in points], dtype=float)[:, None]
+    jul = np.array([c['normal_jul'] for c in points], dtype=float)[:, None]
+    doy = np.arange(367 + WEATHER_HORIZON, dtype=float)[None, :]
     # Peak around day 200 (mid-July), trough around day 15 (mid-Jan)
-    return mid + amp * math.sin(2 * math.pi * (day_of_year - 105) / 365)
-
-
-def _generate_synthetic_weather():
-    """Generate plausible synthetic 14-day forecasts when API unavailable."""
-    import random
-    now = datetime.utcnow()
-    doy = now.timetuple().tm_yday
-    result = []
-    for city in WEATHER_CITIES:
-        days = []
-        for d in range(14):
-            normal = _get_normal_temp(city, doy + d)
-            # Random anomaly: biased slightly for realism
-            anomaly = random.gauss(0, 5)  # 5°F std dev
-            high = normal + abs(random.gauss(5, 2)) + anomaly
-            low = normal - abs(random.gauss(5, 2)) + anomaly
-            avg = (high + low) / 2
-            hdd = max(0, 65 - avg)
-            cdd = max(0, avg - 65)
-            date_str = (now + timedelta(days=d)).strftime('%Y-%m-%d')
-            days.append({
-                'date': date_str, 'high': round(high, 1), 'low': round(low, 1),
-                'avg': round(avg, 1), 'normal': round(normal, 1),
-                'anomaly': round(avg - normal, 1), 'hdd': round(hdd, 1), 'cdd': round(cdd, 1)
-            })
-        # Compute period aggregates
-        hdd_6_10 = sum(d['hdd'] for d in days[5:10])
-        cdd_6_10 = sum(d['cdd'] for d in days[5:10])
-        hdd_8_14 = sum(d['hdd'] for d in days[7:14])
-        cdd_8_14 = sum(d['cdd'] for d in days[7:14])
-        normal_hdd_6_10 = sum(max(0, 65 - _get_normal_temp(city, doy + i)) for i in range(5, 10))
-        normal_cdd_6_10 = sum(max(0, _get_normal_temp(city, doy + i) - 65) for i in range(5, 10))
-        normal_hdd_8_14 = sum(max(0, 65 - _get_normal_temp(city, doy + i)) for i in range(7, 14))
-        normal_cdd_8_14 = sum(max(0, _get_normal_temp(city, doy + i) - 65) for i in range(7, 14))
-        result.append({
+    return (jan + jul) / 2.0 + (jul - jan) / 2.0 * np.sin(2 * np.pi * (doy - 105) / 365)
+
+
+def _build_region_weights(regions, locations):
+    """Region × location weight matrices (population and gas-demand) plus hub × region mix.
+
+    Each hub's bias is the gas-demand-weighted mix of the regions that list it.
+    """
+    region_ids = list(regions)
+    index = {r: i for i, r in enumerate(region_ids)}
+    w_pop = np.zeros((len(region_ids), len(locations)))
+    w_gas = np.zeros_like(w_pop)
+    for j, loc in enumerate(locations):
+        i = index.get(loc.get('region'))
+        if i is None:
+            continue
+        w_pop[i, j] = loc.get('population', 0)
+        w_gas[i, j] = loc.get('population', 0) * loc.get('gas_share', 0)
+    hubs = sorted({h for r in regions.values() for h in r.get('hubs', [])})
+    hub_index = {h: k for k, h in enumerate(hubs)}
+    hub_mix = np.zeros((len(hubs), len(region_ids)))
+    demand = w_gas.sum(axis=1)
+    for r, cfg in regions.items():
+        for h in cfg.get('hubs', []):
+            hub_mix[hub_index[h], index[r]] = demand[index[r]]
+    totals = hub_mix.sum(axis=1, keepdims=True)
+    hub_mix = np.divide(hub_mix, totals, out=np.zeros_like(hub_mix), where=totals > 0)
+    return region_ids, w_pop, w_gas, hubs, hub_mix
+
+
+_NORMALS = _build_normals_table(_WEATHER_POINTS)
+_NORMAL_HDD = np.maximum(0.0, DEGREE_DAY_BASE - _NORMALS)
+_NORMAL_CDD = np.maximum(0.0, _NORMALS - DEGREE_DAY_BASE)
+_REGION_IDS, _W_POP, _W_GAS, _BIAS_HUBS, _HUB_REGION_MIX = _build_region_weights(
+    WEATHER_REGIONS, WEATHER_LOCATIONS)
+
+_WINDOWS = {'6_10': slice(5, 10), '8_14': slice(7, 14)}
+_SUMMARY_KEYS = [f'{m}_{w}' for w in _WINDOWS for m in ('hdd', 'cdd', 'normal_hdd', 'normal_cdd')] + \
+                [f'{m}_{w}_dev' for w in _WINDOWS for m in ('hdd', 'cdd')]
+
+
+def _build_forecast_run(highs, lows, dates, doy):
+    """Turn (locations × days) high/low arrays into one forecast run.
+
+    Degree days and the 6-10 / 8-14 day window aggregates are computed for every
+    location at once; the grid rows are then reduced into population- and
+    gas-demand-weighted regional indexes with two matrix products. Missing days
+    (NaN) are dropped from display day lists and locations with no data are left
+    out of the regional weights.
+    """
+    n_days = highs.shape[1]
+    normal = _NORMALS[:, doy:doy + n_days]
+    avg = (highs + lows) / 2
+    hdd = np.round(np.maximum(0.0, DEGREE_DAY_BASE - avg), 1)
+    cdd = np.round(np.maximum(0.0, avg - DEGREE_DAY_BASE), 1)
+
+    cols = {}
+    for key, win in _WINDOWS.items():
+        obs_hdd = np.nansum(hdd[:, win], axis=1)
+        obs_cdd = np.nansum(cdd[:, win], axis=1)
+        norm_win = slice(doy + win.start, doy + win.stop)
+        norm_hdd = _NORMAL_HDD[:, norm_win].sum(axis=1)
+        norm_cdd = _NORMAL_CDD[:, norm_win].sum(axis=1)
+        cols[f'hdd_{key}'] = obs_hdd
+        cols[f'cdd_{key}'] = obs_cdd
+        cols[f'normal_hdd_{key}'] = norm_hdd
+        cols[f'normal_cdd_{key}'] = norm_cdd
+        cols[f'hdd_{key}_dev'] = obs_hdd - norm_hdd
+        cols[f'cdd_{key}_dev'] = obs_cdd - norm_cdd
+    metrics = np.column_stack([cols[k] for k in _SUMMARY_KEYS])   # locations × metrics
+    rounded = np.round(metrics, 1)
+
+    # --- Display cities: same payload shape as before ---
+    d = slice(0, _N_DISPLAY)
+    grid = {k: np.round(v[d], 1).tolist() for k, v in
+            (('high', highs), ('low', lows), ('avg', avg), ('normal', normal),
+             ('anomaly', avg - normal), ('hdd', hdd), ('cdd', cdd))}
+    valid = (~np.isnan(avg[d])).tolist()
+    summaries = rounded[d].tolist()
+    cities = []
+    for i, city in enumerate(WEATHER_CITIES):
+        days = [{'date': dates[k] if k < len(dates) else '',
+                 'high': grid['high'][i][k], 'low': grid['low'][i][k],
+                 'avg': grid['avg'][i][k], 'normal': grid['normal'][i][k],
+                 'anomaly': grid['anomaly'][i][k], 'hdd': grid['hdd'][i][k],
+                 'cdd': grid['cdd'][i][k]}
+                for k in range(n_days) if valid[i][k]]
+        cities.append({
             'id': city['id'], 'name': city['name'], 'state': city['state'],
             'lat': city['lat'], 'lon': city['lon'],
             'hubs': city['hubs'], 'sector': city['sector'],
             'days': days,
-            'summary': {
-                'hdd_6_10': round(hdd_6_10, 1), 'cdd_6_10': round(cdd_6_10, 1),
-                'hdd_8_14': round(hdd_8_14, 1), 'cdd_8_14': round(cdd_8_14, 1),
-                'normal_hdd_6_10': round(normal_hdd_6_10, 1), 'normal_cdd_6_10': round(normal_cdd_6_10, 1),
-                'normal_hdd_8_14': round(normal_hdd_8_14, 1), 'normal_cdd_8_14': round(normal_cdd_8_14, 1),
-                'hdd_6_10_dev': round(hdd_6_10 - normal_hdd_6_10, 1),
-                'cdd_6_10_dev': round(cdd_6_10 - normal_cdd_6_10, 1),
-                'hdd_8_14_dev': round(hdd_8_14 - normal_hdd_8_14, 1),
-                'cdd_8_14_dev': round(cdd_8_14 - normal_cdd_8_14, 1),
-            }
+            'summary': dict(zip(_SUMMARY_KEYS, summaries[i])),
         })
-    return result
 
+    # --- Weighted regional indexes over the location grid ---
+    g = slice(_N_DISPLAY, None)
+    has_data = (~np.isnan(avg[g])).any(axis=1).astype(float)
+    grid_metrics = np.where(has_data[:, None] > 0, rounded[g], 0.0)
+    by_weight = {}
+    for name, w in (('pop_weighted', _W_POP), ('gas_weighted', _W_GAS)):
+        w = w * has_data
+        den = w.sum(axis=1, keepdims=True)
+        by_weight[name] = np.divide(w @ grid_metrics, den,
+                                    out=np.zeros((len(_REGION_IDS), len(_SUMMARY_KEYS))),
+                                    where=den > 0)
+    regions = []
+    pop_rows = np.round(by_weight['pop_weighted'], 1).tolist()
+    gas_rows = np.round(by_weight['gas_weighted'], 1).tolist()
+    for i, rid in enumerate(_REGION_IDS):
+        cfg = WEATHER_REGIONS[rid]
+        regions.append({
+            'id': rid, 'name': cfg.get('name', rid), 'hubs': cfg.get('hubs', []),
+            'locations': int(round(float(has_data @ (_W_POP[i] > 0)))),
+            'pop_weighted': dict(zip(_SUMMARY_KEYS, pop_rows[i])),
+            'gas_weighted': dict(zip(_SUMMARY_KEYS, gas_rows[i])),
+        })
 
-def _fetch_open_meteo_weather():
-    """Fetch 14-day forecasts from Open-Meteo API, return structured data or None."""
+    k_hdd = _SUMMARY_KEYS.index('hdd_6_10_dev')
+    k_cdd = _SUMMARY_KEYS.index('cdd_6_10_dev')
+    return {
+        'cities': cities,
+        'regions': regions,
+        # Heating bias follows gas demand; cooling bias follows population (power load)
+        'city_devs': {'hdd_6_10_dev': rounded[d, k_hdd], 'cdd_6_10_dev': rounded[d, k_cdd]},
+        'region_devs': {'hdd_6_10_dev': by_weight['gas_weighted'][:, k_hdd],
+                        'cdd_6_10_dev': by_weight['pop_weighted'][:, k_cdd]},
+    }
+
+
+def _generate_synthetic_weather():
+    """Generate plausible synthetic 14-day forecasts when API unavailable.
+
+    Seeded by the UTC date, so every worker and every refresh on the same day
+    produces the same forecast.
+    """
+    now = datetime.utcnow()
+    doy = now.timetuple().tm_yday
+    rng = np.random.default_rng(int(now.strftime('%Y%m%d')))
+    shape = (len(_WEATHER_POINTS), WEATHER_HORIZON)
+    normal = _NORMALS[:, doy:doy + WEATHER_HORIZON]
+    # Random anomaly: 5°F std dev, with a daily high/low spread around it
+    anomaly = rng.normal(0, 5, shape)
+    highs = normal + np.abs(rng.normal(5, 2, shape)) + anomaly
+    lows = normal - np.abs(rng.normal(5, 2, shape)) + anomaly
+    dates = [(now + timedelta(days=d)).strftime('%Y-%m-%d') for d in range(WEATHER_HORIZON)]
+    return _build_forecast_run(highs, lows, dates, doy)
+
+
+def _fetch_open_meteo_chunk(points):
+    """One multi-coordinate Open-Meteo request; returns the list of per-point payloads."""
     import urllib.request
-    try:
-        lats = ','.join(str(c['lat']) for c in WEATHER_CITIES)
-        lons = ','.join(str(c['lon']) for c in WEATHER_CITIES)
-        url = (f"https://api.open-meteo.com/v1/forecast?"
-               f"latitude={lats}&longitude={lons}"
-               f"&daily=temperature_2m_max,temperature_2m_min"
-               f"&temperature_unit=fahrenheit&forecast_days=14&timezone=America/Chicago")
-        req = urllib.request.Request(url, headers={'User-Agent': 'EnergyDesk/3.0'})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            raw = json.loads(resp.read().decode())
-        # Open-Meteo returns a list when multiple coords are sent
-        if not isinstance(raw, list):
-            raw = [raw]
-        now = datetime.utcnow()
-        doy = now.timetuple().tm_yday
-        result = []
-        for i, city in enumerate(WEATHER_CITIES):
-            api_data = raw[i] if i < len(raw) else None
-            if not api_data or 'daily' not in api_data:
+    lats = ','.join(str(c['lat']) for c in points)
+    lons = ','.join(str(c['lon']) for c in points)
+    url = (f"https://api.open-meteo.com/v1/forecast?"
+           f"latitude={lats}&longitude={lons}"
+           f"&daily=temperature_2m_max,temperature_2m_min"
+           f"&temperature_unit=fahrenheit&forecast_days={WEATHER_HORIZON}&timezone=America/Chicago")
+    req = urllib.request.Request(url, headers={'User-Agent': 'EnergyDesk/3.0'})
+    with urllib.request.urlopen(req, timeout=15) as resp:
+        raw = json.loads(resp.read().decode())
+    # Open-Meteo returns a list when multiple coords are sent
+    return raw if isinstance(raw, list) else [raw]
+
+
+def _fetch_open_meteo_weather():
+    """Fetch 14-day forecasts for every location in concurrent chunks.
+
+    Returns a forecast run, or None if the display cities could not be fetched.
+    Grid chunks that fail are left as NaN and excluded from regional weights.
+    """
+    import concurrent.futures
+    n = len(_WEATHER_POINTS)
+    highs = np.full((n, WEATHER_HORIZON), np.nan)
+    lows = np.full_like(highs, np.nan)
+    dates = []
+    chunks = [(i, _WEATHER_POINTS[i:i + WEATHER_FETCH_CHUNK]) for i in range(0, n, WEATHER_FETCH_CHUNK)]
+    display_ok = True
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WEATHER_FETCH_WORKERS) as ex:
+        futures = {ex.submit(_fetch_open_meteo_chunk, pts): (start, len(pts)) for start, pts in chunks}
+        for fut in concurrent.futures.as_completed(futures):
+            start, size = futures[fut]
+            try:
+                raw = fut.result()
+            except Exception as e:
+                logger.warning(f"Open-Meteo fetch failed for locations {start}-{start + size - 1}: {e}")
+                if start < _N_DISPLAY:
+                    display_ok = False
                 continue
-            daily = api_data['daily']
-            highs = daily.get('temperature_2m_max', [])
-            lows = daily.get('temperature_2m_min', [])
-            dates = daily.get('time', [])
-            days = []
-            for d in range(min(14, len(highs))):
-                high = highs[d]; low = lows[d]
-                avg = (high + low) / 2
-                normal = _get_normal_temp(city, doy + d)
-                hdd = max(0, 65 - avg); cdd = max(0, avg - 65)
-                days.append({
-                    'date': dates[d] if d < len(dates) else '',
-                    'high': round(high, 1), 'low': round(low, 1),
-                    'avg': round(avg, 1), 'normal': round(normal, 1),
-                    'anomaly': round(avg - normal, 1), 'hdd': round(hdd, 1), 'cdd': round(cdd, 1)
-                })
-            hdd_6_10 = sum(d['hdd'] for d in days[5:10])
-            cdd_6_10 = sum(d['cdd'] for d in days[5:10])
-            hdd_8_14 = sum(d['hdd'] for d in days[7:14])
-            cdd_8_14 = sum(d['cdd'] for d in days[7:14])
-            normal_hdd_6_10 = sum(max(0, 65 - _get_normal_temp(city, doy + j)) for j in range(5, 10))
-            normal_cdd_6_10 = sum(max(0, _get_normal_temp(city, doy + j) - 65) for j in range(5, 10))
-            normal_hdd_8_14 = sum(max(0, 65 - _get_normal_temp(city, doy + j)) for j in range(7, 14))
-            normal_cdd_8_14 = sum(max(0, _get_normal_temp(city, doy + j) - 65) for j in range(7, 14))
-            result.append({
-                'id': city['id'], 'name': city['name'], 'state': city['state'],
-                'lat': city['lat'], 'lon': city['lon'],
-                'hubs': city['hubs'], 'sector': city['sector'],
-                'days': days,
-                'summary': {
-                    'hdd_6_10': round(hdd_6_10, 1), 'cdd_6_10': round(cdd_6_10, 1),
-                    'hdd_8_14': round(hdd_8_14, 1), 'cdd_8_14': round(cdd_8_14, 1),
-                    'normal_hdd_6_10': round(normal_hdd_6_10, 1), 'normal_cdd_6_10': round(normal_cdd_6_10, 1),
-                    'normal_hdd_8_14': round(normal_hdd_8_14, 1), 'normal_cdd_8_14': round(normal_cdd_8_14, 1),
-                    'hdd_6_10_dev': round(hdd_6_10 - normal_hdd_6_10, 1),
-                    'cdd_6_10_dev': round(cdd_6_10 - normal_cdd_6_10, 1),
-                    'hdd_8_14_dev': round(hdd_8_14 - normal_hdd_8_14, 1),
-                    'cdd_8_14_dev': round(cdd_8_14 - normal_cdd_8_14, 1),
-                }
-            })
-        if len(result) == len(WEATHER_CITIES):
-            return result
-        return None
-    except Exception as e:
-        logger.warning(f"Open-Meteo fetch failed: {e}")
+            for k, api_data in enumerate(raw[:size]):
+                daily = (api_data or {}).get('daily')
+                if not daily:
+                    if start + k < _N_DISPLAY:
+                        display_ok = False
+                    continue
+                h = [v if v is not None else np.nan for v in daily.get('temperature_2m_max', [])][:WEATHER_HORIZON]
+                l = [v if v is not None else np.nan for v in daily.get('temperature_2m_min', [])][:WEATHER_HORIZON]
+                m = min(len(h), len(l))
+                highs[start + k, :m] = h[:m]
+                lows[start + k, :m] = l[:m]
+                if len(daily.get('time', [])) > len(dates):
+                    dates = daily['time'][:WEATHER_HORIZON]
+            if len(raw) < size and start < _N_DISPLAY:
+                display_ok = False
+    if not display_ok:
         return None
+    doy = datetime.utcnow().timetuple().tm_yday
+    return _build_forecast_run(highs, lows, dates, doy)
+
+
+def _bias_maps(run, is_heating):
+    """Hub and region bias from 6-10 day HDD (heating) or CDD (cooling) deviations.
+
+    Hubs outside the regional grid fall back to their display city's deviation.
+    """
+    key = 'hdd_6_10_dev' if is_heating else 'cdd_6_10_dev'
+    # Scale: +10 degree-day deviation → ~+2% bias
+    hub_bias = {}
+    for city, b in zip(WEATHER_CITIES, np.round(run['city_devs'][key] * 0.002, 4).tolist()):
+        for hub_name in city['hubs']:
+            hub_bias[hub_name] = b
+    region_bias = run['region_devs'][key] * 0.002
+    hub_bias.update(zip(_BIAS_HUBS, np.round(_HUB_REGION_MIX @ region_bias, 4).tolist()))
+    return hub_bias, dict(zip(_REGION_IDS, np.round(region_bias, 4).tolist()))
+
+
+def refresh_weather(only_if_missing=False):
+    """Fetch (or synthesize) a forecast run and publish it as the new snapshot."""
+    global _weather_snapshot
+    with _weather_refresh_lock:
+        if only_if_missing and _weather_snapshot is not None:
+            return _weather_snapshot
+        run = _fetch_open_meteo_weather()
+        source = 'open-meteo'
+        if not run:
+            # Fallback to synthetic
+            run = _generate_synthetic_weather()
+            source = 'synthetic'
+        now_ts = _time.time()
+        is_heating = datetime.utcnow().month in (1, 2, 3, 4, 10, 11, 12)
+        hub_bias, region_bias = _bias_maps(run, is_heating)
+        version = (_weather_snapshot.version + 1) if _weather_snapshot else 1
+        _weather_snapshot = WeatherSnapshot(
+            version=version, source=source, timestamp=now_ts, is_heating=is_heating,
+            hub_bias=hub_bias, region_bias=region_bias,
+            forecast_json=json.dumps({'success': True, 'source': source, 'cities': run['cities'],
+                                      'regions': run['regions'], 'cached_at': now_ts,
+                                      'version': version}),
+            bias_json=json.dumps({'success': True, 'is_heating_season': is_heating,
+                                  'bias': hub_bias, 'regions': region_bias, 'version': version}))
+        logger.info(f"Weather snapshot v{version} published ({source})")
+        return _weather_snapshot
+
+
+def _get_weather_snapshot():
+    """Current snapshot; builds the first one inline if the refresher has not run yet."""
+    snap = _weather_snapshot
+    return snap if snap is not None else refresh_weather(only_if_missing=True)
+
+
+@background_job
+def _weather_refresh_loop():
+    """Fill the weather snapshot at startup, then refresh it every WEATHER_TTL."""
+    while True:
+        try:
+            refresh_weather()
+        except Exception as e:
+            logger.warning(f"Weather refresh failed: {e}")
+        socketio.sleep(WEATHER_TTL)
 
 
 @misc_bp.route('/api/weather/forecast', methods=['GET'])
 def get_weather_forecast():
-    """Return 14-day weather forecasts for energy hub cities."""
-    global _weather_cache
-    now_ts = _time.time()
-    with _weather_lock:
-        if _weather_cache['data'] and (now_ts - _weather_cache['timestamp']) < WEATHER_TTL:
-            return jsonify({'success': True, 'source': _weather_cache['source'],
-                            'cities': _weather_cache['data'],
-                            'cached_at': _weather_cache['timestamp']})
-    # Try live data first
-    live = _fetch_open_meteo_weather()
-    if live:
-        with _weather_lock:
-            _weather_cache = {'data': live, 'timestamp': now_ts, 'source': 'open-meteo'}
-        return jsonify({'success': True, 'source': 'open-meteo', 'cities': live, 'cached_at': now_ts})
-    # Fallback to synthetic
-    synth = _generate_synthetic_weather()
-    with _weather_lock:
-        _weather_cache = {'data': synth, 'timestamp': now_ts, 'source': 'synthetic'}
-    return jsonify({'success': True, 'source': 'synthetic', 'cities': synth, 'cached_at': now_ts})
+    """Return 14-day weather forecasts for energy hub cities plus weighted regional indexes."""
+    return Response(_get_weather_snapshot().forecast_json, mimetype='application/json')
+
+
+def get_regional_bias(region_or_hub):
+    """Bias for a weather region id or hub name from the current snapshot (0.0 if unknown)."""
+    snap = _get_weather_snapshot()
+    return snap.region_bias.get(region_or_hub, snap.hub_bias.get(region_or_hub, 0.0))
 
 
 @misc_bp.route('/api/weather/bias', methods=['GET'])
 def get_weather_bias():
     """Return per-hub weather-driven price bias for the tick engine.
     Positive = bullish (cold in winter / hot in summer), negative = bearish."""
-    global _weather_cache
-    data = _weather_cache.get('data')
-    if not data:
-        # Generate on-the-fly
-        data = _generate_synthetic_weather()
-    now = datetime.utcnow()
-    month = now.month
-    is_heating = month in (1, 2, 3, 4, 10, 11, 12)
-    hub_bias = {}
-    for city in data:
-        s = city['summary']
-        if is_heating:
-            # Colder than normal = more HDD = bullish gas/power
-            dev = s['hdd_6_10_dev']
-            # Scale: +10 HDD deviation → ~+2% bias
-            bias = dev * 0.002
-        else:
-            # Hotter than normal = more CDD = bullish power
-            dev = s['cdd_6_10_dev']
-            bias = dev * 0.002
-        for hub_name in city['hubs']:
-            hub_bias[hub_name] = round(bias, 4)
-    return jsonify({'success': True, 'is_heating_season': is_heating, 'bias': hub_bias})
+    return Response(_get_weather_snapshot().bias_json, mimetype='application/json')
 
 
 # ---------------------------------------------------------------------------
@@ -616,8 +768,9 @@ def handle_connect(auth=None):
     with connections_lock:
         active_connections.add(sid)
         count = len(active_connections)
-    emit('connection_count', {'count': count}, broadcast=True)
-    logger.info(f"Client connected: {sid} (total: {count})")
+    # Everyone else hears about the new total from the rate-limited broadcast in app.py
+    emit('connection_count', {'count': connection_total()})
+    logger.info(f"Client connected: {sid} (local total: {count})")
 
 @socketio.on('disconnect')
 def handle_disconnect(reason=None):
@@ -625,120 +778,122 @@ def handle_disconnect(reason=None):
     with connections_lock:
         active_connections.discard(sid)
         count = len(active_connections)
-    disconnected_trader = None
-    with trader_sids_lock:
-        to_remove = [k for k, v in trader_sids.items() if v == sid]
-        for k in to_remove:
-            del trader_sids[k]
-            disconnected_trader = k
-    emit('connection_count', {'count': count}, broadcast=True)
-    if disconnected_trader:
-        try:
-            conn = get_db_standalone()
-            conn.execute("UPDATE traders SET last_seen=CURRENT_TIMESTAMP WHERE trader_name=?", (disconnected_trader,))
-            conn.commit()
-            conn.close()
-        except Exception:
-            pass
-        socketio.emit('presence_change', {'trader': disconnected_trader, 'online': False})
-    logger.info(f"Client disconnected: {sid} (total: {count})")
+    trader_name, went_offline = presence_unregister(sid)
+    if trader_name:
+        touch_last_seen(trader_name)
+        # Closing one of several tabs, here or on another worker, leaves the trader online
+        if went_offline and not presence_elsewhere(trader_name):
+            socketio.emit('presence_change', {'trader': trader_name, 'online': False})
+    logger.info(f"Client disconnected: {sid} (local total: {count})")
 
 @socketio.on('register_trader')
 def handle_register_trader(data):
     trader_name = data.get('trader_name', '')
     if trader_name:
+        touch_last_seen(trader_name)
         conn = get_db_standalone()
-        conn.execute("UPDATE traders SET last_seen=CURRENT_TIMESTAMP WHERE trader_name=?", (trader_name,))
-        conn.commit()
+        # Rooms for targeted emits: own trader room, every conversation, team, live tournaments
+        rooms = [trader_room(trader_name)]
+        rooms += [conversation_room(r['conversation_id']) for r in conn.execute(
+            "SELECT conversation_id FROM conversation_members WHERE trader_name=?", (trader_name,))]
+        team = conn.execute("SELECT team_id FROM traders WHERE trader_name=?", (trader_name,)).fetchone()
+        if team and team['team_id']:
+            rooms.append(team_room(team['team_id']))
+        # Per tournament: a live one's entries may be in its shard
+        for t in conn.execute("SELECT id, shard FROM tournaments WHERE status IN ('PENDING', 'ACTIVE')").fetchall():
+            if conn.execute(f"SELECT 1 FROM {tournament_schema(conn, t)}.tournament_entries "
+                            "WHERE tournament_id=? AND trader_name=?", (t['id'], trader_name)).fetchone():
+                rooms.append(tournament_room(t['id']))
         conn.close()
-        with trader_sids_lock:
-            trader_sids[trader_name] = request.sid
-        socketio.emit('presence_change', {'trader': trader_name, 'online': True})
-        logger.info(f"Trader registered on WS: {trader_name}")
+        for room in rooms:
+            join_room(room)
+        if presence_register(request.sid, trader_name) and not presence_elsewhere(trader_name):
+            socketio.emit('presence_change', {'trader': trader_name, 'online': True})
+        logger.info(f"Trader registered on WS: {trader_name} ({len(rooms)} rooms)")
 
 @misc_bp.route('/api/traders/online', methods=['GET'])
 def get_online_traders():
-    with trader_sids_lock:
-        online = list(trader_sids.keys())
+    online = list(online_traders())
     return jsonify({'success': True, 'online': online})
 
 @socketio.on('request_leaderboard')
 def handle_leaderboard_request():
-    emit('leaderboard_update', {'reason': 'requested'})
+    version, rows = leaderboard_snapshot()
+    emit('leaderboard_snapshot', {'version': version, 'leaderboard': rows})
 
 
 # ---------------------------------------------------------------------------
 # Voice Call Signaling (WebRTC)
 # ---------------------------------------------------------------------------
+# A trader may have several tabs open, so a call rings all of them (their trader room)
+# and every relayed event carries the sender's socket as 'sid'. Once a tab answers, each
+# side sends the other's sid back as target_sid and events go to that one socket.
+def _call_target(target, sid):
+    """The target's socket named by the client if it's still theirs, else all their tabs."""
+    if sid and sid in online_traders().get(target, ()):
+        return sid
+    return trader_room(target)
+
 @socketio.on('call_initiate')
 def handle_call_initiate(data):
     """Caller sends: { caller, callee, offer (SDP), callType }"""
     callee = data.get('callee', '')
-    with trader_sids_lock:
-        callee_sid = trader_sids.get(callee)
-    if callee_sid:
+    if callee in online_traders():
         emit('call_incoming', {
             'caller': data.get('caller', ''),
             'offer': data.get('offer'),
-            'callType': data.get('callType', 'audio')
-        }, to=callee_sid)
+            'callType': data.get('callType', 'audio'),
+            'sid': request.sid,
+        }, to=trader_room(callee))
     else:
         emit('call_error', {'error': f'{callee} is not online'})
 
 @socketio.on('call_answer')
 def handle_call_answer(data):
-    """Callee sends: { caller, callee, answer (SDP) }"""
+    """Callee sends: { caller, callee, answer (SDP), target_sid }"""
     caller = data.get('caller', '')
-    with trader_sids_lock:
-        caller_sid = trader_sids.get(caller)
-    if caller_sid:
-        emit('call_answered', {
-            'callee': data.get('callee', ''),
-            'answer': data.get('answer'),
-            'callType': data.get('callType', 'audio')
-        }, to=caller_sid)
+    callee = data.get('callee', '')
+    emit('call_answered', {
+        'callee': callee,
+        'answer': data.get('answer'),
+        'callType': data.get('callType', 'audio'),
+        'sid': request.sid,
+    }, to=_call_target(caller, data.get('target_sid')))
+    # Stop the callee's other tabs ringing
+    emit('call_dismissed', {'caller': caller}, to=trader_room(callee), skip_sid=request.sid)
 
 @socketio.on('call_ice')
 def handle_call_ice(data):
-    """Relay ICE candidates: { target, candidate }"""
-    target = data.get('target', '')
-    with trader_sids_lock:
-        target_sid = trader_sids.get(target)
-    if target_sid:
-        emit('call_ice', {
-            'candidate': data.get('candidate'),
-            'from': data.get('from', '')
-        }, to=target_sid)
+    """Relay ICE candidates: { target, target_sid, candidate }"""
+    emit('call_ice', {
+        'candidate': data.get('candidate'),
+        'from': data.get('from', ''),
+        'sid': request.sid,
+    }, to=_call_target(data.get('target', ''), data.get('target_sid')))
 
 @socketio.on('call_restart')
 def handle_call_restart(data):
     """ICE restart: relay new offer to existing call partner"""
-    target = data.get('target', '')
-    with trader_sids_lock:
-        target_sid = trader_sids.get(target)
-    if target_sid:
-        emit('call_restart', {
-            'from': data.get('from', ''),
-            'offer': data.get('offer')
-        }, to=target_sid)
+    emit('call_restart', {
+        'from': data.get('from', ''),
+        'offer': data.get('offer'),
+        'sid': request.sid,
+    }, to=_call_target(data.get('target', ''), data.get('target_sid')))
 
 @socketio.on('call_end')
 def handle_call_end(data):
-    """End call: { target }"""
-    target = data.get('target', '')
-    with trader_sids_lock:
-        target_sid = trader_sids.get(target)
-    if target_sid:
-        emit('call_ended', {'from': data.get('from', '')}, to=target_sid)
+    """End call: { target, target_sid }"""
+    emit('call_ended', {'from': data.get('from', ''), 'sid': request.sid},
+         to=_call_target(data.get('target', ''), data.get('target_sid')))
 
 @socketio.on('call_reject')
 def handle_call_reject(data):
-    """Reject incoming call: { caller }"""
+    """Reject incoming call: { caller, callee, target_sid }"""
     caller = data.get('caller', '')
-    with trader_sids_lock:
-        caller_sid = trader_sids.get(caller)
-    if caller_sid:
-        emit('call_rejected', {'callee': data.get('callee', '')}, to=caller_sid)
+    callee = data.get('callee', '')
+    emit('call_rejected', {'callee': callee, 'sid': request.sid},
+         to=_call_target(caller, data.get('target_sid')))
+    emit('call_dismissed', {'caller': caller}, to=trader_room(callee), skip_sid=request.sid)
 
 
 # ---------------------------------------------------------------------------
@@ -24,7 +24,7 @@ from datetime import datetime, timezone, timedelta
 import requests
 from flask import Blueprint, jsonify
 
-from app import EIA_API_KEY, FRED_API_KEY
+from app import EIA_API_KEY, FRED_API_KEY, MULTI_WORKER, run_blocking, shared_get, shared_put, claim_lease
 
 logger = logging.getLogger(__name__)
 prices_bp = Blueprint('prices', __name__)
@@ -636,12 +636,26 @@ def fetch_live_prices():
         if _price_cache['data'] and (now - _price_cache['ts']) < PRICE_TTL:
             return _price_cache['data']
 
+    # Multi-worker: adopt a fresh snapshot another worker fetched, and let only the
+    # lease holder go upstream — the others keep serving the previous snapshot meanwhile
+    if MULTI_WORKER:
+        shared = shared_get('live_prices')
+        if shared and (now - shared[0]['ts']) < PRICE_TTL:
+            with _price_lock:
+                _price_cache.update(shared[0])
+            return _price_cache['data']
+        if not claim_lease('live_prices_fetch', 120):
+            if shared:
+                with _price_lock:
+                    _price_cache.update(shared[0])
+            return _price_cache['data'] or {}
+
     logger.info('Fetching live prices from yfinance + EIA + NYISO + EIA-spot-scrape...')
 
     # Fetch all sources concurrently
     import concurrent.futures
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as ex:
-        f_yf    = ex.submit(_fetch_yfinance, TICKERS)
+        f_yf    = ex.submit(run_blocking, _fetch_yfinance, TICKERS)
         f_eia   = ex.submit(_fetch_eia_prices)
         f_nyiso = ex.submit(_fetch_nyiso_lmps)
         f_spots = ex.submit(_fetch_eia_spot_prices)
@@ -678,6 +692,8 @@ def fetch_live_prices():
         _price_cache['live_hubs'] = live_hubs
         _price_cache['hub_sources'] = hub_srcs
         _price_cache['ts'] = now
+    if MULTI_WORKER:
+        shared_put('live_prices', _price_cache)
 
     return hub_prices
 
@@ -863,7 +879,7 @@ def get_price_history():
             return jsonify({'success': True, 'history': _hist_cache['data'],
                             'hub_count': len(_hist_cache['data'])})
 
-    data = _fetch_historical()
+    data = run_blocking(_fetch_historical)
     with _hist_lock:
         _hist_cache['data'] = data
         _hist_cache['ts'] = time.time()
@@ -1045,7 +1061,7 @@ def get_forward_curve():
                             'hub_count': len(_fwd_cache['data']),
                             'cache_age_seconds': int(now - _fwd_cache['ts'])})
 
-    data = _fetch_forward_curve()
+    data = run_blocking(_fetch_forward_curve)
     with _fwd_lock:
         _fwd_cache['data'] = data
         _fwd_cache['ts'] = time.time()
@@ -9,12 +9,22 @@ import random
 import re
 import sqlite3
 import string
+import struct
 import subprocess
+import time
 from datetime import datetime, timedelta
 
-from flask import Blueprint, request, jsonify, session
+import numpy as np
 
-from app import get_db, active_connections, connections_lock, socketio, _calc_margin, logger, AUTH_MODE
+from flask import Blueprint, request, jsonify, session, Response
+
+from flask_socketio import emit, join_room, leave_room
+
+from app import (get_db, get_db_standalone, connection_total, socketio, _calc_margin,
+                 logger, AUTH_MODE, background_job, run_blocking, trader_room, tournament_room,
+                 touch_last_seen, MULTI_WORKER, WORKER_ID, shared_put, shared_put_later, shared_get, shared_get_prefix,
+                 claim_lease, invalidate_mention_index, utc_seconds, verify_admin_pin, DATABASE,
+                 tournament_schema)
 
 public_bp = Blueprint('public', __name__)
 
@@ -103,9 +113,18 @@ def _update_price_cache(hub, price):
         if math.isfinite(p) and p > 0:
             with _price_cache_lock:
                 _price_cache[hub] = p
+            if MULTI_WORKER:
+                shared_put_later(f'spot:{hub}', p)
     except (ValueError, TypeError):
         pass
 
+def _sync_price_cache():
+    """Pull spot prices recorded by other workers into the local cache."""
+    shared = shared_get_prefix('spot:')
+    with _price_cache_lock:
+        for key, p in shared.items():
+            _price_cache[key[len('spot:'):]] = p
+
 def _get_cached_price(hub):
     """Get last known server-side price for a hub."""
     with _price_cache_lock:
@@ -146,8 +165,7 @@ def api_status():
     db = get_db()
     active = db.execute("SELECT COUNT(*) as c FROM traders WHERE status='ACTIVE'").fetchone()['c']
     total_trades = db.execute("SELECT COUNT(*) as c FROM trades").fetchone()['c']
-    with connections_lock:
-        ws_count = len(active_connections)
+    ws_count = connection_total()
 
     # Database file size
     db_size_mb = 0
@@ -321,8 +339,7 @@ def trader_heartbeat(trader):
     row = db.execute("SELECT status FROM traders WHERE trader_name=?", (trader,)).fetchone()
     if not row or row['status'] == 'DELETED':
         return jsonify({'success': False, 'revoked': True}), 403
-    db.execute("UPDATE traders SET last_seen=CURRENT_TIMESTAMP WHERE trader_name=?", (trader,))
-    db.commit()
+    touch_last_seen(trader)
     return jsonify({'success': True})
 
 @public_bp.route('/api/traders/profile/<trader>', methods=['GET'])
@@ -357,6 +374,8 @@ def update_display_name(trader):
     db = get_db()
     db.execute("UPDATE traders SET display_name=? WHERE trader_name=?", (new_name, trader))
     db.commit()
+    invalidate_mention_index()
+    invalidate_tournament_standings()
     return jsonify({'success': True, 'display_name': new_name})
 
 @public_bp.route('/api/trades/<trader>', methods=['GET'])
@@ -586,8 +605,8 @@ def submit_trade(trader):
         'direction': data.get('direction'),
         'hub': data.get('hub'),
         'volume': volume
-    })
-    socketio.emit('leaderboard_update', {'reason': 'trade_submitted'})
+    }, to=trader_room(trader))
+    mark_leaderboard_dirty('trade_submitted')
 
     # Log to trade feed
     try:
@@ -698,8 +717,8 @@ def update_trade(trader, trade_id):
     db.commit()
 
     if data.get('status') == 'CLOSED':
-        socketio.emit('trade_closed', {'trader_name': trader, 'trade_id': trade_id})
-        socketio.emit('leaderboard_update', {'reason': 'trade_closed'})
+        socketio.emit('trade_closed', {'trader_name': trader, 'trade_id': trade_id}, to=trader_room(trader))
+        mark_leaderboard_dirty('trade_closed')
 
     return jsonify({'success': True, 'trade_id': trade_id})
 
@@ -828,10 +847,10 @@ def get_trade_stats(trader):
 # ---------------------------------------------------------------------------
 # Leaderboard API
 # ---------------------------------------------------------------------------
-@public_bp.route('/api/leaderboard')
-def get_leaderboard():
-    """Server-calculated leaderboard."""
-    db = get_db()
+def _compute_leaderboard(db):
+    """Rank every active trader by return; unrealized P&L uses the server price cache."""
+    if MULTI_WORKER:
+        _sync_price_cache()
     traders = db.execute("SELECT * FROM traders WHERE status='ACTIVE'").fetchall()
     results = []
     for t in traders:
@@ -908,6 +927,14 @@ def get_leaderboard():
     results.sort(key=lambda x: x['return_pct'], reverse=True)
     for i, r in enumerate(results):
         r['rank'] = i + 1
+    return results
+
+
+@public_bp.route('/api/leaderboard')
+def get_leaderboard():
+    """Server-calculated leaderboard."""
+    db = get_db()
+    results = _compute_leaderboard(db)
 
     # Save performance snapshots (at most once per hour per trader)
     try:
@@ -939,6 +966,178 @@ def get_leaderboard():
 
     return jsonify({'success': True, 'leaderboard': results})
 
+# ---------------------------------------------------------------------------
+# Leaderboard Push — coalesced recompute, diffs pushed to subscribers
+# ---------------------------------------------------------------------------
+# Trade events only mark the board dirty; one background task recomputes it at
+# most once per interval and emits the rows that changed to the 'leaderboard' room.
+LEADERBOARD_ROOM = 'leaderboard'
+LEADERBOARD_PUSH_INTERVAL = float(os.environ.get('LEADERBOARD_PUSH_INTERVAL', 2.0))  # seconds
+_LB_DIFF_FIELDS = ('rank', 'equity', 'realized_pnl', 'unrealized_pnl', 'return_pct',
+                   'win_rate', 'profit_factor', 'trade_count', 'wins', 'losses')
+
+_lb_push = {'dirty': True, 'reasons': set(), 'rows': {}, 'order': [], 'version': 0,
+            'interval': LEADERBOARD_PUSH_INTERVAL, 'leader': False, 'computed_at': 0.0}
+_lb_push_lock = _threading.Lock()
+
+
+def mark_leaderboard_dirty(reason=''):
+    """Schedule a leaderboard recompute for the next push tick."""
+    with _lb_push_lock:
+        _lb_push['dirty'] = True
+        if reason:
+            _lb_push['reasons'].add(reason)
+    # Tournaments without a sector are scored off the main desk
+    invalidate_tournament_standings(main_trades=True)
+    if MULTI_WORKER:
+        # The push loop runs on one worker only; it watches this key for other workers' trades
+        shared_put_later('leaderboard_dirty', reason)
+
+
+def leaderboard_push_interval():
+    with _lb_push_lock:
+        return _lb_push['interval']
+
+
+def set_leaderboard_push_interval(seconds):
+    """Change the push cadence at runtime (clamped to 0.5s–60s). Returns the new value."""
+    seconds = min(max(float(seconds), 0.5), 60.0)
+    with _lb_push_lock:
+        _lb_push['interval'] = seconds
+    if MULTI_WORKER:
+        shared_put('leaderboard_push_interval', seconds)
+    return seconds
+
+
+def _compute_leaderboard_standalone():
+    conn = get_db_standalone()
+    try:
+        return _compute_leaderboard(conn)
+    finally:
+        conn.close()
+
+
+def _lb_key(row):
+    """Comparable view of a row — money rounded to cents so float noise isn't a change."""
+    return tuple(round(row[f], 2) if isinstance(row[f], float) else row[f] for f in _LB_DIFF_FIELDS)
+
+
+def _refresh_leaderboard_push():
+    """Recompute once and return (version, changed rows, removed traders), or None if unchanged."""
+    with _lb_push_lock:
+        _lb_push['dirty'] = False
+        _lb_push['computed_at'] = time.time()
+        reasons = sorted(_lb_push['reasons'])
+        _lb_push['reasons'] = set()
+    results = run_blocking(_compute_leaderboard_standalone)
+    new_rows = {r['trader_name']: r for r in results}
+    with _lb_push_lock:
+        old_rows = _lb_push['rows']
+        changed = [r for name, r in new_rows.items()
+                   if name not in old_rows or _lb_key(old_rows[name]) != _lb_key(r)]
+        removed = [name for name in old_rows if name not in new_rows]
+        _lb_push['rows'] = new_rows
+        _lb_push['order'] = [r['trader_name'] for r in results]
+        if not changed and not removed:
+            return None
+        _lb_push['version'] += 1
+        version = _lb_push['version']
+        ordered = [new_rows[n] for n in _lb_push['order']]
+    if MULTI_WORKER:
+        shared_put('leaderboard', {'version': version, 'rows': ordered})
+    # Existing rows only carry the ranking/P&L fields; new traders get the full row
+    diff = [r if r['trader_name'] not in old_rows else
+            dict({'trader_name': r['trader_name']}, **{f: r[f] for f in _LB_DIFF_FIELDS})
+            for r in changed]
+    return version, diff, removed, reasons
+
+
+def _push_leaderboard_diff():
+    """Recompute and emit the diff to the leaderboard room; subscribers see every version."""
+    pushed = _refresh_leaderboard_push()
+    if pushed:
+        version, diff, removed, reasons = pushed
+        socketio.emit('leaderboard_diff', {'version': version, 'rows': diff,
+                                           'removed': removed, 'reasons': reasons},
+                      to=LEADERBOARD_ROOM)
+
+
+def leaderboard_snapshot():
+    """Full ranked leaderboard from the push cache (computed on first use)."""
+    if MULTI_WORKER and not _lb_push['leader']:
+        # Diff versions come from the push leader, so baselines must come from it too
+        shared = shared_get('leaderboard')
+        if shared:
+            return shared[0]['version'], shared[0]['rows']
+    with _lb_push_lock:
+        ready = bool(_lb_push['order']) and not _lb_push['dirty']
+        if ready:
+            return _lb_push['version'], [_lb_push['rows'][n] for n in _lb_push['order']]
+    # Push the recompute too: a version bumped here but never emitted would show every
+    # other subscriber a gap and send them all back for a full snapshot
+    _push_leaderboard_diff()
+    with _lb_push_lock:
+        return _lb_push['version'], [_lb_push['rows'][n] for n in _lb_push['order']]
+
+
+@background_job
+def _leaderboard_push_loop():
+    """Coalesce trade events into at most one recompute + diff push per interval."""
+    while True:
+        with _lb_push_lock:
+            interval = _lb_push['interval']
+            dirty = _lb_push['dirty']
+        if MULTI_WORKER:
+            try:
+                dirty = _leaderboard_leader_tick(interval) and (dirty or _shared_leaderboard_dirty())
+            except Exception as e:
+                logger.warning(f"Leaderboard lease check failed: {e}")
+                dirty = False
+            shared_interval = shared_get('leaderboard_push_interval')
+            if shared_interval:
+                interval = shared_interval[0]
+        if dirty:
+            try:
+                _push_leaderboard_diff()
+            except Exception as e:
+                logger.warning(f"Leaderboard push failed: {e}")
+        socketio.sleep(interval)
+
+
+def _leaderboard_leader_tick(interval):
+    """Hold the push lease; a new leader resumes from the shared snapshot's version."""
+    is_leader = claim_lease('leaderboard_push', max(3 * interval, 10))
+    if is_leader and not _lb_push['leader']:
+        shared = shared_get('leaderboard')
+        with _lb_push_lock:
+            if shared:
+                _lb_push['version'] = shared[0]['version']
+                _lb_push['rows'] = {r['trader_name']: r for r in shared[0]['rows']}
+                _lb_push['order'] = [r['trader_name'] for r in shared[0]['rows']]
+            _lb_push['dirty'] = True
+        logger.info(f"Leaderboard push leader: {WORKER_ID}")
+    _lb_push['leader'] = is_leader
+    return is_leader
+
+
+def _shared_leaderboard_dirty():
+    shared = shared_get('leaderboard_dirty')
+    return bool(shared) and shared[1] >= _lb_push['computed_at']
+
+
+@socketio.on('subscribe_leaderboard')
+def handle_subscribe_leaderboard(data=None):
+    """Join the leaderboard room and receive the current board as a baseline for diffs."""
+    join_room(LEADERBOARD_ROOM)
+    version, rows = leaderboard_snapshot()
+    emit('leaderboard_snapshot', {'version': version, 'leaderboard': rows})
+
+
+@socketio.on('unsubscribe_leaderboard')
+def handle_unsubscribe_leaderboard(data=None):
+    leave_room(LEADERBOARD_ROOM)
+
+
 @public_bp.route('/api/leaderboard/all-snapshots')
 def get_all_snapshots():
     """Return recent snapshots for all traders (for equity curves)."""
@@ -989,10 +1188,11 @@ def submit_tournament_trade(tid, trader):
         return jsonify({'success': False, 'error': 'Tournament not found'}), 404
     if tourn['status'] != 'ACTIVE':
         return jsonify({'success': False, 'error': 'Tournament is not active'}), 400
+    schema = tournament_schema(db, tourn)
 
     # 2. Validate trader is enrolled and not disqualified
     entry = db.execute(
-        "SELECT * FROM tournament_entries WHERE tournament_id=? AND trader_name=?",
+        f"SELECT * FROM {schema}.tournament_entries WHERE tournament_id=? AND trader_name=?",
         (tid, trader)
     ).fetchone()
     if not entry:
@@ -1024,23 +1224,29 @@ def submit_tournament_trade(tid, trader):
         unit = 'BBL' if is_crude else 'MMBtu'
         return jsonify({'success': False, 'error': f'Volume exceeds maximum of {max_volume:,.0f} {unit}'}), 400
 
-    # 5. Price validation (skip spotRef — tournament prices are simulated, server doesn't know them)
+    # 5. Price validation (spotRef doesn't apply — tournament prices come from the tournament engine)
     try:
         entry_price = float(data.get('entryPrice', 0))
     except (ValueError, TypeError):
         return jsonify({'success': False, 'error': 'Invalid entry price'}), 400
     if not math.isfinite(entry_price):
         return jsonify({'success': False, 'error': 'Entry price must be a finite number'}), 400
-    is_basis = trade_type == 'BASIS_SWAP'
+    is_basis = trade_type in BASIS_TRADE_TYPES
     if not is_basis and entry_price <= 0:
         return jsonify({'success': False, 'error': 'Entry price must be positive'}), 400
     if is_basis and abs(entry_price) > 50:
         return jsonify({'success': False, 'error': 'Basis differential too large (max ±$50)'}), 400
+    # Sector tournaments trade the server's simulated prices, so fills must be near its mark
+    priced = tournament_marks(db, tourn, history=2) if not is_basis else None
+    if priced:
+        err = check_tournament_price(priced[2], data.get('hub', ''), entry_price)
+        if err:
+            return jsonify({'success': False, 'error': err, 'price': priced[1].get(data.get('hub'))}), 400
 
     # 6. Margin check using tournament starting_balance
     starting_balance = tourn['starting_balance']
     existing_trades = db.execute(
-        "SELECT trade_data FROM tournament_trades WHERE tournament_id=? AND trader_name=?",
+        f"SELECT trade_data FROM {schema}.tournament_trades WHERE tournament_id=? AND trader_name=?",
         (tid, trader)
     ).fetchall()
 
@@ -1067,7 +1273,7 @@ def submit_tournament_trade(tid, trader):
 
     # 7. Duplicate prevention (same trade within 5 seconds)
     recent = db.execute(
-        "SELECT trade_data FROM tournament_trades WHERE tournament_id=? AND trader_name=? "
+        f"SELECT trade_data FROM {schema}.tournament_trades WHERE tournament_id=? AND trader_name=? "
         "AND created_at > datetime('now', '-5 seconds')",
         (tid, trader)
     ).fetchall()
@@ -1090,11 +1296,12 @@ def submit_tournament_trade(tid, trader):
     trade_json = json.dumps(data)
 
     cur = db.execute(
-        "INSERT INTO tournament_trades (tournament_id, trader_name, trade_data) VALUES (?, ?, ?)",
+        f"INSERT INTO {schema}.tournament_trades (tournament_id, trader_name, trade_data) VALUES (?, ?, ?)",
         (tid, trader, trade_json)
     )
     db.commit()
     trade_id = cur.lastrowid
+    tournament_trade_event(tid, trader, trade_id, data)
 
     socketio.emit('tournament_trade', {
         'tournament_id': tid,
@@ -1104,7 +1311,7 @@ def submit_tournament_trade(tid, trader):
         'direction': data.get('direction'),
         'hub': data.get('hub'),
         'volume': volume
-    })
+    }, to=tournament_room(tid))
 
     return jsonify({'success': True, 'trade_id': trade_id})
 
@@ -1123,9 +1330,10 @@ def update_tournament_trade(tid, trader, trade_id):
         return jsonify({'success': False, 'error': 'Tournament not found'}), 404
     if tourn['status'] != 'ACTIVE':
         return jsonify({'success': False, 'error': 'Tournament is not active'}), 400
+    schema = tournament_schema(db, tourn)
 
     row = db.execute(
-        "SELECT * FROM tournament_trades WHERE id=? AND tournament_id=? AND trader_name=?",
+        f"SELECT * FROM {schema}.tournament_trades WHERE id=? AND tournament_id=? AND trader_name=?",
         (trade_id, tid, trader)
     ).fetchone()
     if not row:
@@ -1145,6 +1353,23 @@ def update_tournament_trade(tid, trader, trade_id):
             continue
         td[key] = data[key]
 
+    # Closing at a server-priced hub: the close must be near the mark and P&L is computed here
+    priced = (tournament_marks(db, tourn, history=2)
+              if data.get('status') == 'CLOSED' and td.get('type') not in BASIS_TRADE_TYPES else None)
+    if priced and td.get('hub') in priced[1]:
+        try:
+            close_price = float(data['closePrice']) if data.get('closePrice') is not None else priced[1][td['hub']]
+        except (ValueError, TypeError):
+            return jsonify({'success': False, 'error': 'Invalid closePrice'}), 400
+        err = check_tournament_price(priced[2], td['hub'], close_price)
+        if err:
+            return jsonify({'success': False, 'error': err, 'price': priced[1][td['hub']]}), 400
+        mult = 1 if td.get('direction') == 'BUY' else -1
+        td['closePrice'] = close_price
+        td['realizedPnl'] = round(mult * (close_price - float(td.get('entryPrice', 0) or 0))
+                                  * float(td.get('volume', 0) or 0), 2)
+        data = dict(data, realizedPnl=td['realizedPnl'])
+
     # Validate realizedPnl if provided — must be a finite number within reason
     if 'realizedPnl' in data:
         try:
@@ -1157,8 +1382,9 @@ def update_tournament_trade(tid, trader, trade_id):
         except (ValueError, TypeError):
             return jsonify({'success': False, 'error': 'Invalid realizedPnl'}), 400
 
-    db.execute("UPDATE tournament_trades SET trade_data=? WHERE id=?", (json.dumps(td), trade_id))
+    db.execute(f"UPDATE {schema}.tournament_trades SET trade_data=? WHERE id=?", (json.dumps(td), trade_id))
     db.commit()
+    tournament_trade_event(tid, trader, trade_id, td)
 
     return jsonify({'success': True, 'trade_id': trade_id})
 
@@ -1175,10 +1401,11 @@ def force_close_tournament_trades(tid, trader):
     tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
     if not tourn:
         return jsonify({'success': False, 'error': 'Tournament not found'}), 404
+    schema = tournament_schema(db, tourn)
 
     # Verify trader is enrolled
     entry = db.execute(
-        "SELECT * FROM tournament_entries WHERE tournament_id=? AND trader_name=?",
+        f"SELECT * FROM {schema}.tournament_entries WHERE tournament_id=? AND trader_name=?",
         (tid, trader)
     ).fetchone()
     if not entry:
@@ -1188,13 +1415,19 @@ def force_close_tournament_trades(tid, trader):
     closed_trades = data.get('trades', [])
     starting_balance = tourn['starting_balance']
 
+    # Server-priced hubs are closed at the server's marks; the client's numbers are only
+    # used for anything the engine doesn't price
+    reason = closed_trades[0].get('closeReason', 'FORCE_CLOSE') if closed_trades else 'FORCE_CLOSE'
+    close_tournament_positions(db, tourn, reason, trader=trader)
+
     # Bulk update: client sends array of {trade_id, closePrice, realizedPnl}
+    closed = []
     for ct in closed_trades:
         trade_id = ct.get('trade_id')
         if not trade_id:
             continue
         row = db.execute(
-            "SELECT * FROM tournament_trades WHERE id=? AND tournament_id=? AND trader_name=?",
+            f"SELECT * FROM {schema}.tournament_trades WHERE id=? AND tournament_id=? AND trader_name=?",
             (trade_id, tid, trader)
         ).fetchone()
         if not row:
@@ -1219,13 +1452,16 @@ def force_close_tournament_trades(tid, trader):
         td['realizedPnl'] = realized_pnl
         td['closedAt'] = datetime.utcnow().isoformat()
         td['closeReason'] = ct.get('closeReason', 'FORCE_CLOSE')
-        db.execute("UPDATE tournament_trades SET trade_data=? WHERE id=?", (json.dumps(td), trade_id))
+        db.execute(f"UPDATE {schema}.tournament_trades SET trade_data=? WHERE id=?", (json.dumps(td), trade_id))
+        closed.append((row['id'], td))
 
     db.commit()
+    for trade_id, td in closed:
+        tournament_trade_event(tid, trader, trade_id, td)
 
     # Update entry stats
     all_trades = db.execute(
-        "SELECT trade_data FROM tournament_trades WHERE tournament_id=? AND trader_name=?",
+        f"SELECT trade_data FROM {schema}.tournament_trades WHERE tournament_id=? AND trader_name=?",
         (tid, trader)
     ).fetchall()
     realized = 0.0
@@ -1244,7 +1480,7 @@ def force_close_tournament_trades(tid, trader):
     equity = balance + realized
 
     db.execute(
-        "UPDATE tournament_entries SET final_pnl=?, final_equity=?, trade_count=? "
+        f"UPDATE {schema}.tournament_entries SET final_pnl=?, final_equity=?, trade_count=? "
         "WHERE tournament_id=? AND trader_name=?",
         (round(realized, 2), round(equity, 2), trade_count, tid, trader)
     )
@@ -1252,3 +1488,1212 @@ def force_close_tournament_trades(tid, trader):
 
     return jsonify({'success': True, 'final_pnl': round(realized, 2), 'equity': round(equity, 2)})
 
+
+
+# ---------------------------------------------------------------------------
+# Tournament Price Engine — seeded, deterministic, server-authoritative
+# ---------------------------------------------------------------------------
+# A sector tournament's prices are a pure function of its seed, its start snapshot and
+# the news events flashed into it, so every worker (and every restart) derives the same
+# path. Each tick moves all of the sector's hubs at once: the client's Brownian step
+# (uniform noise scaled by base * vol), the weather bias captured at start for ng/power,
+# then the active news shocks. Ticks are published to the tournament room.
+TOURNAMENT_TICK_SECONDS = 8            # same cadence the client engine ticked at
+TOURNAMENT_PRICE_TOLERANCE = 0.02      # fills/closes must be within 2% of the server mark
+# Basis trades carry a hub-minus-basisHub differential as their entryPrice, so they are
+# marked at the difference of the two hubs' marks, as the client's getBasisPrice does
+BASIS_TRADE_TYPES = ('BASIS_SWAP', 'LNG_BASIS')
+TOURNAMENT_HUBS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'data', 'tournament_hubs.json')
+
+
+def _load_tournament_hubs(path):
+    """Sector -> [{name, base, vol}] from the data file."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Tournament hubs not loaded ({path}): {e}")
+        return {}
+
+
+TOURNAMENT_HUBS = _load_tournament_hubs(TOURNAMENT_HUBS_FILE)
+
+_price_paths = {}      # tid -> path state
+_price_paths_lock = _threading.Lock()
+
+
+def new_tournament_price_model(sector, snapshot=None, weather_bias=None):
+    """Opening prices and model parameters for a tournament about to start.
+
+    Hubs missing from snapshot open at the server's last known spot price, else the hub's
+    base. weather_bias(hub) is sampled once for ng/power so the path stays reproducible.
+    Returns (price_snapshot, config) to store on the tournament row.
+    """
+    snapshot = snapshot if isinstance(snapshot, dict) else {}
+    opening = {}
+    for h in TOURNAMENT_HUBS.get((sector or '').lower(), []):
+        try:
+            p = float(snapshot.get(h['name']) or 0)
+        except (TypeError, ValueError):
+            p = 0
+        opening[h['name']] = p if math.isfinite(p) and p > 0 else (_get_cached_price(h['name']) or h['base'])
+    config = {'price_seed': random.getrandbits(63)}
+    if (sector or '').lower() in ('ng', 'power') and weather_bias:
+        bias = {hub: weather_bias(hub) for hub in opening}
+        config['weather_bias'] = {hub: b for hub, b in bias.items() if b}
+    return opening, config
+
+
+def _news_shocks(conn, path):
+    """Flashed, non-noise events compiled to (active_from, hub index array, type, signed pct, duration)."""
+    shocks = []
+    for ev in conn.execute(
+        f"SELECT * FROM {tournament_schema(conn, path['tid'])}.tournament_news_events "
+        "WHERE tournament_id=? AND status='FLASHED' AND flashed_at IS NOT NULL AND NOT is_noise ORDER BY id",
+        (path['tid'],)
+    ):
+        try:
+            hubs = json.loads(ev['affected_hubs'] or '[]')
+            idx = np.array([path['index'][h] for h in hubs if h in path['index']], dtype=np.intp)
+            # Never earlier than the flash itself, so ticks already served can't change
+            active_from = utc_seconds(ev['flashed_at']) + max(ev['delay_seconds'] or 5, 0)
+        except (ValueError, TypeError):
+            continue
+        direction = {'bullish': 1, 'bearish': -1}.get(ev['impact_direction'], 0)
+        if len(idx):
+            shocks.append((active_from, idx, ev['impact_type'], (ev['impact_pct'] or 0) / 100 * direction,
+                           ev['duration_ticks'] or 5))
+    return shocks
+
+
+def _new_price_path(tourn):
+    hubs = TOURNAMENT_HUBS.get((tourn['sector'] or '').lower(), [])
+    if not hubs:
+        return None
+    try:
+        snapshot = json.loads(tourn['price_snapshot'] or '{}')
+        config = json.loads(tourn['config'] or '{}')
+    except (ValueError, TypeError):
+        snapshot, config = {}, {}
+    names = [h['name'] for h in hubs]
+    base = np.array([h['base'] for h in hubs])
+    bias = config.get('weather_bias') or {}
+    opening = np.array([float(snapshot.get(n) or 0) or h['base'] for n, h in zip(names, hubs)])
+    return {
+        'tid': tourn['id'],
+        'start': utc_seconds(tourn['start_time']),
+        'hubs': names,
+        'index': {n: i for i, n in enumerate(names)},
+        'step': base * np.array([h['vol'] for h in hubs]) / 100 / 15,
+        'bias': np.array([float(bias.get(n, 0)) for n in names]),
+        # Power can go negative; everything else is floored at 10% of base
+        'floor': -base * 0.5 if tourn['sector'].lower() == 'power' else base * 0.1,
+        'rng': np.random.default_rng(int(config.get('price_seed', tourn['id']))),
+        'history': [opening],
+        'shocks': [],
+    }
+
+
+def _advance_price_path(conn, path, tick):
+    """Extend the path up to tick, one vectorized step per tick across all hubs."""
+    if tick < len(path['history']):
+        return
+    path['shocks'] = _news_shocks(conn, path)
+    n = len(path['hubs'])
+    for k in range(len(path['history']), tick + 1):
+        cur = path['history'][-1]
+        # Both draws happen every tick so the stream never depends on which events exist
+        noise, wx = path['rng'].random(n), path['rng'].random(n)
+        drift = (noise - 0.5) * 2 * path['step'] + cur * path['bias'] * (0.3 + wx * 0.4)
+        news = np.zeros(n)
+        burst = np.zeros(n, dtype=bool)
+        at = path['start'] + k * TOURNAMENT_TICK_SECONDS
+        for active_from, idx, kind, pct, duration in path['shocks']:
+            if at < active_from:
+                continue
+            elapsed = int((at - active_from) // TOURNAMENT_TICK_SECONDS)
+            if kind in ('shock', 'spike_revert') and elapsed < 2:
+                news[idx] += cur[idx] * pct * 0.5
+            elif kind == 'trend' and elapsed < duration:
+                news[idx] += cur[idx] * pct / duration
+            elif kind == 'spike_revert' and elapsed < 2 + duration:
+                news[idx] -= cur[idx] * pct * 0.65 / duration
+            elif kind == 'vol_burst' and elapsed < duration:
+                burst[idx] = True
+        drift[burst] *= 4
+        path['history'].append(np.maximum(cur + drift + news, path['floor']))
+
+
+def _price_tick_at(tourn, when=None):
+    """Tick index for a moment (default now), clamped to the tournament's window."""
+    start = utc_seconds(tourn['start_time'])
+    when = time.time() if when is None else when
+    if tourn['end_time']:
+        when = min(when, utc_seconds(tourn['end_time']))
+    return max(int((when - start) // TOURNAMENT_TICK_SECONDS), 0)
+
+
+def _price_window(conn, tourn, history, tick=None):
+    """(tick, hub names, array of the last `history` ticks x hubs) for a sector tournament, or None.
+
+    tick defaults to the current one.
+    """
+    tid = tourn['id']
+    if not tourn['start_time']:
+        return None
+    with _price_paths_lock:
+        path = _price_paths.get(tid)
+        if path is None or path['start'] != utc_seconds(tourn['start_time']):
+            path = _new_price_path(tourn)
+            if path is None:
+                return None
+            _price_paths[tid] = path
+        tick = _price_tick_at(tourn) if tick is None else tick
+        _advance_price_path(conn, path, tick)
+        return tick, path['hubs'], np.array(path['history'][max(tick + 1 - history, 0):tick + 1])
+
+
+def tournament_marks(conn, tourn, history=0):
+    """(tick, {hub: price}, {hub: [recent prices]}) for a sector tournament, or None.
+
+    history is how many trailing ticks to include per hub (0 for none).
+    """
+    window = _price_window(conn, tourn, max(history, 1))
+    if window is None:
+        return None
+    tick, hubs, prices = window
+    marks = dict(zip(hubs, prices[-1].tolist()))
+    recent = {hub: prices[:, i].tolist() for i, hub in enumerate(hubs)} if history else {}
+    return tick, marks, recent
+
+
+def drop_tournament_prices(tid=None):
+    """Forget cached price paths (they are rebuilt deterministically on next use)."""
+    with _price_paths_lock:
+        if tid is None:
+            _price_paths.clear()
+        else:
+            _price_paths.pop(tid, None)
+
+
+def check_tournament_price(recent, hub, price):
+    """Error message if price is off the server's marks for hub, else None.
+
+    recent is tournament_marks(..., history=2)[2]: a client can be one tick behind, so a
+    price near either the current or the previous mark is accepted.
+    """
+    marks = recent.get(hub)
+    if not marks:
+        return None
+    if all(abs(price - m) > abs(m) * TOURNAMENT_PRICE_TOLERANCE for m in marks):
+        return f'Price {price:,.4f} is off the market ({hub} is {marks[-1]:,.4f})'
+    return None
+
+
+def close_tournament_positions(db, tourn, reason, trader=None, when=None):
+    """Close OPEN tournament trades at the server marks (all entrants, or one). Caller commits.
+
+    Basis trades close at the hub-minus-basisHub differential. Trades on hubs the engine
+    doesn't price, and basis trades without both marks, are left open. Returns the number closed.
+    """
+    schema = tournament_schema(db, tourn)
+    priced = tournament_marks(db, tourn)
+    if not priced:
+        return 0
+    marks = priced[1]
+    now = datetime.utcnow().isoformat() if when is None else when
+    hub_mark = "(SELECT value FROM json_each(:marks) WHERE key = json_extract(trade_data, '$.{}'))"
+    mark = (f"(CASE WHEN json_extract(trade_data, '$.type') IN ({', '.join(map(repr, BASIS_TRADE_TYPES))})"
+            f" THEN {hub_mark.format('hub')} - {hub_mark.format('basisHub')} ELSE {hub_mark.format('hub')} END)")
+    pnl = (f"ROUND((CASE WHEN json_extract(trade_data, '$.direction')='BUY' THEN 1 ELSE -1 END)"
+           f" * ({mark} - CAST(json_extract(trade_data, '$.entryPrice') AS REAL))"
+           f" * CAST(json_extract(trade_data, '$.volume') AS REAL), 2)")
+    sql = (f"UPDATE {schema}.tournament_trades SET trade_data = json_set(trade_data, '$.status', 'CLOSED', "
+           f"'$.closePrice', {mark}, '$.realizedPnl', {pnl}, '$.closedAt', :now, '$.closeReason', :reason) "
+           f"WHERE tournament_id=:tid AND json_valid(trade_data) AND json_extract(trade_data, '$.status')='OPEN' "
+           f"AND {mark} IS NOT NULL")
+    params = {'marks': json.dumps(marks), 'now': now, 'reason': reason, 'tid': tourn['id']}
+    if trader is not None:
+        sql += " AND trader_name=:trader"
+        params['trader'] = trader
+    closed = db.execute(sql, params).rowcount
+    if closed:
+        invalidate_tournament_standings(tourn['id'])
+    return closed
+
+
+@public_bp.route('/api/tournament/<int:tid>/prices', methods=['GET'])
+def get_tournament_prices(tid):
+    """Current server marks for a sector tournament, with ?history=N trailing ticks per hub."""
+    db = get_db()
+    tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if not tourn:
+        return jsonify({'success': False, 'error': 'Tournament not found'}), 404
+    history = min(max(request.args.get('history', 0, type=int), 0), 200)
+    priced = tournament_marks(db, tourn, history)
+    if not priced:
+        return jsonify({'success': False, 'error': 'Tournament has no simulated prices'}), 400
+    tick, marks, recent = priced
+    return jsonify({'success': True, 'tournament_id': tid, 'tick': tick,
+                    'tick_seconds': TOURNAMENT_TICK_SECONDS, 'prices': marks, 'history': recent})
+
+
+@background_job
+def _tournament_price_loop():
+    """Publish each live sector tournament's new ticks to its room."""
+    published = {}
+    while True:
+        socketio.sleep(TOURNAMENT_TICK_SECONDS / 4)
+        try:
+            if not claim_lease('tournament_prices', max(3 * TOURNAMENT_TICK_SECONDS, 10)):
+                published.clear()
+                continue
+            conn = get_db_standalone()
+            try:
+                active = conn.execute(
+                    "SELECT * FROM tournaments WHERE status='ACTIVE' AND IFNULL(sector, '') != ''"
+                ).fetchall()
+                ticks = [(t['id'], tournament_marks(conn, t)) for t in active]
+            finally:
+                conn.close()
+            for tid, priced in ticks:
+                if priced and published.get(tid) != priced[0]:
+                    published[tid] = priced[0]
+                    socketio.emit('tournament_prices', {'tournament_id': tid, 'tick': priced[0],
+                                                        'prices': priced[1]}, to=tournament_room(tid))
+            for tid in set(published) - {tid for tid, _ in ticks}:
+                del published[tid]
+                drop_tournament_prices(tid)
+        except Exception as e:
+            logger.warning(f"Tournament price publish failed: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Tournament Standings — in-memory books for ACTIVE tournaments
+# ---------------------------------------------------------------------------
+# A book holds every entrant's realized P&L and open positions. Tournament trade
+# events patch it in place; a background task revalues the open positions against
+# the server's marks and pushes changed standings to the tournament room at
+# most once per interval. Books are rebuilt from the DB (two queries) when stale.
+TOURNAMENT_PUSH_INTERVAL = float(os.environ.get('TOURNAMENT_PUSH_INTERVAL', 3.0))  # seconds
+TOURNAMENT_BOOK_MAX_AGE = 60   # backstop full reload, picks up renames/team moves
+
+_tourn_books = {}      # tid -> book
+_tourn_events = {}     # tid -> event counter, so a reload racing an event is redone
+_tourn_lock = _threading.Lock()
+
+
+def _tourn_position(td):
+    """The slice of a trade the book needs, or None if it can't be read."""
+    try:
+        status = td.get('status')
+        return {
+            'status': status,
+            'realized': float(td.get('realizedPnl', 0) or 0) if status == 'CLOSED' else 0.0,
+            'hub': td.get('hub', ''),
+            # Basis trades: the hub whose mark is subtracted ('' if the trade doesn't say)
+            'basis': (td.get('basisHub') or '') if td.get('type') in BASIS_TRADE_TYPES else None,
+            'entry': float(td.get('entryPrice', 0) or 0),
+            'volume': float(td.get('volume', 0) or 0),
+            'mult': 1 if td.get('direction', 'BUY') == 'BUY' else -1,
+        }
+    except (AttributeError, ValueError, TypeError):
+        return None
+
+
+def _position_mark(pos, marks):
+    """Price an open position is valued at: its hub's mark, or for a basis trade the
+    hub-minus-basisHub differential. Its entry price (no P&L) when a mark is missing."""
+    if pos['basis'] is not None:
+        if marks.get(pos['hub']) and marks.get(pos['basis']):
+            return marks[pos['hub']] - marks[pos['basis']]
+        return pos['entry']
+    return marks.get(pos['hub']) or pos['entry']
+
+
+def _tourn_apply(book, trader, trade_id, pos):
+    """Replace one trade's contribution to an entrant (no-op for non-entrants)."""
+    entrant = book['entrants'].get(trader)
+    if entrant is None or pos is None:
+        return
+    old = entrant['trades'].get(trade_id)
+    if old is not None:
+        entrant['realized'] -= old['realized']
+    entrant['trades'][trade_id] = pos
+    entrant['realized'] += pos['realized']
+    if pos['status'] == 'OPEN':
+        entrant['open'][trade_id] = pos
+    else:
+        entrant['open'].pop(trade_id, None)
+
+
+def _load_tournament_book(conn, tourn):
+    """Build a book with one entrants query and one trades query."""
+    tid = tourn['id']
+    schema = tournament_schema(conn, tourn)
+    book = {
+        'tid': tid,
+        'balance': tourn['starting_balance'],
+        'sector': tourn['sector'] or '',
+        'entrants': {},
+        'stale': False,
+        'loaded_at': time.time(),
+        'version': 0,
+        'pushed': None,
+    }
+    for e in conn.execute(
+        "SELECT e.trader_name, e.status as entry_status, t.display_name, t.photo_url, "
+        "tm.name as team_name, tm.color as team_color "
+        f"FROM {schema}.tournament_entries e "
+        "JOIN traders t ON e.trader_name = t.trader_name "
+        "LEFT JOIN teams tm ON t.team_id = tm.id "
+        "WHERE e.tournament_id=?", (tid,)
+    ):
+        book['entrants'][e['trader_name']] = {
+            'meta': {
+                'trader_name': e['trader_name'],
+                'display_name': e['display_name'],
+                'photo_url': e['photo_url'] or '',
+                'team_name': e['team_name'] or '',
+                'team_color': e['team_color'] or '#888',
+                'entry_status': e['entry_status'] or 'ACTIVE',
+            },
+            'realized': 0.0, 'trades': {}, 'open': {},
+        }
+
+    if book['sector']:
+        rows = conn.execute(
+            f"SELECT id, trader_name, trade_data FROM {schema}.tournament_trades WHERE tournament_id=? ORDER BY id",
+            (tid,))
+    elif tourn['start_time']:
+        rows = conn.execute(
+            "SELECT tr.id, tr.trader_name, tr.trade_data FROM trades tr "
+            f"JOIN {schema}.tournament_entries e ON e.trader_name = tr.trader_name AND e.tournament_id=? "
+            "WHERE tr.created_at>=? AND tr.created_at<=? ORDER BY tr.id",
+            (tid, tourn['start_time'], tourn['end_time'] or datetime.utcnow().isoformat()))
+    else:
+        rows = conn.execute(
+            "SELECT tr.id, tr.trader_name, tr.trade_data FROM trades tr "
+            f"JOIN {schema}.tournament_entries e ON e.trader_name = tr.trader_name AND e.tournament_id=? "
+            "ORDER BY tr.id", (tid,))
+    for row in rows:
+        try:
+            td = json.loads(row['trade_data'])
+        except (ValueError, TypeError):
+            continue
+        _tourn_apply(book, row['trader_name'], row['id'], _tourn_position(td))
+    return book
+
+
+def _standings_marks(conn, tourn):
+    """Marks to value open positions at: the price engine for sector tournaments,
+    the server spot cache for tournaments scored off the main desk."""
+    if tourn['sector']:
+        priced = tournament_marks(conn, tourn)
+        return priced[1] if priced else {}
+    if MULTI_WORKER:
+        _sync_price_cache()
+    with _price_cache_lock:
+        return dict(_price_cache)
+
+
+def _rank_tournament_book(book, marks):
+    """Revalue open positions and return ranked standings rows."""
+    balance = book['balance']
+    standings = []
+    for entrant in book['entrants'].values():
+        unrealized = 0.0
+        for pos in entrant['open'].values():
+            unrealized += pos['mult'] * (_position_mark(pos, marks) - pos['entry']) * pos['volume']
+        realized = entrant['realized']
+        total_pnl = realized + unrealized
+        standings.append(dict(
+            entrant['meta'],
+            equity=round(balance + total_pnl, 2),
+            total_pnl=round(total_pnl, 2),
+            realized_pnl=round(realized, 2),
+            unrealized_pnl=round(unrealized, 2),
+            ret_pct=round(total_pnl / balance * 100, 2) if balance else 0,
+            trades=len(entrant['trades']),
+        ))
+    standings.sort(key=lambda x: x['total_pnl'], reverse=True)
+    for i, s in enumerate(standings):
+        s['rank'] = i + 1
+    return standings
+
+
+def _tournament_book(conn, tourn):
+    """The cached book for an ACTIVE tournament, (re)loading it if missing or stale."""
+    tid = tourn['id']
+    with _tourn_lock:
+        book = _tourn_books.get(tid)
+        if book and not book['stale'] and time.time() - book['loaded_at'] < TOURNAMENT_BOOK_MAX_AGE:
+            return book
+        seen = _tourn_events.get(tid, 0)
+    fresh = _load_tournament_book(conn, tourn)
+    with _tourn_lock:
+        if book:
+            fresh['version'], fresh['pushed'] = book['version'], book['pushed']
+        # An event that landed mid-load may be missing from what we read
+        fresh['stale'] = _tourn_events.get(tid, 0) != seen
+        _tourn_books[tid] = fresh
+    return fresh
+
+
+def tournament_standings(conn, tourn):
+    """Ranked standings for a tournament row; ACTIVE tournaments are served from their book."""
+    marks = _standings_marks(conn, tourn)
+    if tourn['status'] == 'ACTIVE':
+        book = _tournament_book(conn, tourn)
+        with _tourn_lock:
+            return _rank_tournament_book(book, marks)
+    return _rank_tournament_book(_load_tournament_book(conn, tourn), marks)
+
+
+def tournament_trade_event(tid, trader, trade_id, td):
+    """Patch the tournament's book after a committed trade insert/update."""
+    with _tourn_lock:
+        _tourn_events[tid] = _tourn_events.get(tid, 0) + 1
+        book = _tourn_books.get(tid)
+        if book:
+            _tourn_apply(book, trader, trade_id, _tourn_position(td))
+    if MULTI_WORKER:
+        # The push loop runs on one worker; it reloads books other workers touched
+        shared_put_later(f'tournament_dirty:{tid}', trade_id)
+
+
+def invalidate_tournament_standings(tid=None, main_trades=False):
+    """Mark books for reload: one tournament, all of them, or (main_trades) those scored off the main desk."""
+    with _tourn_lock:
+        for book_tid, book in _tourn_books.items():
+            if tid is None or book_tid == tid:
+                if not main_trades or not book['sector']:
+                    book['stale'] = True
+        if tid is not None:
+            _tourn_events[tid] = _tourn_events.get(tid, 0) + 1
+    if MULTI_WORKER and not main_trades:
+        shared_put_later(f'tournament_dirty:{tid if tid is not None else "all"}', time.time())
+
+
+def _mark_dirty_books():
+    """Flag books another worker has changed since they were loaded (no-op single-worker)."""
+    if not MULTI_WORKER:
+        return
+    every = shared_get('tournament_dirty:all')
+    main_desk = shared_get('leaderboard_dirty')
+    with _tourn_lock:
+        tids = list(_tourn_books)
+    dirty = {tid: shared_get(f'tournament_dirty:{tid}') for tid in tids}
+    with _tourn_lock:
+        for tid, book in _tourn_books.items():
+            marks = [dirty.get(tid), every]
+            if not book['sector']:
+                marks.append(main_desk)
+            if any(m and m[1] >= book['loaded_at'] for m in marks):
+                book['stale'] = True
+
+
+def _tournament_standings_tick():
+    """Refresh books for every ACTIVE tournament; returns [(tid, payload)] that changed."""
+    conn = get_db_standalone()
+    try:
+        active = conn.execute("SELECT * FROM tournaments WHERE status='ACTIVE'").fetchall()
+        _mark_dirty_books()
+        active_ids = {r['id'] for r in active}
+        with _tourn_lock:
+            for tid in [t for t in _tourn_books if t not in active_ids]:
+                del _tourn_books[tid]
+            # Counters only matter while a book can be loading; a tournament that starts
+            # later begins again from 0, which at worst makes one load look stale
+            for tid in [t for t in _tourn_events if t not in active_ids]:
+                del _tourn_events[tid]
+        pushes = []
+        for tourn in active:
+            marks = _standings_marks(conn, tourn)
+            book = _tournament_book(conn, tourn)
+            with _tourn_lock:
+                standings = _rank_tournament_book(book, marks)
+                key = [(s['trader_name'], s['total_pnl'], s['trades'], s['entry_status']) for s in standings]
+                if key == book['pushed']:
+                    continue
+                book['pushed'] = key
+                book['version'] += 1
+                pushes.append((tourn['id'], {'tournament_id': tourn['id'], 'version': book['version'],
+                                             'standings': standings}))
+        return pushes
+    finally:
+        conn.close()
+
+
+@background_job
+def _tournament_standings_loop():
+    """Push changed standings to each live tournament's room once per interval."""
+    while True:
+        socketio.sleep(TOURNAMENT_PUSH_INTERVAL)
+        try:
+            if not claim_lease('tournament_standings', max(3 * TOURNAMENT_PUSH_INTERVAL, 10)):
+                continue
+            for tid, payload in run_blocking(_tournament_standings_tick):
+                socketio.emit('tournament_standings', payload, to=tournament_room(tid))
+        except Exception as e:
+            logger.warning(f"Tournament standings push failed: {e}")
+
+
+@socketio.on('subscribe_tournament')
+def handle_subscribe_tournament(data=None):
+    """Spectators join a tournament room and get the current standings as a baseline."""
+    try:
+        tid = int((data or {}).get('tournament_id'))
+    except (TypeError, ValueError):
+        return
+    conn = get_db_standalone()
+    try:
+        tourn = conn.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+        if not tourn or tourn['status'] != 'ACTIVE':
+            return
+        join_room(tournament_room(tid))
+        standings = tournament_standings(conn, tourn)
+        with _tourn_lock:
+            version = _tourn_books[tid]['version'] if tid in _tourn_books else 0
+    finally:
+        conn.close()
+    emit('tournament_standings', {'tournament_id': tid, 'version': version, 'standings': standings})
+
+
+# ---------------------------------------------------------------------------
+# Tournament Risk — server-side VaR limits
+# ---------------------------------------------------------------------------
+# Each pass reduces every entrant's open book to a row of net units per hub, so a
+# tournament's whole field is valued with a couple of matrix products: parametric VaR
+# from one covariance matrix shared by all entrants, historical-simulation VaR from
+# the price path's recent moves. Entrants whose VaR (the larger of the two) exceeds
+# the tournament's var_limit are disqualified here, not by their own browser.
+TOURNAMENT_VAR_Z = 1.65              # one-tailed 95%, as the client check used
+TOURNAMENT_VAR_HISTORY = 120         # ticks of price path behind correlations and scenarios
+TOURNAMENT_VAR_MIN_HISTORY = 20      # fewer moves than this: uncorrelated, parametric only
+TOURNAMENT_RISK_SLOW_MS = 250        # passes slower than this are logged
+
+_HUB_DAILY_VOL = {h['name']: h['vol'] / 100 / math.sqrt(252)
+                  for hubs in TOURNAMENT_HUBS.values() for h in hubs}
+_risk_stats = {'passes': 0, 'last_ms': 0.0, 'max_ms': 0.0, 'tournaments': 0, 'entrants': 0,
+               'disqualified': 0}
+
+
+def _entrant_units(book, marks):
+    """(traders, hubs, prices, N x H net units) for ACTIVE entrants holding open positions.
+
+    A basis trade is long its hub and short its basis hub, so it adds units to both
+    columns and its risk is the differential's. One without marks for both hubs is
+    held at entry by the standings (_position_mark) and carries no risk here.
+    """
+    traders, hubs, prices, rows, cols, units = [], {}, [], [], [], []
+
+    def add(trader_row, hub, qty, price):
+        if hub not in hubs:
+            hubs[hub] = len(hubs)
+            prices.append(price)
+        rows.append(trader_row)
+        cols.append(hubs[hub])
+        units.append(qty)
+
+    for trader, entrant in book['entrants'].items():
+        if entrant['meta']['entry_status'] != 'ACTIVE' or not entrant['open']:
+            continue
+        for pos in entrant['open'].values():
+            qty = pos['mult'] * pos['volume']
+            if pos['basis'] is not None:
+                if marks.get(pos['hub']) and marks.get(pos['basis']):
+                    add(len(traders), pos['hub'], qty, marks[pos['hub']])
+                    add(len(traders), pos['basis'], -qty, marks[pos['basis']])
+                continue
+            # Same fallback as the standings when a hub has no mark
+            add(len(traders), pos['hub'], qty, marks.get(pos['hub']) or pos['entry'])
+        traders.append(trader)
+    matrix = np.zeros((len(traders), len(hubs)))
+    np.add.at(matrix, (rows, cols), units)
+    return traders, list(hubs), np.array(prices), matrix
+
+
+def tournament_var(book, marks, window=None):
+    """{trader: {parametric, historical, var}}, 1-day 95% VaR in dollars, for a book.
+
+    window is _price_window(...) for a sector tournament and supplies the hub
+    correlations and the historical scenarios (each hub's tick moves, demeaned,
+    standardised and scaled to its daily vol). Without it hubs are uncorrelated and historical is 0.
+    Call with _tourn_lock held.
+    """
+    traders, hubs, prices, units = _entrant_units(book, marks)
+    if not traders:
+        return {}
+    sigma = np.abs(prices) * np.array([_HUB_DAILY_VOL.get(h, 0.02) for h in hubs])  # $ per unit per day
+    corr = np.eye(len(hubs))
+    scenarios = None
+    if window is not None:
+        path_index = {h: i for i, h in enumerate(window[1])}
+        cols = [k for k, h in enumerate(hubs) if h in path_index]
+        moves = np.diff(window[2][:, [path_index[hubs[k]] for k in cols]], axis=0)
+        if cols and len(moves) >= TOURNAMENT_VAR_MIN_HISTORY:
+            moves -= moves.mean(axis=0)     # trend and weather drift aren't risk
+            std = moves.std(axis=0)
+            z = np.divide(moves, std, out=np.zeros_like(moves), where=std > 0)
+            sub = z.T @ z / len(z)
+            np.fill_diagonal(sub, 1.0)
+            corr[np.ix_(cols, cols)] = sub
+            scenarios = np.zeros((len(z), len(hubs)))
+            scenarios[:, cols] = z * sigma[cols]
+    cov = corr * np.outer(sigma, sigma)
+    parametric = TOURNAMENT_VAR_Z * np.sqrt(np.maximum(((units @ cov) * units).sum(axis=1), 0))
+    if scenarios is not None:
+        historical = np.maximum(-np.percentile(units @ scenarios.T, 5, axis=1), 0)
+    else:
+        historical = np.zeros(len(traders))
+    return {t: {'parametric': round(float(p), 2), 'historical': round(float(h), 2),
+                'var': round(float(max(p, h)), 2)}
+            for t, p, h in zip(traders, parametric, historical)}
+
+
+def _tournament_risk(conn, tourn):
+    """tournament_var for an ACTIVE tournament, valued at the same marks as its standings."""
+    window = _price_window(conn, tourn, TOURNAMENT_VAR_HISTORY + 1) if tourn['sector'] else None
+    marks = dict(zip(window[1], window[2][-1].tolist())) if window else _standings_marks(conn, tourn)
+    book = _tournament_book(conn, tourn)
+    with _tourn_lock:
+        return tournament_var(book, marks, window)
+
+
+def disqualify_tournament_entry(db, tourn, trader, reason, when=None):
+    """Disqualify an entrant and close their open positions at the marks. Caller commits.
+
+    Returns False if there was no entry to disqualify (missing or already DQ'd).
+    """
+    now = datetime.utcnow().isoformat() if when is None else when
+    changed = db.execute(
+        f"UPDATE {tournament_schema(db, tourn)}.tournament_entries SET status='DISQUALIFIED', disqualified_at=?, disqualification_reason=? "
+        "WHERE tournament_id=? AND trader_name=? AND IFNULL(status, '') != 'DISQUALIFIED'",
+        (now, reason, tourn['id'], trader)
+    ).rowcount
+    if changed and tourn['status'] == 'ACTIVE':
+        close_tournament_positions(db, tourn, reason, trader=trader, when=now)
+    return bool(changed)
+
+
+def tournament_risk_stats():
+    """Timing and size of the last risk pass (from whichever worker runs it)."""
+    if MULTI_WORKER:
+        shared = shared_get('tournament_risk_stats')
+        if shared:
+            return shared[0]
+    with _tourn_lock:
+        return dict(_risk_stats)
+
+
+def _tournament_risk_tick():
+    """Revalue VaR in every ACTIVE sector tournament with a limit and disqualify breaches.
+
+    Returns ([(tid, risk payload)], [(tid, disqualify payload)]) for the caller to emit.
+    """
+    started = time.perf_counter()
+    payloads, dqs, entrants = [], [], 0
+    conn = get_db_standalone()
+    try:
+        # Main-desk tournaments (no sector) never had a VaR disqualification; keep it that way
+        active = conn.execute("SELECT * FROM tournaments WHERE status='ACTIVE' AND var_limit > 0 "
+                              "AND IFNULL(sector, '') != ''").fetchall()
+        _mark_dirty_books()
+        for tourn in active:
+            tid, limit = tourn['id'], tourn['var_limit']
+            risk = _tournament_risk(conn, tourn)
+            entrants += len(risk)
+            now = datetime.utcnow().isoformat()
+            breached = []
+            for trader, r in risk.items():
+                if r['var'] > limit and disqualify_tournament_entry(conn, tourn, trader, 'VAR_LIMIT_EXCEEDED', now):
+                    breached.append(trader)
+            if breached:
+                conn.commit()
+                invalidate_tournament_standings(tid)
+                dqs += [(tid, {'tournament_id': tid, 'trader_name': t, 'reason': 'VAR_LIMIT_EXCEEDED',
+                               'var_amount': round(risk[t]['var']), 'var_limit': limit}) for t in breached]
+            payloads.append((tid, {'tournament_id': tid, 'var_limit': limit, 'risk': risk}))
+    finally:
+        conn.close()
+
+    elapsed = (time.perf_counter() - started) * 1000
+    with _tourn_lock:
+        _risk_stats['passes'] += 1
+        _risk_stats['last_ms'] = round(elapsed, 2)
+        _risk_stats['max_ms'] = round(max(_risk_stats['max_ms'], elapsed), 2)
+        _risk_stats['tournaments'] = len(payloads)
+        _risk_stats['entrants'] = entrants
+        _risk_stats['disqualified'] += len(dqs)
+        stats = dict(_risk_stats)
+    if elapsed > TOURNAMENT_RISK_SLOW_MS:
+        logger.warning(f"Tournament risk pass took {elapsed:.0f}ms "
+                       f"({len(payloads)} tournaments, {entrants} entrants)")
+    if MULTI_WORKER:
+        shared_put('tournament_risk_stats', stats)
+    return payloads, dqs
+
+
+@public_bp.route('/api/tournament/<int:tid>/risk', methods=['GET'])
+def get_tournament_risk(tid):
+    """Current VaR for each entrant holding open positions, with the tournament's limit."""
+    db = get_db()
+    tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if not tourn:
+        return jsonify({'success': False, 'error': 'Tournament not found'}), 404
+    if tourn['status'] != 'ACTIVE':
+        return jsonify({'success': False, 'error': 'Tournament not active'}), 400
+    risk = _tournament_risk(db, tourn)
+    return jsonify({'success': True, 'tournament_id': tid, 'var_limit': tourn['var_limit'] or 0, 'risk': risk})
+
+
+@background_job
+def _tournament_risk_loop():
+    """Recompute tournament VaR once per price tick and push it to each tournament's room."""
+    pushed = {}
+    while True:
+        socketio.sleep(TOURNAMENT_TICK_SECONDS)
+        try:
+            if not claim_lease('tournament_risk', max(3 * TOURNAMENT_TICK_SECONDS, 10)):
+                pushed.clear()
+                continue
+            payloads, dqs = run_blocking(_tournament_risk_tick)
+            for tid, payload in dqs:
+                socketio.emit('tournament_disqualify', payload, to=tournament_room(tid))
+            for tid, payload in payloads:
+                if pushed.get(tid) != payload['risk']:
+                    pushed[tid] = payload['risk']
+                    socketio.emit('tournament_risk', payload, to=tournament_room(tid))
+            for tid in set(pushed) - {tid for tid, _ in payloads}:
+                del pushed[tid]
+        except Exception as e:
+            logger.warning(f"Tournament risk pass failed: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Tournament Replay — compact append-only logs of sector tournaments
+# ---------------------------------------------------------------------------
+# One file per tournament under REPLAY_DIR: a JSON header, then length-prefixed records
+# stamped with milliseconds since the start. Prices are float32 frames, a keyframe every
+# REPLAY_KEYFRAME_EVERY ticks and deltas in between, taken against the frame a reader
+# reconstructs so rounding never accumulates. News flashes and trade opens/closes are
+# compact JSON. The recorder is its own job running a tick behind the engine off the
+# cached price path and the DB, so the tick and publish paths do no extra work. Logs are
+# files on the recording host: with workers on several hosts REPLAY_DIR must be shared
+# storage, or /replay answers 404 on the hosts that didn't record.
+REPLAY_DIR = os.environ.get('REPLAY_DIR', os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'replays'))
+REPLAY_KEYFRAME_EVERY = 64
+REPLAY_MAX_SPEED = 100
+# A record's payload length is 16 bits. News text is clipped so a record fits even at
+# 4 UTF-8 bytes per character
+REPLAY_HEADLINE_CHARS = 500
+REPLAY_DESCRIPTION_CHARS = 2000
+REPLAY_FIELD_CHARS = 200               # any other string in a news or trade record
+
+_REPLAY_MAGIC = b'EDR1'
+_REPLAY_RECORD = struct.Struct('<BIH')     # record type, ms since start, payload bytes
+_REPLAY_KEY, _REPLAY_DELTA, _REPLAY_NEWS, _REPLAY_TRADE, _REPLAY_END = 1, 2, 3, 4, 5
+
+_recorders = {}        # tid -> recorder state (open log, last frame, ids recorded)
+_replay_lock = _threading.Lock()
+_replay_stats = {'passes': 0, 'last_ms': 0.0, 'max_ms': 0.0, 'tournaments': 0, 'records': 0, 'bytes': 0}
+
+
+def replay_path(tid):
+    return os.path.join(REPLAY_DIR, f'tournament-{int(tid)}.edr')
+
+
+def _read_replay_header(f):
+    if f.read(4) != _REPLAY_MAGIC:
+        raise ValueError('not a tournament replay log')
+    (size,) = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(size))
+
+
+def _read_replay(f):
+    """Yield (type, ms, payload, end offset) after the header; stops at a torn last record."""
+    while True:
+        head = f.read(_REPLAY_RECORD.size)
+        if len(head) < _REPLAY_RECORD.size:
+            return
+        kind, t_ms, size = _REPLAY_RECORD.unpack(head)
+        payload = f.read(size)
+        if len(payload) < size:
+            return
+        yield kind, t_ms, payload, f.tell()
+
+
+def _replay_frame(kind, payload, frame):
+    """Prices after applying a keyframe or delta record to the previous frame."""
+    values = np.frombuffer(payload, dtype='<f4')
+    return values.copy() if kind == _REPLAY_KEY or frame is None else frame + values
+
+
+def _replay_record(kind, t_ms, body=None):
+    payload = body if isinstance(body, bytes) else (
+        json.dumps(body, separators=(',', ':'), ensure_ascii=False).encode('utf-8', 'replace') if body is not None else b'')
+    return _REPLAY_RECORD.pack(kind, min(max(int(t_ms), 0), 0xFFFFFFFF), len(payload)) + payload
+
+
+def _replay_ms(rec, ts, default):
+    try:
+        return (utc_seconds(ts) - rec['start']) * 1000
+    except (ValueError, TypeError):
+        return default
+
+
+def _open_recorder(tourn, hubs):
+    """Recorder state for a tournament, resuming its log if there is one (None once it has ended)."""
+    rec = {'tid': tourn['id'], 'path': replay_path(tourn['id']), 'start': utc_seconds(tourn['start_time']),
+           'hubs': hubs, 'tick': -1, 'frame': None, 'since_key': 0, 'trade_id': 0, 'open': set(),
+           'news': set(), 'file': None}
+    end = 0
+    if os.path.exists(rec['path']):
+        with open(rec['path'], 'rb') as f:
+            try:
+                header = _read_replay_header(f)
+            except (ValueError, struct.error):
+                header = None
+            if header and header['start'] == rec['start'] and header['hubs'] == hubs:
+                end = f.tell()
+                for kind, t_ms, payload, end in _read_replay(f):
+                    if kind == _REPLAY_END:
+                        return None
+                    if kind in (_REPLAY_KEY, _REPLAY_DELTA):
+                        rec['frame'] = _replay_frame(kind, payload, rec['frame'])
+                        rec['since_key'] = 0 if kind == _REPLAY_KEY else rec['since_key'] + 1
+                        rec['tick'] = round(t_ms / (TOURNAMENT_TICK_SECONDS * 1000))
+                    elif kind == _REPLAY_NEWS:
+                        rec['news'].add(json.loads(payload)['id'])
+                    elif kind == _REPLAY_TRADE:
+                        event = json.loads(payload)
+                        rec['trade_id'] = max(rec['trade_id'], event['id'])
+                        (rec['open'].add if event['event'] == 'open' else rec['open'].discard)(event['id'])
+    if end:
+        os.truncate(rec['path'], end)      # drop a record torn by a crash mid-write
+        rec['file'] = open(rec['path'], 'ab')
+    else:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        header = json.dumps({'tournament_id': tourn['id'], 'sector': tourn['sector'], 'hubs': hubs,
+                             'start': rec['start'], 'start_time': tourn['start_time'],
+                             'tick_seconds': TOURNAMENT_TICK_SECONDS}).encode()
+        rec['file'] = open(rec['path'], 'wb')
+        rec['file'].write(_REPLAY_MAGIC + struct.pack('<I', len(header)) + header)
+    return rec
+
+
+def _replay_trade(trade_id, trader, td, event):
+    out = {'id': trade_id, 'event': event, 'trader': trader, 'hub': td.get('hub'),
+           'trade_type': td.get('type'), 'direction': td.get('direction'), 'volume': td.get('volume')}
+    if event == 'open':
+        out['price'] = td.get('entryPrice')
+    else:
+        out.update(price=td.get('closePrice'), pnl=td.get('realizedPnl'), reason=td.get('closeReason'))
+    # trade_data comes from the client: keep its strings short enough for one record
+    return {k: _replay_clip(v) for k, v in out.items()}
+
+
+def _replay_clip(value):
+    return value[:REPLAY_FIELD_CHARS] if isinstance(value, str) else value
+
+
+def _record_tournament(conn, tourn, rec):
+    """Append what happened since the last pass; returns (records, bytes) written.
+
+    Works on a copy of the recorder's position (tick, frame, ids seen) and only moves
+    the recorder on once the records are written, so a pass that fails writes nothing
+    and the next one starts from the same place.
+    """
+    tid, records = tourn['id'], []
+    st = {'tick': rec['tick'], 'frame': rec['frame'], 'since_key': rec['since_key'],
+          'trade_id': rec['trade_id'], 'open': set(rec['open']), 'news': set(rec['news'])}
+    schema = tournament_schema(conn, tourn)
+    now_ms = (time.time() - rec['start']) * 1000
+
+    # A live tournament is recorded through the tick before the current one, which the
+    # engine has already computed and published. News and trades stamped at or after the
+    # end of that tick wait for the next pass, so records stay in time order across passes.
+    upto = _price_tick_at(tourn)
+    cutoff = None
+    if tourn['status'] == 'ACTIVE':
+        upto -= 1
+        cutoff = (upto + 1) * TOURNAMENT_TICK_SECONDS * 1000
+    behind = upto - st['tick']
+    window = _price_window(conn, tourn, behind + 1, upto) if behind > 0 else None
+    if window:
+        tick, _, frames = window
+        for k, prices in enumerate(frames.astype('<f4')):
+            at = tick - len(frames) + 1 + k
+            if at <= st['tick']:
+                continue
+            if st['frame'] is None or st['since_key'] + 1 >= REPLAY_KEYFRAME_EVERY:
+                kind, payload, st['frame'], st['since_key'] = _REPLAY_KEY, prices, prices, 0
+            else:
+                payload = (prices - st['frame']).astype('<f4')
+                kind, st['frame'] = _REPLAY_DELTA, st['frame'] + payload
+                st['since_key'] += 1
+            st['tick'] = at
+            records.append((at * TOURNAMENT_TICK_SECONDS * 1000, kind, payload.tobytes()))
+
+    for ev in conn.execute(
+        f"SELECT * FROM {schema}.tournament_news_events WHERE tournament_id=? AND status='FLASHED' "
+        "AND flashed_at IS NOT NULL ORDER BY flashed_at, id", (tid,)
+    ):
+        if ev['id'] in st['news']:
+            continue
+        at = _replay_ms(rec, ev['flashed_at'], now_ms)
+        if cutoff is not None and at >= cutoff:
+            continue
+        st['news'].add(ev['id'])
+        try:
+            hubs = json.loads(ev['affected_hubs'] or '[]')
+        except (ValueError, TypeError):
+            hubs = []
+        if not isinstance(hubs, list):
+            hubs = []
+        records.append((at, _REPLAY_NEWS, {
+            'id': ev['id'], 'headline': (ev['headline'] or '')[:REPLAY_HEADLINE_CHARS],
+            'description': (ev['description'] or '')[:REPLAY_DESCRIPTION_CHARS],
+            'category': _replay_clip(ev['category']), 'impact_type': _replay_clip(ev['impact_type']),
+            'impact_direction': _replay_clip(ev['impact_direction']), 'impact_pct': ev['impact_pct'],
+            'affected_hubs': [_replay_clip(h) for h in hubs[:len(rec['hubs'])] if isinstance(h, str)], 'is_noise': bool(ev['is_noise']),
+            'delay_seconds': ev['delay_seconds'], 'duration_ticks': ev['duration_ticks']}))
+
+    # New trades, plus the ones still open last pass (closes are json_set updates in place)
+    for row in conn.execute(
+        f"SELECT id, trader_name, trade_data, created_at FROM {schema}.tournament_trades WHERE tournament_id=? "
+        "AND (id > ? OR id IN (SELECT value FROM json_each(?))) ORDER BY id",
+        (tid, st['trade_id'], json.dumps(sorted(st['open'])))
+    ):
+        try:
+            td = json.loads(row['trade_data'])
+        except (ValueError, TypeError):
+            continue
+        new = row['id'] > st['trade_id']
+        if new:
+            at = _replay_ms(rec, td.get('timestamp') or row['created_at'], now_ms)
+            if cutoff is not None and at >= cutoff:
+                break       # rows come in id order: this and later trades wait for the next pass
+            st['trade_id'] = row['id']
+            records.append((at, _REPLAY_TRADE, _replay_trade(row['id'], row['trader_name'], td, 'open')))
+        if td.get('status') == 'CLOSED' and (new or row['id'] in st['open']):
+            at = _replay_ms(rec, td.get('closedAt'), now_ms)
+            if cutoff is not None and at >= cutoff:
+                st['open'].add(row['id'])      # close it on a later pass
+                continue
+            st['open'].discard(row['id'])
+            records.append((at, _REPLAY_TRADE, _replay_trade(row['id'], row['trader_name'], td, 'close')))
+        elif new and td.get('status') == 'OPEN':
+            st['open'].add(row['id'])
+
+    if tourn['status'] != 'ACTIVE':
+        records.append((_replay_ms(rec, tourn['end_time'], now_ms), _REPLAY_END, None))
+    records.sort(key=lambda r: r[0])
+    data = b''.join(_replay_record(kind, t_ms, body) for t_ms, kind, body in records)
+    if data:
+        end = rec['file'].tell()
+        try:
+            rec['file'].write(data)
+            rec['file'].flush()
+        except OSError:
+            rec['file'].truncate(end)       # no half-written pass for the next one to append to
+            raise
+    rec.update(st)
+    return len(records), len(data)
+
+
+def _close_recorder(tid):
+    rec = _recorders.pop(tid, None)
+    if rec and rec['file']:
+        rec['file'].close()
+
+
+def close_tournament_replays():
+    """Close every open replay log (the recorder lease moved to another worker)."""
+    with _replay_lock:
+        for tid in list(_recorders):
+            _close_recorder(tid)
+
+
+def drop_tournament_replay(tid=None):
+    """Delete a tournament's replay log, or every log."""
+    with _replay_lock:
+        for t in ([tid] if tid is not None else list(_recorders)):
+            _close_recorder(t)
+        try:
+            names = [os.path.basename(replay_path(tid))] if tid is not None else os.listdir(REPLAY_DIR)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith('tournament-') and name.endswith('.edr'):
+                try:
+                    os.remove(os.path.join(REPLAY_DIR, name))
+                except OSError:
+                    pass
+
+
+def tournament_replay_stats():
+    """Timing and output of the last recorder pass (from whichever worker runs it)."""
+    if MULTI_WORKER:
+        shared = shared_get('tournament_replay_stats')
+        if shared:
+            return shared[0]
+    with _replay_lock:
+        return dict(_replay_stats)
+
+
+def _unfinished_replays(conn):
+    """Ids of logs on disk without an END record, for tournaments no longer ACTIVE."""
+    try:
+        names = os.listdir(REPLAY_DIR)
+    except OSError:
+        return []
+    ids = []
+    for name in names:
+        if not (name.startswith('tournament-') and name.endswith('.edr')):
+            continue
+        try:
+            tid = int(name[len('tournament-'):-len('.edr')])
+            with open(os.path.join(REPLAY_DIR, name), 'rb') as f:
+                f.seek(-_REPLAY_RECORD.size, os.SEEK_END)
+                kind, _, size = _REPLAY_RECORD.unpack(f.read())
+        except (ValueError, OSError, struct.error):
+            continue
+        if (kind, size) != (_REPLAY_END, 0):
+            ids.append(tid)
+    if not ids:
+        return []
+    return [r['id'] for r in conn.execute(
+        "SELECT id FROM tournaments WHERE status != 'ACTIVE' AND id IN (SELECT value FROM json_each(?))",
+        (json.dumps(ids),))]
+
+
+def _tournament_replay_tick(sweep=False):
+    """Record every live sector tournament, then finish the logs of ones that have ended.
+
+    sweep also finishes logs left without an END record by a restart.
+    """
+    started = time.perf_counter()
+    written = total = 0
+    conn = get_db_standalone()
+    try:
+        live = conn.execute(
+            "SELECT * FROM tournaments WHERE status='ACTIVE' AND IFNULL(sector, '') != '' "
+            "AND start_time IS NOT NULL"
+        ).fetchall()
+        with _replay_lock:
+            ended = set(_recorders) - {t['id'] for t in live}
+        if sweep:
+            ended.update(_unfinished_replays(conn))
+        finished = conn.execute(
+            "SELECT * FROM tournaments WHERE id IN (SELECT value FROM json_each(?)) "
+            "AND IFNULL(sector, '') != '' AND start_time IS NOT NULL", (json.dumps(sorted(ended)),)
+        ).fetchall()
+        with _replay_lock:
+            for tid in ended - {t['id'] for t in finished}:
+                _close_recorder(tid)        # deleted from under us
+            for tourn in list(live) + list(finished):
+                rec = _recorders.get(tourn['id'])
+                if rec is None:
+                    hubs = [h['name'] for h in TOURNAMENT_HUBS.get(tourn['sector'].lower(), [])]
+                    rec = _open_recorder(tourn, hubs) if hubs else None
+                    if rec is None:
+                        continue
+                    _recorders[tourn['id']] = rec
+                try:
+                    n, size = _record_tournament(conn, tourn, rec)
+                except Exception as e:
+                    logger.warning(f"Replay recording for tournament {tourn['id']} failed: {e}")
+                    continue
+                written, total = written + n, total + size
+                if tourn['status'] != 'ACTIVE':
+                    _close_recorder(tourn['id'])
+    finally:
+        conn.close()
+
+    elapsed = (time.perf_counter() - started) * 1000
+    with _replay_lock:
+        _replay_stats['passes'] += 1
+        _replay_stats['last_ms'] = round(elapsed, 2)
+        _replay_stats['max_ms'] = round(max(_replay_stats['max_ms'], elapsed), 2)
+        _replay_stats['tournaments'] = len(_recorders)
+        _replay_stats['records'] += written
+        _replay_stats['bytes'] += total
+        stats = dict(_replay_stats)
+    if MULTI_WORKER:
+        shared_put('tournament_replay_stats', stats)
+
+
+@background_job
+def _tournament_replay_loop():
+    """Append each live sector tournament's ticks, news and trades to its replay log once per tick."""
+    swept = False
+    while True:
+        socketio.sleep(TOURNAMENT_TICK_SECONDS)
+        try:
+            if not claim_lease('tournament_replay', max(3 * TOURNAMENT_TICK_SECONDS, 10)):
+                close_tournament_replays()
+                swept = False
+                continue
+            run_blocking(_tournament_replay_tick, not swept)
+            swept = True
+        except Exception as e:
+            logger.warning(f"Tournament replay pass failed: {e}")
+
+
+def _replay_stream(path, t_from, t_to, speed):
+    """NDJSON lines for the records between t_from and t_to seconds, paced at speed x real time."""
+    with open(path, 'rb') as f:
+        header = _read_replay_header(f)
+        hubs, tick_ms = header['hubs'], header['tick_seconds'] * 1000
+        yield json.dumps(dict(header, type='header', speed=speed)) + '\n'
+        frame, first, began = None, None, time.monotonic()
+        for kind, t_ms, payload, _ in _read_replay(f):
+            if kind in (_REPLAY_KEY, _REPLAY_DELTA):
+                frame = _replay_frame(kind, payload, frame)     # deltas before the window still count
+            if t_ms < t_from * 1000:
+                continue
+            if t_to is not None and t_ms > t_to * 1000:
+                break
+            if speed:
+                first = t_ms if first is None else first
+                wait = (t_ms - first) / 1000 / speed - (time.monotonic() - began)
+                if wait > 0:
+                    socketio.sleep(wait)
+            if kind in (_REPLAY_KEY, _REPLAY_DELTA):
+                event = {'type': 'prices', 'tick': round(t_ms / tick_ms),
+                         'prices': {h: float('%.7g' % p) for h, p in zip(hubs, frame.tolist())}}  # float32 digits
+            elif kind == _REPLAY_NEWS:
+                event = dict(json.loads(payload), type='news')
+            elif kind == _REPLAY_TRADE:
+                event = dict(json.loads(payload), type='trade')
+            else:
+                event = {'type': 'end'}
+            event['t'] = t_ms / 1000
+            yield json.dumps(event) + '\n'
+
+
+@public_bp.route('/api/tournament/<int:tid>/replay', methods=['GET'])
+def replay_tournament(tid):
+    """Stream a tournament's recorded ticks, news and trades as NDJSON.
+
+    ?from= and ?to= bound the window in seconds since the start; ?speed= paces it at that
+    multiple of real time (0, the default, streams as fast as it can be read). A live
+    tournament's replay needs the admin PIN, since it shows news impact before it plays out.
+    """
+    db = get_db()
+    tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    if not tourn:
+        return jsonify({'success': False, 'error': 'Tournament not found'}), 404
+    if tourn['status'] == 'ACTIVE' and not verify_admin_pin(request.headers.get('X-Admin-Pin', '')):
+        return jsonify({'success': False, 'error': 'Replay of a live tournament requires admin PIN'}), 403
+    path = replay_path(tid)
+    if not os.path.exists(path):
+        return jsonify({'success': False, 'error': 'No replay recorded for this tournament'}), 404
+    t_from = max(request.args.get('from', 0, type=float), 0)
+    t_to = request.args.get('to', type=float)
+    speed = min(max(request.args.get('speed', 0, type=float), 0), REPLAY_MAX_SPEED)
+    return Response(_replay_stream(path, t_from, t_to, speed), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': f'inline; filename=tournament-{tid}-replay.ndjson'})
@@ -1,5 +1,91 @@
-from waitress import serve
-from app import app
+"""Production entry point: Flask + Socket.IO on a cooperative (gevent) worker.
+
+Every long-poll or WebSocket client is a greenlet instead of an OS thread, so one
+process holds thousands of sockets. Select the worker with SOCKETIO_ASYNC_MODE
+('gevent' default, 'eventlet', or 'threading' to reproduce the dev server).
+
+WORKERS=N (with SOCKETIO_MESSAGE_QUEUE set) starts N worker processes on ports
+PORT..PORT+N-1 behind a sticky-session load balancer; see README.
+"""
+import os
+import sys
+import time
+import signal
+import subprocess
+
+ASYNC_MODE = os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'gevent')
+
+# Monkey-patching has to happen before anything imports socket/threading/ssl
+if ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+elif ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from app import app, socketio, init_db, start_background_jobs, logger
+
+
+WORKER_RESTART_DELAY = 1.0     # seconds; doubles (up to 60) while a worker keeps crashing on startup
+WORKER_STABLE_AFTER = 60.0     # a worker that ran this long resets its restart delay
+
+
+def run_workers(count, port):
+    """Supervise `count` single-process workers on consecutive ports until interrupted.
+
+    A worker that exits is started again on its port. Its sockets reconnect through the
+    load balancer and its leases pass to another worker in the meantime.
+    """
+    if not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+        sys.exit('WORKERS > 1 needs SOCKETIO_MESSAGE_QUEUE so emits reach clients on every worker')
+    init_db()
+
+    def spawn(i):
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                env=dict(os.environ, WORKERS='1', PORT=str(port + i), WORKER_ID=f'w{i}'))
+
+    children = [spawn(i) for i in range(count)]
+    started = [time.time()] * count
+    delay = [WORKER_RESTART_DELAY] * count
+    restart_at = [None] * count
+    logger.info(f"Started {count} workers on ports {port}-{port + count - 1}")
+    try:
+        while True:
+            time.sleep(0.5)
+            now = time.time()
+            for i, child in enumerate(children):
+                if restart_at[i] is None and child.poll() is not None:
+                    if now - started[i] >= WORKER_STABLE_AFTER:
+                        delay[i] = WORKER_RESTART_DELAY
+                    logger.warning(f"Worker w{i} (port {port + i}) exited with code {child.returncode}; "
+                                   f"restarting in {delay[i]:.0f}s")
+                    restart_at[i] = now + delay[i]
+                    delay[i] = min(delay[i] * 2, 60.0)
+                elif restart_at[i] is not None and now >= restart_at[i]:
+                    children[i], started[i], restart_at[i] = spawn(i), now, None
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            if child.poll() is None:
+                child.send_signal(signal.SIGINT)
+        for child in children:
+            try:
+                child.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                child.kill()
 
 if __name__ == '__main__':
-    serve(app, host='0.0.0.0', port=8000)
+    host = os.environ.get('HOST', '0.0.0.0')
+    port = int(os.environ.get('PORT', 8000))
+    workers = int(os.environ.get('WORKERS', 1))
+    if workers > 1:
+        run_workers(workers, port)
+        sys.exit(0)
+
+    init_db()
+    start_background_jobs()
+
+    logger.info(f"Starting Energy Desk ({ASYNC_MODE}) on {host}:{port}")
+    socketio.run(app, host=host, port=port,
+                 allow_unsafe_werkzeug=(ASYNC_MODE == 'threading'))
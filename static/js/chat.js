@@ -9,6 +9,11 @@ let CHAT_STATE = {
   showingAddMembers: false,
   pollTimer: null,
   lastMsgId: null,
+  msgConvId: null,     // conversation whose history is in `messages`
+  messages: [],        // loaded history, oldest first (may span several pages)
+  hasOlder: false,
+  loadingOlder: false,
+  senders: {},         // trader_name -> profile, sent once per conversation
   onlineTraders: new Set()
 };
 
@@ -240,11 +245,39 @@ async function openConvo(convId) {
   }
 }
 
+function _messagesUrl(convId, params) {
+  const q = new URLSearchParams(Object.assign({
+    trader: STATE.trader.trader_name,
+    known_senders: Object.keys(CHAT_STATE.senders).join(',')
+  }, params));
+  return API_BASE+'/api/chat/messages/'+convId+'?'+q.toString();
+}
+
+// Pages carry only the sender name; profiles arrive once in d.senders and are cached
+function _hydrateMessages(d) {
+  Object.assign(CHAT_STATE.senders, d.senders || {});
+  return d.messages.map(m => Object.assign({}, CHAT_STATE.senders[m.sender] ||
+    {display_name: m.sender, photo_url: '', team_name: '', team_color: '#888'}, m));
+}
+
 async function loadMessages(convId, isPolling) {
   try {
-    const r = await fetch(API_BASE+'/api/chat/messages/'+convId+'?trader='+encodeURIComponent(STATE.trader.trader_name));
+    if (CHAT_STATE.msgConvId !== convId) {
+      CHAT_STATE.msgConvId = convId;
+      CHAT_STATE.messages = [];
+      CHAT_STATE.senders = {};
+      CHAT_STATE.hasOlder = false;
+    }
+    const r = await fetch(_messagesUrl(convId, {}));
     const d = await r.json();
-    if(d.success) renderMessages(d.messages, isPolling);
+    if(d.success) {
+      const page = _hydrateMessages(d);
+      // The latest page replaces what it covers; older pages already scrolled in stay
+      const older = page.length ? CHAT_STATE.messages.filter(m => m.id < page[0].id) : [];
+      if (!older.length) CHAT_STATE.hasOlder = d.has_more;
+      CHAT_STATE.messages = older.concat(page);
+      renderMessages(CHAT_STATE.messages, isPolling);
+    }
     // Mark as read
     fetch(API_BASE+'/api/chat/mark-read/'+convId+'/'+encodeURIComponent(STATE.trader.trader_name),{method:'POST'}).catch(()=>{});
     const c = CHAT_STATE.conversations.find(c=>c.id===convId);
@@ -255,6 +288,44 @@ async function loadMessages(convId, isPolling) {
   } catch(e) {}
 }
 
+// Incremental catch-up (new_message push, socket reconnect): only ids after the last one held
+async function syncMessages(convId) {
+  const msgs = CHAT_STATE.messages;
+  if (CHAT_STATE.msgConvId !== convId || !msgs.length) return loadMessages(convId, true);
+  try {
+    const r = await fetch(_messagesUrl(convId, {after_id: msgs[msgs.length - 1].id}));
+    const d = await r.json();
+    if (!d.success || CHAT_STATE.msgConvId !== convId) return;
+    if (d.has_more) {
+      // Too far behind to stitch — start again from the latest page
+      CHAT_STATE.messages = [];
+      return loadMessages(convId, true);
+    }
+    if (!d.messages.length) return;
+    CHAT_STATE.messages = msgs.concat(_hydrateMessages(d));
+    renderMessages(CHAT_STATE.messages, true);
+    const c = CHAT_STATE.conversations.find(c=>c.id===convId);
+    if(c) c.unread = 0;
+    updateUnreadBadge();
+  } catch(e) {}
+}
+
+async function loadOlderMessages() {
+  const convId = CHAT_STATE.msgConvId;
+  if (!CHAT_STATE.hasOlder || CHAT_STATE.loadingOlder || !CHAT_STATE.messages.length) return;
+  CHAT_STATE.loadingOlder = true;
+  try {
+    const r = await fetch(_messagesUrl(convId, {before_id: CHAT_STATE.messages[0].id}));
+    const d = await r.json();
+    if (d.success && CHAT_STATE.msgConvId === convId) {
+      CHAT_STATE.hasOlder = d.has_more;
+      CHAT_STATE.messages = _hydrateMessages(d).concat(CHAT_STATE.messages);
+      renderMessages(CHAT_STATE.messages, true, true);
+    }
+  } catch(e) {}
+  CHAT_STATE.loadingOlder = false;
+}
+
 async function renderBroadcastBanner() {
   const banner = document.getElementById('chatBroadcastBanner');
   if (!banner) return;
@@ -280,9 +351,11 @@ async function renderBroadcastBanner() {
 }
 function _escHtml(s) { const d = document.createElement('div'); d.textContent = s; return d.innerHTML; }
 
-function renderMessages(msgs, isPolling) {
+function renderMessages(msgs, isPolling, keepAnchor) {
   const container = document.getElementById('chatMessages');
   if (!container) return;
+  // Scrolling to the top pages in older history
+  container.onscroll = function() { if (container.scrollTop < 40) loadOlderMessages(); };
 
   // Remember scroll position — only auto-scroll if already near bottom
   const wasNearBottom = container.scrollHeight - container.scrollTop - container.clientHeight < 60;
@@ -376,8 +449,13 @@ function renderMessages(msgs, isPolling) {
 
   if (isPolling) container.classList.add('no-anim');
   const savedScroll = container.scrollTop;
+  const prevHeight = container.scrollHeight;
   container.innerHTML = html;
-  if (isPolling) {
+  if (keepAnchor) {
+    // Older messages were prepended — keep the current view where it was
+    requestAnimationFrame(() => container.classList.remove('no-anim'));
+    container.scrollTop = savedScroll + (container.scrollHeight - prevHeight);
+  } else if (isPolling) {
     // Defer removal so browser renders one frame with animation:none
     requestAnimationFrame(() => container.classList.remove('no-anim'));
     // Preserve scroll position unless new messages arrived
@@ -1207,6 +1285,19 @@ if(typeof io !== 'undefined') {
         if (STATE.trader && STATE.trader.trader_name) {
           sock.emit('register_trader', { trader_name: STATE.trader.trader_name });
         }
+        // (Re)subscribe to leaderboard pushes; the server replies with a full snapshot
+        sock.emit('subscribe_leaderboard');
+        // Catch up on anything missed while disconnected
+        if (CHAT_STATE.activeConvo) syncMessages(CHAT_STATE.activeConvo.id);
+        if (typeof syncTournamentPrices === 'function') syncTournamentPrices();
+      });
+      sock.on('leaderboard_snapshot', function(data) { applyLeaderboardSnapshot(data); });
+      sock.on('leaderboard_diff', function(data) { applyLeaderboardDiff(data); });
+      sock.on('tournament_prices', function(data) {
+        if (typeof applyTournamentTick === 'function') applyTournamentTick(data);
+      });
+      sock.on('tournament_standings', function(data) {
+        if (typeof applyTournamentStandings === 'function') applyTournamentStandings(data);
       });
       sock.on('session_revoked', function() {
         localStorage.removeItem('ng_trader');
@@ -1217,13 +1308,13 @@ if(typeof io !== 'undefined') {
         // Ignore own messages
         if(data.sender === (STATE.trader||{}).trader_name) {
           if(CHAT_STATE.activeConvo && CHAT_STATE.activeConvo.id === data.conversation_id) {
-            loadMessages(data.conversation_id);
+            syncMessages(data.conversation_id);
           }
           return;
         }
         // If chat is open and viewing this conversation, refresh
         if(CHAT_STATE.activeConvo && CHAT_STATE.activeConvo.id === data.conversation_id) {
-          loadMessages(data.conversation_id);
+          syncMessages(data.conversation_id);
         } else {
           // Increment unread
           const c = CHAT_STATE.conversations.find(c=>c.id===data.conversation_id);
@@ -1393,12 +1484,18 @@ if(typeof io !== 'undefined') {
       sock.on('tournament_disqualify', function(data) {
         if (STATE.trader && data.trader_name === STATE.trader.trader_name) {
           STATE.tournamentDisqualified = true;
-          if (typeof addNotification === 'function') addNotification('tournament', 'DISQUALIFIED', data.reason || 'VaR limit exceeded');
+          var why = data.var_amount ? 'VaR $' + Math.round(data.var_amount).toLocaleString() + ' exceeded limit $' + Math.round(data.var_limit).toLocaleString() : (data.reason || 'VaR limit exceeded');
+          if (typeof addNotification === 'function') addNotification('tournament', 'DISQUALIFIED', why);
           toast('You have been disqualified from the tournament', 'error');
+          // The server already closed our positions at its marks; mirror that locally
+          if (typeof forceCloseTournamentPositions === 'function') forceCloseTournamentPositions(data.reason || 'VAR_LIMIT_EXCEEDED');
           if (typeof _showTournamentDQ === 'function') _showTournamentDQ();
         }
         if (typeof renderCurrentPage === 'function') renderCurrentPage();
       });
+      sock.on('tournament_risk', function(data) {
+        if (typeof applyTournamentRisk === 'function') applyTournamentRisk(data);
+      });
       sock.on('tournament_update', function(data) {
         // Existing handler — refresh tournament data
         if (typeof fetchActiveTournament === 'function') fetchActiveTournament();
@@ -1484,6 +1581,7 @@ const CALL_STATE = {
   localStream: null,
   remoteStream: null,
   remoteTarget: null,
+  remoteSid: null,        // the partner's socket once the call is answered (they may have several tabs)
   remotePhoto: null,
   isCaller: false,
   muted: false,
@@ -1499,6 +1597,7 @@ const CALL_STATE = {
   pendingCandidates: [],
   incomingOffer: null,
   incomingCaller: null,
+  incomingSid: null,
   incomingCallType: 'audio',
   incomingDismissTimeout: null,
   remoteAudio: null
@@ -1610,7 +1709,7 @@ async function startCall(type) {
 
     CALL_STATE.peer.onicecandidate = (e) => {
       if (e.candidate && typeof socket !== 'undefined') {
-        socket.emit('call_ice', { target: CALL_STATE.remoteTarget, candidate: e.candidate, from: STATE.trader.trader_name });
+        socket.emit('call_ice', { target: CALL_STATE.remoteTarget, target_sid: CALL_STATE.remoteSid, candidate: e.candidate, from: STATE.trader.trader_name });
       }
     };
 
@@ -1657,6 +1756,7 @@ async function startCall(type) {
               socket.emit('call_restart', {
                 from: STATE.trader.trader_name,
                 target: CALL_STATE.remoteTarget,
+                target_sid: CALL_STATE.remoteSid,
                 offer: CALL_STATE.peer.localDescription
               });
             }
@@ -1728,6 +1828,7 @@ async function acceptCall() {
   CALL_STATE.active = true;
   CALL_STATE.isCaller = false;
   CALL_STATE.remoteTarget = CALL_STATE.incomingCaller;
+  CALL_STATE.remoteSid = CALL_STATE.incomingSid;
   CALL_STATE.remotePhoto = callerPhoto;
   CALL_STATE.muted = false;
   CALL_STATE.videoOff = false;
@@ -1750,7 +1851,7 @@ async function acceptCall() {
 
     CALL_STATE.peer.onicecandidate = (e) => {
       if (e.candidate && typeof socket !== 'undefined') {
-        socket.emit('call_ice', { target: CALL_STATE.remoteTarget, candidate: e.candidate, from: STATE.trader.trader_name });
+        socket.emit('call_ice', { target: CALL_STATE.remoteTarget, target_sid: CALL_STATE.remoteSid, candidate: e.candidate, from: STATE.trader.trader_name });
       }
     };
 
@@ -1807,6 +1908,7 @@ async function acceptCall() {
     if (typeof socket !== 'undefined') {
       socket.emit('call_answer', {
         caller: CALL_STATE.incomingCaller,
+        target_sid: CALL_STATE.remoteSid,
         callee: STATE.trader.trader_name,
         answer: CALL_STATE.peer.localDescription,
         callType: type
@@ -1819,6 +1921,7 @@ async function acceptCall() {
 
   CALL_STATE.incomingOffer = null;
   CALL_STATE.incomingCaller = null;
+  CALL_STATE.incomingSid = null;
   CALL_STATE.incomingCallType = 'audio';
 }
 
@@ -1826,13 +1929,19 @@ async function acceptCall() {
 function acceptVoiceCall() { acceptCall(); }
 
 function rejectCall() {
-  if (CALL_STATE.incomingDismissTimeout) { clearTimeout(CALL_STATE.incomingDismissTimeout); CALL_STATE.incomingDismissTimeout = null; }
-  document.getElementById('callIncoming').style.display = 'none';
   if (typeof socket !== 'undefined' && CALL_STATE.incomingCaller) {
-    socket.emit('call_reject', { caller: CALL_STATE.incomingCaller, callee: STATE.trader ? STATE.trader.trader_name : '' });
+    socket.emit('call_reject', { caller: CALL_STATE.incomingCaller, target_sid: CALL_STATE.incomingSid, callee: STATE.trader ? STATE.trader.trader_name : '' });
   }
+  _dismissIncomingCall();
+}
+
+// Stop ringing without answering (declined here, or answered/declined/cancelled elsewhere)
+function _dismissIncomingCall() {
+  if (CALL_STATE.incomingDismissTimeout) { clearTimeout(CALL_STATE.incomingDismissTimeout); CALL_STATE.incomingDismissTimeout = null; }
+  document.getElementById('callIncoming').style.display = 'none';
   CALL_STATE.incomingOffer = null;
   CALL_STATE.incomingCaller = null;
+  CALL_STATE.incomingSid = null;
   CALL_STATE.incomingCallType = 'audio';
   CALL_STATE.pendingCandidates = [];
 }
@@ -1842,10 +1951,11 @@ function endCall() {
   if (!CALL_STATE.active && !CALL_STATE.peer) return; // guard against double-end
   // Capture target before cleanup clears it
   const target = CALL_STATE.remoteTarget;
+  const targetSid = CALL_STATE.remoteSid;
   endCallLocal();
   // Send end signal after cleanup so we don't react to our own signal
   if (typeof socket !== 'undefined' && target) {
-    socket.emit('call_end', { target, from: STATE.trader ? STATE.trader.trader_name : '' });
+    socket.emit('call_end', { target, target_sid: targetSid, from: STATE.trader ? STATE.trader.trader_name : '' });
   }
 }
 function endVoiceCall() { endCall(); }
@@ -1869,6 +1979,7 @@ function endCallLocal() {
 
   CALL_STATE.active = false;
   CALL_STATE.remoteTarget = null;
+  CALL_STATE.remoteSid = null;
   CALL_STATE.remotePhoto = null;
   CALL_STATE.isCaller = false;
   CALL_STATE.muted = false;
@@ -1880,6 +1991,7 @@ function endCallLocal() {
   CALL_STATE.pendingCandidates = [];
   CALL_STATE.incomingOffer = null;
   CALL_STATE.incomingCaller = null;
+  CALL_STATE.incomingSid = null;
   CALL_STATE.incomingCallType = 'audio';
 
   // Clear video elements
@@ -2030,10 +2142,11 @@ function initCallSocketListeners() {
 
   socket.on('call_incoming', (data) => {
     if (CALL_STATE.active) {
-      socket.emit('call_reject', { caller: data.caller, callee: STATE.trader ? STATE.trader.trader_name : '' });
+      socket.emit('call_reject', { caller: data.caller, target_sid: data.sid, callee: STATE.trader ? STATE.trader.trader_name : '' });
       return;
     }
     CALL_STATE.incomingCaller = data.caller;
+    CALL_STATE.incomingSid = data.sid || null;
     CALL_STATE.incomingOffer = data.offer;
     CALL_STATE.incomingCallType = data.callType || 'audio';
     CALL_STATE.pendingCandidates = [];
@@ -2066,6 +2179,7 @@ function initCallSocketListeners() {
       if (typeof socket !== 'undefined') {
         socket.emit('call_answer', {
           caller: data.from,
+          target_sid: CALL_STATE.remoteSid,
           callee: STATE.trader.trader_name,
           answer: CALL_STATE.peer.localDescription
         });
@@ -2077,6 +2191,7 @@ function initCallSocketListeners() {
 
   socket.on('call_answered', async (data) => {
     if (!CALL_STATE.peer) return;
+    if (data.sid) CALL_STATE.remoteSid = data.sid;     // the tab that picked up
     try {
       // If callee downgraded from video to audio, update our UI
       if (data.callType === 'audio' && CALL_STATE.callType === 'video') {
@@ -2114,9 +2229,16 @@ function initCallSocketListeners() {
     if (CALL_STATE.active && (!data.from || data.from === CALL_STATE.remoteTarget)) {
       toast('Call ended', 'info');
       endCallLocal();
+    } else if (!CALL_STATE.active && data.from && data.from === CALL_STATE.incomingCaller) {
+      _dismissIncomingCall();     // caller hung up while we were ringing
     }
   });
 
+  // Another of our tabs answered or declined this call
+  socket.on('call_dismissed', (data) => {
+    if (!CALL_STATE.active && data.caller === CALL_STATE.incomingCaller) _dismissIncomingCall();
+  });
+
   socket.on('call_rejected', (data) => {
     toast((data.callee || 'User') + ' declined the call', 'info');
     endCallLocal();
@@ -593,9 +593,6 @@ function runTickEngines() {
   checkAlerts();
   checkCalendarAlerts();
   // Tournament engines
-  if (typeof tickTournamentPrices === 'function') tickTournamentPrices();
-  if (typeof checkTournamentVaR === 'function') checkTournamentVaR();
-  if (typeof checkTournamentTimer === 'function') checkTournamentTimer();
   if (typeof processStopLossTournament === 'function') processStopLossTournament();
 }
 
@@ -986,63 +983,20 @@ async function loadRecentBroadcasts() {
 }
 
 /* =====================================================================
-   TOURNAMENT ENGINES — VaR check, timer, stop-loss, force-close
+   TOURNAMENT ENGINES — VaR display, stop-loss, force-close
    ===================================================================== */
 
-// Check tournament timer — auto-end when time expires
-function checkTournamentTimer() {
-  if (typeof isTournamentMode !== 'function' || !isTournamentMode()) return;
-  if (!STATE.tournament || !STATE.tournament.end_time) return;
-  // Server sends UTC ISO strings — ensure 'Z' suffix for correct parsing
-  var etStr = STATE.tournament.end_time;
-  if (etStr && !etStr.endsWith('Z') && !etStr.includes('+')) etStr += 'Z';
-  var endTime = new Date(etStr).getTime();
-  if (Date.now() >= endTime) {
-    // Auto-end: force close positions and show results
-    forceCloseTournamentPositions('TOURNAMENT_ENDED');
-  }
-}
-
-// Check VaR against tournament limit
-function checkTournamentVaR() {
-  if (typeof isTournamentMode !== 'function' || !isTournamentMode()) return;
-  if (!STATE.tournament || !STATE.tournament.var_limit || STATE.tournament.var_limit <= 0) return;
-  if (STATE.tournamentDisqualified) return;
-
-  // Calculate parametric VaR(95%) from open tournament positions
-  var openTrades = STATE.tournamentTrades.filter(function(t) { return t.status === 'OPEN'; });
-  if (openTrades.length === 0) return;
-
-  var totalVar = 0;
-  for (var i = 0; i < openTrades.length; i++) {
-    var t = openTrades[i];
-    var price = getPrice(t.hub);
-    if (!price || price <= 0) continue;
-    var vol = parseFloat(t.volume) || 0;
-    var notional = price * vol;
-    // Simple parametric VaR: 1.65 * daily_vol * sqrt(1) * notional
-    var hub = findHub(t.hub);
-    var dailyVol = hub ? (hub.vol / 100 / Math.sqrt(252)) : 0.02;
-    var posVar = 1.65 * dailyVol * notional;
-    totalVar += posVar;
-  }
-
-  if (totalVar > STATE.tournament.var_limit) {
-    // Disqualify
-    STATE.tournamentDisqualified = true;
-    addNotification('tournament', 'DISQUALIFIED', 'VaR $' + Math.round(totalVar).toLocaleString() + ' exceeded limit $' + Math.round(STATE.tournament.var_limit).toLocaleString());
-    toast('Tournament DISQUALIFIED — VaR limit exceeded', 'error');
-    // Force close all open positions
-    forceCloseTournamentPositions('VAR_LIMIT_EXCEEDED');
-    // Notify server
-    if (STATE.trader && STATE.tournament) {
-      fetch(API_BASE + '/api/tournament/' + STATE.tournament.id + '/disqualify/' + STATE.trader.trader_name, {
-        method: 'POST',
-        headers: tradeHeaders(),
-        body: JSON.stringify({ reason: 'VAR_LIMIT_EXCEEDED', var_amount: Math.round(totalVar) })
-      }).catch(function() {});
-    }
-    if (typeof _showTournamentDQ === 'function') _showTournamentDQ();
+// Server VaR push for the tournament room. Breaches are disqualified server-side
+// (tournament_disqualify); here we only keep our own figure and warn near the limit.
+function applyTournamentRisk(data) {
+  if (!STATE.tournament || !data || data.tournament_id !== STATE.tournament.id || !STATE.trader) return;
+  var mine = (data.risk || {})[STATE.trader.trader_name] || { parametric: 0, historical: 0, var: 0 };
+  var limit = data.var_limit || 0;
+  var wasNear = STATE.tournamentRisk && STATE.tournamentRisk.near;
+  mine.near = limit > 0 && mine.var > limit * 0.8;
+  STATE.tournamentRisk = mine;
+  if (mine.near && !wasNear && !STATE.tournamentDisqualified) {
+    addNotification('tournament', 'VaR WARNING', 'VaR $' + Math.round(mine.var).toLocaleString() + ' is over 80% of the $' + Math.round(limit).toLocaleString() + ' limit');
   }
 }
 
@@ -18,28 +18,55 @@ function setLbTab(tab) {
   else renderLeaderboardPage();
 }
 
-function renderLeaderboardPage() {
-  // Gather current hub prices for server-side unrealized P&L calculation
-  const prices = {};
-  for (const hubs of Object.values(ALL_HUB_SETS)) {
-    hubs.forEach(h => { prices[h.name] = getPrice(h.name); });
+// Live leaderboard: the server pushes a full snapshot on subscribe, then only
+// changed rows ('leaderboard_diff'). No polling — renders read from LB_LIVE.
+const LB_LIVE = { version: -1, rows: {}, order: [], snapDays: null, snapAt: 0 };
+const LB_SNAPSHOT_MAX_AGE = 60000;
+
+function lbLiveRows() {
+  return LB_LIVE.order.map(n => LB_LIVE.rows[n]).filter(Boolean);
+}
+
+function applyLeaderboardSnapshot(data) {
+  LB_LIVE.version = data.version;
+  LB_LIVE.rows = {};
+  (data.leaderboard || []).forEach(r => { LB_LIVE.rows[r.trader_name] = r; });
+  LB_LIVE.order = (data.leaderboard || []).map(r => r.trader_name);
+  if (STATE.currentPage === 'leaderboard') renderLeaderboardPage();
+}
+
+function applyLeaderboardDiff(data) {
+  // A gap in versions means we missed a push (reconnect) — ask for a fresh baseline
+  if (LB_LIVE.version < 0 || data.version !== LB_LIVE.version + 1) {
+    if (socket && socket.connected) socket.emit('request_leaderboard');
+    return;
   }
-  const pricesParam = encodeURIComponent(JSON.stringify(prices));
+  LB_LIVE.version = data.version;
+  (data.removed || []).forEach(n => { delete LB_LIVE.rows[n]; });
+  (data.rows || []).forEach(r => { LB_LIVE.rows[r.trader_name] = Object.assign(LB_LIVE.rows[r.trader_name] || {}, r); });
+  LB_LIVE.order = Object.keys(LB_LIVE.rows).sort((a, b) => LB_LIVE.rows[a].rank - LB_LIVE.rows[b].rank);
+  if (STATE.currentPage === 'leaderboard' && lbTab !== 'tournament') renderLeaderboardData(lbLiveRows(), true);
+}
+
+function renderLeaderboardPage() {
   const lbRangeMap={'1W':7,'1M':30,'3M':90,'ALL':365};
   const days = lbRangeMap[STATE.lbRange] || 30;
-  // Fetch leaderboard + snapshots in parallel
-  const lbUrl = '/api/leaderboard?prices=' + pricesParam;
-  console.log('[LB] Fetching:', lbUrl.substring(0, 120) + '...');
-  Promise.all([
-    fetch(lbUrl).then(r=>{console.log('[LB] Response status:', r.status, r.url); return r.json();}),
-    fetch('/api/leaderboard/all-snapshots?days=' + days).then(r=>r.json()).catch(()=>({success:false}))
-  ]).then(([lbData, snapData]) => {
-    console.log('[LB] Data received - success:', lbData.success, 'count:', lbData.leaderboard?.length);
-    window._lbSnapshots = (snapData.success && snapData.snapshots) ? snapData.snapshots : {};
-    if(lbData.success && lbData.leaderboard && lbData.leaderboard.length > 0) {
-      renderLeaderboardData(lbData.leaderboard, true);
+  // Equity-curve snapshots change slowly (hourly) — refetch on range change or once a minute
+  const needSnaps = LB_LIVE.snapDays !== days || (Date.now() - LB_LIVE.snapAt) > LB_SNAPSHOT_MAX_AGE;
+  const snapsReady = needSnaps
+    ? fetch('/api/leaderboard/all-snapshots?days=' + days).then(r=>r.json()).catch(()=>({success:false})).then(snapData => {
+        window._lbSnapshots = (snapData.success && snapData.snapshots) ? snapData.snapshots : {};
+        LB_LIVE.snapDays = days; LB_LIVE.snapAt = Date.now();
+      })
+    : Promise.resolve();
+  // Rows come from the socket push when subscribed; fall back to one fetch otherwise
+  const rowsReady = (LB_LIVE.version >= 0)
+    ? Promise.resolve(lbLiveRows())
+    : fetch('/api/leaderboard').then(r=>r.json()).then(d => (d.success && d.leaderboard) ? d.leaderboard : null);
+  Promise.all([rowsReady, snapsReady]).then(([rows]) => {
+    if(rows && rows.length > 0) {
+      renderLeaderboardData(rows, true);
     } else {
-      console.warn('[LB] Falling back to simulated - success:', lbData.success, 'data:', JSON.stringify(lbData).substring(0, 200));
       renderLeaderboardData(null, false);
     }
   }).catch((err)=>{console.error('[LB] Fetch failed:', err); renderLeaderboardData(null, false);});
@@ -437,6 +464,7 @@ function submitMobileTrade() {
 
 let _activeTournament = null;
 let _tournPollTimer = null;
+let _tournStandings = null;   // last {tournament_id, version, standings} pushed by the server
 
 function startTournamentPoll() {
   fetchActiveTournament();
@@ -498,13 +526,33 @@ function renderTournamentLeaderboard() {
     return;
   }
 
+  // Standings are pushed to the tournament room; spectators join it here
+  if (typeof socket !== 'undefined' && socket) socket.emit('subscribe_tournament', {tournament_id: _activeTournament.id});
+  if (_tournStandings && _tournStandings.tournament_id === _activeTournament.id) {
+    drawTournamentStandings(panel, _tournStandings.standings);
+    return;
+  }
   panel.innerHTML = '<div style="text-align:center;padding:20px;color:var(--text-muted)">Loading standings…</div>';
+  fetch(API_BASE + '/api/tournament/' + _activeTournament.id + '/standings')
+    .then(r => r.json())
+    .then(d => {
+      if (!d.success) { panel.innerHTML = '<p style="padding:20px;color:var(--text-muted)">Could not load standings.</p>'; return; }
+      drawTournamentStandings(panel, d.standings);
+    }).catch(() => {
+      panel.innerHTML = '<p style="padding:20px;color:var(--text-muted)">Error loading standings.</p>';
+    });
+}
 
-  const prices = {};
-  for (const hubs of Object.values(ALL_HUB_SETS)) {
-    hubs.forEach(h => { prices[h.name] = getPrice(h.name); });
+function applyTournamentStandings(data) {
+  if (_tournStandings && _tournStandings.tournament_id === data.tournament_id && data.version < _tournStandings.version) return;
+  _tournStandings = data;
+  const panel = document.getElementById('lbTournament');
+  if (panel && panel.style.display !== 'none' && _activeTournament && _activeTournament.id === data.tournament_id) {
+    drawTournamentStandings(panel, data.standings);
   }
+}
 
+function drawTournamentStandings(panel, standings) {
   const endTime = _activeTournament.end_time ? new Date(_activeTournament.end_time + 'Z') : null;
   const countdownStr = endTime
     ? (() => {
@@ -517,56 +565,48 @@ function renderTournamentLeaderboard() {
       })()
     : 'In progress';
 
-  fetch(API_BASE + '/api/tournament/' + _activeTournament.id + '/standings?prices=' + encodeURIComponent(JSON.stringify(prices)))
-    .then(r => r.json())
-    .then(d => {
-      if (!d.success) { panel.innerHTML = '<p style="padding:20px;color:var(--text-muted)">Could not load standings.</p>'; return; }
+  const myRank = STATE.trader ? standings.findIndex(s => s.trader_name === STATE.trader.trader_name) + 1 : 0;
+  if (myRank > 0) {
+    document.getElementById('tournBannerRank').textContent = myRank;
+    document.getElementById('tournBannerTotal').textContent = standings.length;
+  }
 
-      const myRank = STATE.trader ? d.standings.findIndex(s => s.trader_name === STATE.trader.trader_name) + 1 : 0;
-      if (myRank > 0) {
-        document.getElementById('tournBannerRank').textContent = myRank;
-        document.getElementById('tournBannerTotal').textContent = d.standings.length;
-      }
-
-      panel.innerHTML = `
-        <div style="display:flex;align-items:center;gap:12px;margin-bottom:16px;flex-wrap:wrap">
-          <div style="font-size:20px;font-weight:700;color:var(--accent)">🏆 ${_activeTournament.name}</div>
-          <div style="font-size:12px;background:rgba(34,211,238,0.1);border:1px solid rgba(34,211,238,0.3);border-radius:6px;padding:4px 10px;color:var(--accent)">${countdownStr}</div>
-          ${_activeTournament.description ? `<div style="font-size:13px;color:var(--text-muted)">${_activeTournament.description}</div>` : ''}
-        </div>
-        <div class="table-wrap">
-          <table>
-            <thead><tr>
-              <th style="width:48px">#</th>
-              <th>Trader</th>
-              <th>Team</th>
-              <th style="text-align:right">P&L</th>
-              <th style="text-align:right">Return</th>
-              <th style="text-align:right">Trades</th>
-            </tr></thead>
-            <tbody>
-              ${d.standings.map((s, i) => {
-                const isMe = STATE.trader && s.trader_name === STATE.trader.trader_name;
-                const pnlColor = s.total_pnl >= 0 ? 'var(--green)' : 'var(--red)';
-                const medal = s.rank === 1 ? '🥇' : s.rank === 2 ? '🥈' : s.rank === 3 ? '🥉' : s.rank;
-                const pnlStr = (s.total_pnl >= 0 ? '+' : '') + '$' + Math.abs(s.total_pnl).toLocaleString('en-US', {maximumFractionDigits:0});
-                const retStr = (s.ret_pct >= 0 ? '+' : '') + s.ret_pct.toFixed(2) + '%';
-                return `<tr style="${isMe ? 'background:rgba(34,211,238,0.08);border-left:3px solid var(--accent)' : ''}">
-                  <td style="font-size:16px;font-weight:700">${medal}</td>
-                  <td>
-                    ${s.photo_url ? `<img src="${s.photo_url}" style="width:22px;height:22px;border-radius:50%;vertical-align:middle;margin-right:6px;object-fit:cover">` : ''}
-                    <strong>${s.display_name}</strong>${isMe ? ' <span style="font-size:10px;color:var(--accent)">(you)</span>' : ''}
-                  </td>
-                  <td style="font-size:12px;color:${s.team_color || 'var(--text-muted)'}">${s.team_name || '—'}</td>
-                  <td style="text-align:right;font-weight:700;color:${pnlColor}">${pnlStr}</td>
-                  <td style="text-align:right;color:${pnlColor}">${retStr}</td>
-                  <td style="text-align:right">${s.trades}</td>
-                </tr>`;
-              }).join('')}
-            </tbody>
-          </table>
-        </div>`;
-    }).catch(() => {
-      panel.innerHTML = '<p style="padding:20px;color:var(--text-muted)">Error loading standings.</p>';
-    });
+  panel.innerHTML = `
+    <div style="display:flex;align-items:center;gap:12px;margin-bottom:16px;flex-wrap:wrap">
+      <div style="font-size:20px;font-weight:700;color:var(--accent)">🏆 ${_activeTournament.name}</div>
+      <div style="font-size:12px;background:rgba(34,211,238,0.1);border:1px solid rgba(34,211,238,0.3);border-radius:6px;padding:4px 10px;color:var(--accent)">${countdownStr}</div>
+      ${_activeTournament.description ? `<div style="font-size:13px;color:var(--text-muted)">${_activeTournament.description}</div>` : ''}
+    </div>
+    <div class="table-wrap">
+      <table>
+        <thead><tr>
+          <th style="width:48px">#</th>
+          <th>Trader</th>
+          <th>Team</th>
+          <th style="text-align:right">P&L</th>
+          <th style="text-align:right">Return</th>
+          <th style="text-align:right">Trades</th>
+        </tr></thead>
+        <tbody>
+          ${standings.map((s, i) => {
+            const isMe = STATE.trader && s.trader_name === STATE.trader.trader_name;
+            const pnlColor = s.total_pnl >= 0 ? 'var(--green)' : 'var(--red)';
+            const medal = s.rank === 1 ? '🥇' : s.rank === 2 ? '🥈' : s.rank === 3 ? '🥉' : s.rank;
+            const pnlStr = (s.total_pnl >= 0 ? '+' : '') + '$' + Math.abs(s.total_pnl).toLocaleString('en-US', {maximumFractionDigits:0});
+            const retStr = (s.ret_pct >= 0 ? '+' : '') + s.ret_pct.toFixed(2) + '%';
+            return `<tr style="${isMe ? 'background:rgba(34,211,238,0.08);border-left:3px solid var(--accent)' : ''}">
+              <td style="font-size:16px;font-weight:700">${medal}</td>
+              <td>
+                ${s.photo_url ? `<img src="${s.photo_url}" style="width:22px;height:22px;border-radius:50%;vertical-align:middle;margin-right:6px;object-fit:cover">` : ''}
+                <strong>${s.display_name}</strong>${isMe ? ' <span style="font-size:10px;color:var(--accent)">(you)</span>' : ''}
+              </td>
+              <td style="font-size:12px;color:${s.team_color || 'var(--text-muted)'}">${s.team_name || '—'}</td>
+              <td style="text-align:right;font-weight:700;color:${pnlColor}">${pnlStr}</td>
+              <td style="text-align:right;color:${pnlColor}">${retStr}</td>
+              <td style="text-align:right">${s.trades}</td>
+            </tr>`;
+          }).join('')}
+        </tbody>
+      </table>
+    </div>`;
 }
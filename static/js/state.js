@@ -63,6 +63,7 @@ const STATE = {
   tournamentNews: [],
   tournamentNewsPublic: [],
   tournamentDisqualified: false,
+  tournamentRisk: null,
 };
 
 /* =====================================================================
@@ -928,116 +929,36 @@ document.addEventListener('click', function(e) {
 });
 
 /* =====================================================================
-   TOURNAMENT PRICE ENGINE
+   TOURNAMENT PRICES — driven by the server's tournament price engine
    ===================================================================== */
 
-// Compute total news-driven price drift for a specific hub at this tick
-function getTournamentNewsDrift(hubName, currentPrice) {
-  var totalDrift = 0;
-  var now = Date.now();
-  var hasVolBurst = false;
-
-  for (var i = 0; i < STATE.tournamentNews.length; i++) {
-    var ev = STATE.tournamentNews[i];
-    if (ev.is_noise) continue;
-    var affectedHubs;
-    try {
-      affectedHubs = typeof ev.affected_hubs === 'string' ? JSON.parse(ev.affected_hubs) : (ev.affected_hubs || []);
-    } catch(e) {
-      affectedHubs = [];
-    }
-    if (affectedHubs.indexOf(hubName) === -1) continue;
-
-    var flashedAt = new Date(ev.flashed_at).getTime();
-    var delayMs = (ev.delay_seconds || 5) * 1000;
-    var elapsed = now - flashedAt - delayMs;
-    if (elapsed < 0) continue; // Still in delay period
-
-    var tickMs = 8000;
-    var ticksElapsed = Math.floor(elapsed / tickMs);
-    var duration = ev.duration_ticks || 5;
-    var pct = ev.impact_pct || 0;
-    var dir = ev.impact_direction === 'bullish' ? 1 : ev.impact_direction === 'bearish' ? -1 : 0;
-
-    switch (ev.impact_type) {
-      case 'shock':
-        // Full move in first 2 ticks then done
-        if (ticksElapsed < 2) {
-          totalDrift += currentPrice * (pct / 100) * dir * 0.5;
-        }
-        break;
-      case 'trend':
-        // Even drift spread across duration_ticks
-        if (ticksElapsed < duration) {
-          totalDrift += currentPrice * (pct / 100) * dir / duration;
-        }
-        break;
-      case 'spike_revert':
-        if (ticksElapsed < 2) {
-          // Spike phase: full magnitude in 2 ticks
-          totalDrift += currentPrice * (pct / 100) * dir * 0.5;
-        } else if (ticksElapsed < 2 + duration) {
-          // Revert phase: drift back ~65% over duration ticks
-          totalDrift += currentPrice * (pct / 100) * (-dir) * 0.65 / duration;
-        }
-        break;
-      case 'vol_burst':
-        // No directional drift — volatility multiplier handled in tickTournamentPrices
-        if (ticksElapsed < duration) {
-          hasVolBurst = true;
-        }
-        break;
-    }
-  }
-
-  return { drift: totalDrift, volBurst: hasVolBurst };
-}
-
-// Tick tournament prices — runs every 8 seconds for tournament sector hubs only
-function tickTournamentPrices() {
-  if (!isTournamentMode()) return;
-  var sector = STATE.tournamentSector;
-  var hubs = ALL_HUB_SETS[sector];
-  if (!hubs) return;
-
-  for (var i = 0; i < hubs.length; i++) {
-    var h = hubs[i];
-    var current = STATE.tournamentPrices[h.name];
-    if (current === undefined) continue;
-
-    // Base Brownian drift (same formula as tickPrices)
-    var baseDrift = (Math.random() - 0.5) * 2 * (h.base * h.vol / 100 / 15);
-
-    // Weather bias for NG/power
-    if ((sector === 'ng' || sector === 'power') && STATE.weatherBias[h.name]) {
-      baseDrift += current * STATE.weatherBias[h.name] * (0.3 + Math.random() * 0.4);
-    }
-
-    // News impact drift
-    var newsResult = getTournamentNewsDrift(h.name, current);
-    var newsDrift = newsResult.drift;
-
-    // Vol burst: multiply base drift by 4x
-    if (newsResult.volBurst) {
-      baseDrift *= 4;
-    }
-
-    var next = current + baseDrift + newsDrift;
-
-    // Power markets can go negative; others have a floor
-    var isPower = sector === 'power';
-    var priceFloor = isPower ? -h.base * 0.5 : h.base * 0.1;
-    if (next < priceFloor) next = priceFloor;
-
-    STATE.tournamentPrices[h.name] = next;
-
-    // Update history
-    var hist = STATE.tournamentPriceHistory[h.name];
-    if (hist) {
-      hist.push(next);
-      if (hist.length > 200) hist.shift();
-    }
-  }
+// Apply a 'tournament_prices' tick pushed to the tournament room
+function applyTournamentTick(data) {
+  if (!STATE.tournament || data.tournament_id !== STATE.tournament.id) return;
+  if (STATE.tournamentTick !== undefined && data.tick <= STATE.tournamentTick) return;
+  STATE.tournamentTick = data.tick;
+  for (var name in data.prices) {
+    STATE.tournamentPrices[name] = data.prices[name];
+    var hist = STATE.tournamentPriceHistory[name] || (STATE.tournamentPriceHistory[name] = []);
+    hist.push(data.prices[name]);
+    if (hist.length > 200) hist.shift();
+  }
+}
+
+// Load current marks and recent history (tournament start, page load, reconnect)
+function syncTournamentPrices() {
+  if (!STATE.tournament || !STATE.tournament.sector) return;
+  var tid = STATE.tournament.id;
+  fetch(API_BASE + '/api/tournament/' + tid + '/prices?history=60')
+    .then(function(r) { return r.json(); })
+    .then(function(d) {
+      if (!d.success || !STATE.tournament || STATE.tournament.id !== tid) return;
+      STATE.tournamentTick = d.tick;
+      for (var name in d.prices) {
+        STATE.tournamentPrices[name] = d.prices[name];
+        STATE.tournamentPriceHistory[name] = d.history[name] || [d.prices[name]];
+      }
+    }).catch(function() {});
 }
 
 // Initialize tournament prices from a snapshot (called when tournament_start is received)
@@ -1051,12 +972,14 @@ function initTournamentPrices(sector, priceSnapshot) {
     snapshot = {};
   }
 
+  STATE.tournamentTick = undefined;
   for (var i = 0; i < hubs.length; i++) {
     var h = hubs[i];
     var seed = snapshot[h.name] || getPrice(h.name) || h.base;
     STATE.tournamentPrices[h.name] = seed;
-    STATE.tournamentPriceHistory[h.name] = genHistory(seed, 60, h.vol * 0.3);
+    STATE.tournamentPriceHistory[h.name] = [seed];
   }
+  syncTournamentPrices();
 }
 
 // Clean up tournament state when tournament ends
@@ -1066,10 +989,12 @@ function clearTournamentState() {
   STATE.tournamentSector = '';
   STATE.tournamentPrices = {};
   STATE.tournamentPriceHistory = {};
+  STATE.tournamentTick = undefined;
   STATE.tournamentTrades = [];
   STATE.tournamentNews = [];
   STATE.tournamentNewsPublic = [];
   STATE.tournamentDisqualified = false;
+  STATE.tournamentRisk = null;
   try { localStorage.removeItem(traderStorageKey('tournament_trades')); } catch(e) {}
 }
 
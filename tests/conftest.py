@@ -0,0 +1,38 @@
+"""Run the app against a throwaway database (DB_PATH is read when app is imported)."""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='ed_test_'), 'test.db')
+os.environ.setdefault('TOURNAMENT_SHARDS', 'false')
+
+
+@pytest.fixture(scope='session')
+def ed():
+    import app as ed
+    ed.init_db()
+    return ed
+
+
+@pytest.fixture
+def admin():
+    return {'X-Admin-Pin': 'admin123'}
+
+
+@pytest.fixture
+def traders(ed):
+    """Make exactly the given trader names ACTIVE (pin '1'), so enroll-all picks up only them."""
+    def activate(*names):
+        db = ed.get_db_standalone()
+        db.execute("UPDATE traders SET status='INACTIVE'")
+        db.executemany("INSERT INTO traders (trader_name, display_name, pin, status) VALUES (?, ?, '1', 'ACTIVE') "
+                       "ON CONFLICT(trader_name) DO UPDATE SET pin='1', status='ACTIVE'",
+                       [(n, n.title()) for n in names])
+        db.commit()
+        db.close()
+    return activate
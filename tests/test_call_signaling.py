@@ -0,0 +1,48 @@
+"""Calls ring every tab of the callee, then lock on to the tab that answered."""
+
+
+def _events(client, name):
+    return [e['args'][0] for e in client.get_received() if e['name'] == name]
+
+
+def test_call_rings_all_tabs_and_follows_the_answering_one(ed, traders):
+    traders('caller', 'callee')
+    caller = ed.socketio.test_client(ed.app)
+    tabs = [ed.socketio.test_client(ed.app) for _ in range(2)]
+    caller.emit('register_trader', {'trader_name': 'caller'})
+    for tab in tabs:
+        tab.emit('register_trader', {'trader_name': 'callee'})
+    for c in [caller] + tabs:
+        c.get_received()
+
+    caller.emit('call_initiate', {'caller': 'caller', 'callee': 'callee', 'offer': 'sdp'})
+    rings = [_events(tab, 'call_incoming') for tab in tabs]
+    assert all(len(r) == 1 for r in rings)
+    caller_sid = rings[1][0]['sid']
+
+    # Candidates sent before the answer reach every tab, so the one that answers has them
+    caller.emit('call_ice', {'target': 'callee', 'candidate': 'c0', 'from': 'caller'})
+    assert [len(_events(tab, 'call_ice')) for tab in tabs] == [1, 1]
+
+    tabs[1].emit('call_answer', {'caller': 'caller', 'callee': 'callee', 'answer': 'sdp', 'target_sid': caller_sid})
+    answered = _events(caller, 'call_answered')
+    assert len(answered) == 1
+    assert _events(tabs[0], 'call_dismissed') == [{'caller': 'caller'}]
+    assert _events(tabs[1], 'call_dismissed') == []
+
+    caller.emit('call_ice', {'target': 'callee', 'target_sid': answered[0]['sid'], 'candidate': 'c1', 'from': 'caller'})
+    assert [len(_events(tab, 'call_ice')) for tab in tabs] == [0, 1]
+    caller.emit('call_end', {'target': 'callee', 'target_sid': answered[0]['sid'], 'from': 'caller'})
+    assert [len(_events(tab, 'call_ended')) for tab in tabs] == [0, 1]
+
+    for c in [caller] + tabs:
+        c.disconnect()
+
+
+def test_offline_callee_is_an_error(ed, traders):
+    traders('caller')
+    caller = ed.socketio.test_client(ed.app)
+    caller.emit('register_trader', {'trader_name': 'caller'})
+    caller.emit('call_initiate', {'caller': 'caller', 'callee': 'nobody', 'offer': 'sdp'})
+    assert _events(caller, 'call_error') == [{'error': 'nobody is not online'}]
+    caller.disconnect()
@@ -0,0 +1,44 @@
+"""Chat search pages come from one ranking, so messages arriving between pages can't reorder them."""
+
+import random
+
+
+def _post(ed, conv_id, texts):
+    db = ed.get_db_standalone()
+    for text in texts:
+        ed.post_message(db, conv_id, 'searcher', text)
+    db.commit()
+    db.close()
+
+
+def test_pages_neither_skip_nor_repeat(ed, traders):
+    traders('searcher')
+    db = ed.get_db_standalone()
+    conv_id = db.execute("INSERT INTO conversations (name, type) VALUES ('Desk', 'group')").lastrowid
+    db.execute("INSERT INTO conversation_members (conversation_id, trader_name) VALUES (?, 'searcher')", (conv_id,))
+    db.commit()
+    db.close()
+    rng = random.Random(7)
+    # Varied lengths and term counts give varied bm25 scores
+    _post(ed, conv_id, [' '.join(['spread'] * rng.randint(1, 4) + ['filler'] * rng.randint(0, 30))
+                        for _ in range(30)])
+
+    http = ed.app.test_client()
+    args = {'trader': 'searcher', 'q': 'spread', 'conversation_id': conv_id, 'limit': 10}
+    first = http.get('/api/chat/search', query_string=args).get_json()
+    whole = http.get('/api/chat/search', query_string=dict(args, limit=50)).get_json()
+    expected = [r['id'] for r in whole['results']]
+    assert len(expected) == 30 and whole['next_cursor'] is None
+
+    # Lots of newer, shorter matches shift every bm25 score before page 2
+    _post(ed, conv_id, ['spread'] * 200)
+    seen = [r['id'] for r in first['results']]
+    cursor = first['next_cursor']
+    while cursor:
+        page = http.get('/api/chat/search', query_string=dict(args, cursor=cursor)).get_json()
+        seen += [r['id'] for r in page['results']]
+        cursor = page['next_cursor']
+    assert seen == expected
+
+    assert http.get('/api/chat/search', query_string=dict(args, q='other', cursor=first['next_cursor'])).status_code == 400
+    assert http.get('/api/chat/search', query_string=dict(args, cursor='gone:10')).status_code == 410
@@ -0,0 +1,25 @@
+"""Every path that adds conversation members drops that conversation's cached mention index."""
+
+
+def _broadcast_conversation(ed):
+    db = ed.get_db_standalone()
+    try:
+        return db.execute("SELECT id FROM conversations WHERE name='System Broadcasts'").fetchone()['id']
+    finally:
+        db.close()
+
+
+def test_broadcast_newcomer_is_mentionable(ed, admin, traders):
+    http = ed.app.test_client()
+    traders('early')
+    http.post('/api/admin/broadcast', json={'body': 'first'}, headers=admin)
+    conv_id = _broadcast_conversation(ed)
+    db = ed.get_db_standalone()
+    assert ed.resolve_mentions(db, conv_id, 'hi @newcomer') == set()      # caches the index
+    db.close()
+
+    traders('early', 'newcomer')
+    http.post('/api/admin/broadcast', json={'body': 'second'}, headers=admin)
+    db = ed.get_db_standalone()
+    assert ed.resolve_mentions(db, conv_id, 'hi @newcomer') == {'newcomer'}
+    db.close()
@@ -0,0 +1,47 @@
+"""presence_change follows the trader across workers, not just this worker's sockets."""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def multi_worker(ed, monkeypatch):
+    monkeypatch.setattr(ed, 'MULTI_WORKER', True)
+    yield ed
+    db = ed.get_db_standalone()
+    db.execute("DELETE FROM shared_state WHERE key LIKE 'presence:%'")
+    db.commit()
+    db.close()
+
+
+def _presence(client):
+    return [e['args'][0] for e in client.get_received() if e['name'] == 'presence_change']
+
+
+def _other_worker(ed, traders):
+    db = ed.get_db_standalone()
+    db.execute("INSERT OR REPLACE INTO shared_state (key, value, worker_id, updated_at) "
+               "VALUES ('presence:other', ?, 'other', strftime('%s', 'now'))",
+               (json.dumps({'connections': len(traders), 'traders': {t: ['x'] for t in traders}}),))
+    db.commit()
+    db.close()
+
+
+def test_tab_on_another_worker_keeps_trader_online(multi_worker, traders):
+    ed = multi_worker
+    traders('roamer', 'watcher')
+    watcher = ed.socketio.test_client(ed.app)
+    tab = ed.socketio.test_client(ed.app)
+
+    _other_worker(ed, ['roamer'])
+    tab.emit('register_trader', {'trader_name': 'roamer'})
+    tab.disconnect()
+    assert _presence(watcher) == []     # online elsewhere throughout: no online, no offline
+
+    _other_worker(ed, [])
+    tab = ed.socketio.test_client(ed.app)
+    tab.emit('register_trader', {'trader_name': 'roamer'})
+    tab.disconnect()
+    assert _presence(watcher) == [{'trader': 'roamer', 'online': True}, {'trader': 'roamer', 'online': False}]
+    watcher.disconnect()
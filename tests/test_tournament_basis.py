@@ -0,0 +1,61 @@
+"""Basis trades in sector tournaments are valued at the hub-minus-basisHub differential."""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def tournament(ed, admin, traders):
+    """A started ng tournament with two entrants; returns (tid, http client)."""
+    from routes import public
+    traders('basis', 'flat')
+    http = ed.app.test_client()
+    tid = http.post('/api/admin/tournaments', json={'name': 'Basis', 'sector': 'ng'}, headers=admin).get_json()['id']
+    http.post(f'/api/admin/tournaments/{tid}/enroll-all', headers=admin)
+    http.post(f'/api/admin/tournaments/{tid}/start', json={}, headers=admin)
+    yield tid, http
+    public.drop_tournament_prices(tid)
+
+
+def _trades(ed, tid):
+    db = ed.get_db_standalone()
+    try:
+        return {r['id']: json.loads(r['trade_data']) for r in db.execute(
+            "SELECT id, trade_data FROM tournament_trades WHERE tournament_id=?", (tid,))}
+    finally:
+        db.close()
+
+
+def test_end_closes_basis_trade_at_differential(ed, admin, tournament):
+    from routes import public
+    tid, http = tournament
+    pin = {'X-Trader-Pin': '1'}
+    trade = {'type': 'BASIS_SWAP', 'direction': 'BUY', 'hub': 'AECO', 'basisHub': 'Henry Hub',
+             'volume': 10000, 'entryPrice': -0.25}
+    basis_id = http.post(f'/api/tournament/{tid}/trade/basis', json=trade, headers=pin).get_json()['trade_id']
+    # No basisHub: there is no differential to mark it at, so it isn't priced by the server
+    unpriced = dict(trade, basisHub=None)
+    unpriced_id = http.post(f'/api/tournament/{tid}/trade/flat', json=unpriced, headers=pin).get_json()['trade_id']
+
+    db = ed.get_db_standalone()
+    tourn = db.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    live = {s['trader_name']: s for s in public.tournament_standings(db, tourn)}
+    marks = public.tournament_marks(db, tourn)[1]
+    db.close()
+    differential = marks['AECO'] - marks['Henry Hub']
+    assert live['basis']['unrealized_pnl'] == pytest.approx((differential + 0.25) * 10000, abs=0.01)
+    assert live['flat']['unrealized_pnl'] == 0
+
+    standings = http.post(f'/api/admin/tournaments/{tid}/end', headers=admin).get_json()['standings']
+    trades = _trades(ed, tid)
+    closed = trades[basis_id]
+    assert closed['status'] == 'CLOSED' and closed['closeReason'] == 'TOURNAMENT_ENDED'
+    assert closed['closePrice'] == pytest.approx(differential)
+    assert closed['realizedPnl'] == pytest.approx(round((differential + 0.25) * 10000, 2))
+    # Not the outright AECO mark: that would book (1.95 + 0.25) * 10000 out of thin air
+    assert abs(closed['realizedPnl'] - (marks['AECO'] + 0.25) * 10000) > 1
+    assert trades[unpriced_id]['status'] == 'CLOSED' and trades[unpriced_id]['realizedPnl'] == 0
+    final = {s['trader_name']: s for s in standings}
+    assert final['basis']['total_pnl'] == pytest.approx(closed['realizedPnl'], abs=0.01)
+    assert final['flat']['total_pnl'] == 0
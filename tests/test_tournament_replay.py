@@ -0,0 +1,117 @@
+"""The replay recorder runs a tick behind the engine and keeps its log in time order."""
+
+import json
+from datetime import datetime, timedelta
+
+
+def _log(public, tid):
+    with open(public.replay_path(tid), 'rb') as f:
+        public._read_replay_header(f)
+        return [(kind, t_ms, payload) for kind, t_ms, payload, _ in public._read_replay(f)]
+
+
+def test_recorder_stays_a_tick_behind(ed, admin, traders):
+    from routes import public
+    traders('rec')
+    db = ed.get_db_standalone()
+    http = ed.app.test_client()
+    tid = http.post('/api/admin/tournaments', json={'name': 'Replay', 'sector': 'ng'}, headers=admin).get_json()['id']
+    http.post(f'/api/admin/tournaments/{tid}/enroll-all', headers=admin)
+    http.post(f'/api/admin/tournaments/{tid}/start', json={}, headers=admin)
+    try:
+        # Halfway through tick 10, with one trade from tick 2 and one from the current tick
+        tick_s = public.TOURNAMENT_TICK_SECONDS
+        now = datetime.utcnow()
+        start = now - timedelta(seconds=10.5 * tick_s)
+        db.execute("UPDATE tournaments SET start_time=?, end_time=? WHERE id=?",
+                   (start.isoformat(), (start + timedelta(hours=1)).isoformat(), tid))
+        for at in (start + timedelta(seconds=2 * tick_s), now):
+            td = {'type': 'SWAP', 'direction': 'BUY', 'hub': 'Henry Hub', 'volume': 1000,
+                  'entryPrice': 2.75, 'status': 'OPEN', 'timestamp': at.isoformat()}
+            db.execute("INSERT INTO tournament_trades (tournament_id, trader_name, trade_data) VALUES (?, 'rec', ?)",
+                       (tid, json.dumps(td)))
+        db.commit()
+
+        public._tournament_replay_tick()
+        log = _log(public, tid)
+        ticks = [t_ms / (tick_s * 1000) for kind, t_ms, _ in log if kind in (public._REPLAY_KEY, public._REPLAY_DELTA)]
+        assert ticks == list(range(10))
+        assert [kind for kind, _, _ in log].count(public._REPLAY_TRADE) == 1
+
+        http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+        public._tournament_replay_tick()
+        log = _log(public, tid)
+        stamps = [t_ms for _, t_ms, _ in log]
+        assert stamps == sorted(stamps)
+        assert log[-1][0] == public._REPLAY_END
+        ticks = [t_ms / (tick_s * 1000) for kind, t_ms, _ in log if kind in (public._REPLAY_KEY, public._REPLAY_DELTA)]
+        assert ticks == list(range(11))
+        events = [json.loads(p)['event'] for kind, _, p in log if kind == public._REPLAY_TRADE]
+        assert events == ['open', 'open', 'close', 'close']
+    finally:
+        db.close()
+        public.drop_tournament_prices(tid)
+        public.drop_tournament_replay(tid)
+
+
+def _started(ed, http, admin, ticks):
+    """A started ng tournament backdated to halfway through tick `ticks`."""
+    from routes import public
+    tid = http.post('/api/admin/tournaments', json={'name': 'Replay', 'sector': 'ng'}, headers=admin).get_json()['id']
+    http.post(f'/api/admin/tournaments/{tid}/start', json={}, headers=admin)
+    start = datetime.utcnow() - timedelta(seconds=(ticks + 0.5) * public.TOURNAMENT_TICK_SECONDS)
+    db = ed.get_db_standalone()
+    db.execute("UPDATE tournaments SET start_time=?, end_time=? WHERE id=?",
+               (start.isoformat(), (start + timedelta(hours=1)).isoformat(), tid))
+    db.commit()
+    db.close()
+    return tid, start
+
+
+def test_oversized_news_is_clipped(ed, admin):
+    from routes import public
+    http = ed.app.test_client()
+    tid, start = _started(ed, http, admin, 12)
+    try:
+        db = ed.get_db_standalone()
+        db.execute("INSERT INTO tournament_news_events (tournament_id, headline, description, status, flashed_at) "
+                   "VALUES (?, ?, ?, 'FLASHED', ?)",
+                   (tid, 'H' * 70000, 'é' * 70000, (start + timedelta(seconds=1)).isoformat()))
+        db.commit()
+        db.close()
+        public._tournament_replay_tick()
+        log = _log(public, tid)
+        news = [json.loads(p) for kind, _, p in log if kind == public._REPLAY_NEWS]
+        assert len(news) == 1 and len(news[0]['headline']) == public.REPLAY_HEADLINE_CHARS
+        assert len([k for k, _, _ in log if k in (public._REPLAY_KEY, public._REPLAY_DELTA)]) == 12
+    finally:
+        http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+        public._tournament_replay_tick()
+        public.drop_tournament_prices(tid)
+        public.drop_tournament_replay(tid)
+
+
+def test_failed_pass_leaves_recorder_where_it_was(ed, admin, monkeypatch):
+    from routes import public
+    http = ed.app.test_client()
+    tid, _ = _started(ed, http, admin, 12)
+    try:
+        record = public._replay_record
+
+        def broken(kind, t_ms, body=None):
+            raise ValueError('payload too large')
+        monkeypatch.setattr(public, '_replay_record', broken)
+        public._tournament_replay_tick()
+        monkeypatch.setattr(public, '_replay_record', record)
+        public._tournament_replay_tick()
+
+        log = _log(public, tid)
+        frames = [(kind, t_ms) for kind, t_ms, _ in log if kind in (public._REPLAY_KEY, public._REPLAY_DELTA)]
+        # Nothing skipped, and the first frame is a keyframe the deltas build on
+        assert [t_ms / (public.TOURNAMENT_TICK_SECONDS * 1000) for _, t_ms in frames] == list(range(12))
+        assert frames[0][0] == public._REPLAY_KEY
+    finally:
+        http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+        public._tournament_replay_tick()
+        public.drop_tournament_prices(tid)
+        public.drop_tournament_replay(tid)
@@ -0,0 +1,101 @@
+"""Server-side tournament VaR: basis trades carry differential risk, and only
+sector tournaments disqualify on it."""
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+
+def _book(*positions):
+    open_ = {i: dict({'basis': None, 'entry': 2.0, 'volume': 10000, 'mult': 1}, **p)
+             for i, p in enumerate(positions)}
+    return {'entrants': {'t': {'meta': {'entry_status': 'ACTIVE'}, 'open': open_}}}
+
+
+def test_basis_trade_is_long_hub_short_basis_hub():
+    from routes import public
+    marks = {'AECO': 1.95, 'Henry Hub': 2.75}
+    traders, hubs, prices, units = public._entrant_units(
+        _book({'hub': 'AECO', 'basis': 'Henry Hub', 'entry': -0.8}), marks)
+    assert traders == ['t'] and hubs == ['AECO', 'Henry Hub']
+    assert prices.tolist() == [1.95, 2.75]
+    assert units.tolist() == [[10000, -10000]]
+
+
+def test_basis_risk_nets_with_outright_leg():
+    """Long Henry Hub outright plus a long AECO/Henry Hub basis is long AECO only."""
+    from routes import public
+    marks = {'AECO': 1.95, 'Henry Hub': 2.75}
+    hedged = public.tournament_var(_book({'hub': 'Henry Hub'},
+                                         {'hub': 'AECO', 'basis': 'Henry Hub', 'entry': -0.8}), marks)
+    outright = public.tournament_var(_book({'hub': 'AECO'}), marks)
+    assert hedged['t']['var'] == pytest.approx(outright['t']['var'])
+
+
+def test_unpriced_basis_trade_carries_no_risk():
+    from routes import public
+    # No basisHub ('') or no mark for it: valued at entry by the standings, so no VaR either
+    book = _book({'hub': 'AECO', 'basis': '', 'entry': -0.8}, {'hub': 'AECO', 'basis': 'Nowhere', 'entry': -0.8})
+    traders, hubs, prices, units = public._entrant_units(book, {'AECO': 1.95})
+    assert hubs == [] and not np.any(units)
+    assert public.tournament_var(book, {'AECO': 1.95})['t']['var'] == 0
+
+
+def _start(ed, http, admin, sector):
+    tid = http.post('/api/admin/tournaments', json={'name': 'VaR', 'sector': sector, 'var_limit': 1},
+                    headers=admin).get_json()['id']
+    http.post(f'/api/admin/tournaments/{tid}/enroll-all', headers=admin)
+    http.post(f'/api/admin/tournaments/{tid}/start', json={}, headers=admin)
+    trade = {'type': 'SWAP', 'direction': 'BUY', 'hub': 'Henry Hub', 'volume': 10000, 'entryPrice': 2.75}
+    if sector:
+        assert http.post(f'/api/tournament/{tid}/trade/risky', json=trade,
+                         headers={'X-Trader-Pin': '1'}).get_json()['success']
+    else:
+        # Main-desk tournaments are scored off the trader's desk trades
+        db = ed.get_db_standalone()
+        db.execute("INSERT INTO trades (trader_name, trade_data, created_at) VALUES ('risky', ?, ?)",
+                   (json.dumps(dict(trade, status='OPEN')), datetime.utcnow().isoformat()))
+        db.commit()
+        db.close()
+    return tid
+
+
+def _entry_status(ed, tid):
+    db = ed.get_db_standalone()
+    try:
+        return db.execute("SELECT status FROM tournament_entries WHERE tournament_id=? AND trader_name='risky'",
+                          (tid,)).fetchone()['status']
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize('sector, disqualified', [('ng', True), ('', False)])
+def test_risk_pass_only_disqualifies_sector_tournaments(ed, admin, traders, sector, disqualified):
+    from routes import public
+    traders('risky')
+    http = ed.app.test_client()
+    tid = _start(ed, http, admin, sector)
+    try:
+        assert http.get(f'/api/tournament/{tid}/risk').get_json()['risk']['risky']['var'] > 1
+        payloads, dqs = public._tournament_risk_tick()
+        assert [d['trader_name'] for t, d in dqs if t == tid] == (['risky'] if disqualified else [])
+        assert (_entry_status(ed, tid) == 'DISQUALIFIED') == disqualified
+    finally:
+        http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+        public.drop_tournament_prices(tid)
+
+
+def test_no_client_disqualify_route(ed, admin, traders):
+    """Breaches are the server's call: nobody can DQ an entrant by posting their name."""
+    from routes import public
+    traders('risky')
+    http = ed.app.test_client()
+    tid = _start(ed, http, admin, 'ng')
+    try:
+        assert http.post(f'/api/tournament/{tid}/disqualify/risky', json={}).status_code in (404, 405)
+        assert _entry_status(ed, tid) == 'ACTIVE'
+    finally:
+        http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+        public.drop_tournament_prices(tid)
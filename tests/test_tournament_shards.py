@@ -0,0 +1,75 @@
+"""A write that loses the race with the end-of-tournament shard merge is rejected, not lost."""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def sharded(ed, admin, traders, monkeypatch):
+    """A started ng tournament in its own shard; returns (tid, http client)."""
+    from routes import public
+    monkeypatch.setattr(ed, 'TOURNAMENT_SHARDS', True)
+    traders('late')
+    http = ed.app.test_client()
+    tid = http.post('/api/admin/tournaments', json={'name': 'Shard', 'sector': 'ng'}, headers=admin).get_json()['id']
+    http.post(f'/api/admin/tournaments/{tid}/enroll-all', headers=admin)
+    assert http.post(f'/api/admin/tournaments/{tid}/start', json={}, headers=admin).get_json()['tournament']['shard']
+    yield tid, http
+    public.drop_tournament_prices(tid)
+
+
+def _insert_trade(db, schema, tid):
+    db.execute(f"INSERT INTO {schema}.tournament_trades (tournament_id, trader_name, trade_data) VALUES (?, 'late', ?)",
+               (tid, json.dumps({'type': 'SWAP', 'status': 'OPEN'})))
+    db.commit()
+
+
+def test_write_after_merge_is_rejected(ed, admin, sharded):
+    tid, http = sharded
+    writer = ed.get_db_standalone()
+    stale = writer.execute("SELECT * FROM tournaments WHERE id=?", (tid,)).fetchone()
+    schema = ed.tournament_schema(writer, stale)
+    assert schema != 'main'
+    path = os.path.join(ed.TOURNAMENT_SHARD_DIR, stale['shard'])
+
+    http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+    assert not os.path.exists(path)
+    # The writer resolved the shard before the merge: its write must fail, not vanish with the file
+    with pytest.raises(sqlite3.IntegrityError, match=ed.SHARD_CLOSED):
+        _insert_trade(writer, schema, tid)
+    writer.rollback()
+    # Resolving from the stale row again finds main, without ATTACH creating an empty shard
+    assert ed.tournament_schema(writer, stale) == 'main'
+    assert not os.path.exists(path)
+    writer.close()
+
+
+def test_sealed_shard_is_reattached_when_resharded(ed, admin, sharded):
+    tid, http = sharded
+    writer = ed.get_db_standalone()
+    schema = ed.tournament_schema(writer, tid)
+    _insert_trade(writer, schema, tid)
+
+    http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+    http.put(f'/api/admin/tournaments/{tid}', json={'status': 'ACTIVE'}, headers=admin)
+    # Still attached to the old, sealed file: the new shard must be picked up instead
+    assert ed.tournament_schema(writer, tid) == schema
+    _insert_trade(writer, schema, tid)
+    db = ed.get_db_standalone()
+    count = db.execute(f"SELECT COUNT(*) FROM {ed.tournament_schema(db, tid)}.tournament_trades "
+                       "WHERE tournament_id=?", (tid,)).fetchone()[0]
+    assert count == 2
+    db.close()
+    writer.close()
+    http.post(f'/api/admin/tournaments/{tid}/end', headers=admin)
+
+
+def test_route_write_to_merged_shard_is_409(ed):
+    with ed.app.test_request_context():
+        response, status = ed.shard_closed(sqlite3.IntegrityError(ed.SHARD_CLOSED))
+        assert status == 409 and response.get_json()['error'] == 'Tournament has ended'
+        with pytest.raises(sqlite3.IntegrityError):
+            ed.shard_closed(sqlite3.IntegrityError('UNIQUE constraint failed'))